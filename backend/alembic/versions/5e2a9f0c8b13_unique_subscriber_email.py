@@ -0,0 +1,34 @@
+"""Make subscriber emails unique and case-normalized
+
+Revision ID: 5e2a9f0c8b13
+Revises: 9c4d7e2f1a6b
+Create Date: 2026-10-18 11:20:05.331870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a9f0c8b13'
+down_revision: Union[str, None] = '9c4d7e2f1a6b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop case/whitespace duplicates (keeping the oldest row), then normalize
+    op.execute(
+        "DELETE FROM subscribers WHERE id NOT IN ("
+        "SELECT MIN(id) FROM subscribers GROUP BY lower(trim(email)))"
+    )
+    op.execute("UPDATE subscribers SET email = lower(trim(email))")
+    op.drop_index('ix_subscribers_email', table_name='subscribers')
+    op.create_index(op.f('ix_subscribers_email'), 'subscribers', ['email'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_subscribers_email'), table_name='subscribers')
+    op.create_index('ix_subscribers_email', 'subscribers', ['email'], unique=False)
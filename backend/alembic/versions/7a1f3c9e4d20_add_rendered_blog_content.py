@@ -0,0 +1,32 @@
+"""Add rendered blog content columns
+
+Revision ID: 7a1f3c9e4d20
+Revises: 5e2a9f0c8b13
+Create Date: 2026-10-18 12:41:58.602117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1f3c9e4d20'
+down_revision: Union[str, None] = '5e2a9f0c8b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing posts are rendered afterwards with `python rerender_posts.py`
+    op.add_column('blog_posts', sa.Column('content_html', sa.Text(), nullable=True))
+    op.add_column('blog_posts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('blog_posts', sa.Column('render_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('blog_posts') as batch_op:
+        batch_op.drop_column('render_version')
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('content_html')
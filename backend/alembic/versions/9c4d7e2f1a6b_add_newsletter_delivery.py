@@ -0,0 +1,58 @@
+"""Add newsletter delivery tracking and subscribers
+
+Revision ID: 9c4d7e2f1a6b
+Revises: 3b8e51c2a7d4
+Create Date: 2026-10-18 10:03:27.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4d7e2f1a6b'
+down_revision: Union[str, None] = '3b8e51c2a7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE newsletterstatus ADD VALUE IF NOT EXISTS 'SENDING'")
+
+    # main.py runs create_all on import, so a database the app has already
+    # started against has these tables before the migration runs
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'subscribers' not in tables:
+        op.create_table('subscribers',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_subscribers_email'), 'subscribers', ['email'], unique=False)
+    if 'newsletter_deliveries' not in tables:
+        op.create_table('newsletter_deliveries',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('newsletter_id', sa.String(), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'SENDING', 'SENT', 'FAILED', name='deliverystatus'), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['newsletter_id'], ['newsletters.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('newsletter_id', 'email', name='uq_newsletter_deliveries_newsletter_email')
+        )
+        op.create_index('ix_newsletter_deliveries_newsletter_status_id', 'newsletter_deliveries', ['newsletter_id', 'status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_newsletter_deliveries_newsletter_status_id', table_name='newsletter_deliveries')
+    op.drop_table('newsletter_deliveries')
+    op.drop_index(op.f('ix_subscribers_email'), table_name='subscribers')
+    op.drop_table('subscribers')
+    # PostgreSQL cannot drop a single enum value; 'SENDING' is left in place
@@ -0,0 +1,48 @@
+"""Add file path indexes
+
+Revision ID: a4e9b7c2d5f1
+Revises: f5c1a8d3b7e2
+Create Date: 2026-10-18 19:22:37.804116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e9b7c2d5f1'
+down_revision: Union[str, None] = 'f5c1a8d3b7e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table) pairs; both tables are created by the app when missing
+INDEXES = [
+    ('ix_files_file_path', 'files'),
+    ('ix_file_derivatives_file_path', 'file_derivatives'),
+]
+
+
+def existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    if table not in inspector.get_table_names():
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    for name, table in INDEXES:
+        indexes = existing_indexes(table)
+        if indexes is None or name in indexes:
+            continue
+        # Byte order on PostgreSQL, matching the order storage lists keys in
+        op.create_index(name, table, ['file_path'], unique=False, postgresql_ops={'file_path': 'COLLATE "C"'})
+
+
+def downgrade() -> None:
+    for name, table in INDEXES:
+        indexes = existing_indexes(table)
+        if indexes is None or name not in indexes:
+            continue
+        op.drop_index(name, table_name=table)
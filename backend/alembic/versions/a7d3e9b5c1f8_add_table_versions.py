@@ -0,0 +1,51 @@
+"""Add table versions
+
+Revision ID: a7d3e9b5c1f8
+Revises: f1b5d9c3a7e4
+Create Date: 2026-10-19 09:12:44.208163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9b5c1f8'
+down_revision: Union[str, None] = 'f1b5d9c3a7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables app.services.table_versions installs version triggers on
+TRACKED_TABLES = [
+    'blog_posts', 'newsletters', 'newsletter_deliveries', 'files',
+    'file_derivatives', 'section_visibility', 'contact_messages'
+]
+
+
+def upgrade() -> None:
+    # The rows and the triggers that bump them are installed at startup, and
+    # main.py runs create_all on import, so the table may exist already
+    if 'table_versions' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('changed_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade() -> None:
+    # The triggers would fail every write once the table is gone
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for table in TRACKED_TABLES:
+        if postgres:
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_version ON {table}')
+        else:
+            for suffix in ('ai', 'au', 'ad'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_version_{suffix}')
+    if postgres:
+        op.execute('DROP FUNCTION IF EXISTS bump_table_version()')
+    op.drop_table('table_versions')
@@ -0,0 +1,76 @@
+"""Add blog full-text search index
+
+Revision ID: b6d2e8a41f57
+Revises: 7a1f3c9e4d20
+Create Date: 2026-10-18 14:07:31.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2e8a41f57'
+down_revision: Union[str, None] = '7a1f3c9e4d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS blog_posts_fts USING fts5(
+        title, excerpt, content,
+        content='blog_posts', content_rowid='rowid',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ai AFTER INSERT ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(rowid, title, excerpt, content)
+        VALUES (new.rowid, new.title, new.excerpt, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ad AFTER DELETE ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.rowid, old.title, old.excerpt, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_posts_fts_au AFTER UPDATE OF title, excerpt, content ON blog_posts BEGIN
+        INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, content)
+        VALUES ('delete', old.rowid, old.title, old.excerpt, old.content);
+        INSERT INTO blog_posts_fts(rowid, title, excerpt, content)
+        VALUES (new.rowid, new.title, new.excerpt, new.content);
+    END
+    """,
+    # Index posts that already exist
+    "INSERT INTO blog_posts_fts(blog_posts_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') || "
+    "setweight(to_tsvector('english', content), 'C')"
+)
+
+
+def upgrade() -> None:
+    # main.py installs the same index on import, so it may exist already
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_blog_posts_search ON blog_posts USING GIN (({POSTGRES_DOCUMENT}))")
+    else:
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX ix_blog_posts_search")
+    else:
+        op.execute("DROP TRIGGER blog_posts_fts_au")
+        op.execute("DROP TRIGGER blog_posts_fts_ad")
+        op.execute("DROP TRIGGER blog_posts_fts_ai")
+        op.execute("DROP TABLE blog_posts_fts")
@@ -0,0 +1,47 @@
+"""Add newsletter delivery leases
+
+Revision ID: b9e4c2d7a3f6
+Revises: a7d3e9b5c1f8
+Create Date: 2026-10-19 09:12:44.218305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4c2d7a3f6'
+down_revision: Union[str, None] = 'a7d3e9b5c1f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def delivery_columns():
+    inspector = sa.inspect(op.get_bind())
+    if 'newsletter_deliveries' not in inspector.get_table_names():
+        return None
+    return {column['name'] for column in inspector.get_columns('newsletter_deliveries')}
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE newsletterstatus ADD VALUE IF NOT EXISTS 'FAILED'")
+
+    columns = delivery_columns()
+    if columns is None or 'claimed_by' in columns:
+        return
+    op.add_column('newsletter_deliveries', sa.Column('claimed_by', sa.String(length=36), nullable=True))
+    op.add_column('newsletter_deliveries', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    columns = delivery_columns()
+    if columns is None or 'claimed_by' not in columns:
+        return
+    with op.batch_alter_table('newsletter_deliveries') as batch_op:
+        batch_op.drop_column('lease_expires_at')
+        batch_op.drop_column('claimed_by')
+    # PostgreSQL cannot drop a single enum value; 'FAILED' is left in place
@@ -0,0 +1,44 @@
+"""Add content hash to files
+
+Revision ID: d3a7c5e9f182
+Revises: b6d2e8a41f57
+Create Date: 2026-10-18 15:02:44.730518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7c5e9f182'
+down_revision: Union[str, None] = 'b6d2e8a41f57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def file_columns():
+    inspector = sa.inspect(op.get_bind())
+    if 'files' not in inspector.get_table_names():
+        return None
+    return {column['name'] for column in inspector.get_columns('files')}
+
+
+def upgrade() -> None:
+    # The files table is created by the app (create_all) rather than an
+    # earlier migration; when it is missing, create_all adds the column too
+    columns = file_columns()
+    if columns is None or 'sha256' in columns:
+        return
+    op.add_column('files', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_files_sha256'), 'files', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    columns = file_columns()
+    if columns is None or 'sha256' not in columns:
+        return
+    op.drop_index(op.f('ix_files_sha256'), table_name='files')
+    with op.batch_alter_table('files') as batch_op:
+        batch_op.drop_column('sha256')
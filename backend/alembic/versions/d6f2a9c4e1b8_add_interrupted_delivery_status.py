@@ -0,0 +1,42 @@
+"""Add interrupted delivery status
+
+Revision ID: d6f2a9c4e1b8
+Revises: b9e4c2d7a3f6
+Create Date: 2026-10-20 10:41:27.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f2a9c4e1b8'
+down_revision: Union[str, None] = 'b9e4c2d7a3f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INTERRUPTED_ERROR = 'Interrupted mid-send; not retried to avoid duplicates'
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE deliverystatus ADD VALUE IF NOT EXISTS 'INTERRUPTED'")
+
+    if 'newsletter_deliveries' not in sa.inspect(bind).get_table_names():
+        return
+    # Deliveries interrupted so far were recorded as failures with this message
+    op.execute(
+        sa.text("UPDATE newsletter_deliveries SET status = 'INTERRUPTED' WHERE status = 'FAILED' AND error = :error")
+        .bindparams(error=INTERRUPTED_ERROR)
+    )
+
+
+def downgrade() -> None:
+    if 'newsletter_deliveries' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.execute("UPDATE newsletter_deliveries SET status = 'FAILED' WHERE status = 'INTERRUPTED'")
+    # PostgreSQL cannot drop a single enum value; 'INTERRUPTED' is left in place
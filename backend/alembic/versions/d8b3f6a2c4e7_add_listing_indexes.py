@@ -0,0 +1,28 @@
+"""Add listing indexes
+
+Revision ID: d8b3f6a2c4e7
+Revises: c2f7d4a9e1b3
+Create Date: 2026-10-18 21:02:51.740318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b3f6a2c4e7'
+down_revision: Union[str, None] = 'c2f7d4a9e1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_blog_posts_status_published_at_id', 'blog_posts', ['status', 'published_at', 'id'], unique=False)
+    op.create_index('ix_newsletters_status', 'newsletters', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_newsletters_status', table_name='newsletters')
+    op.drop_index('ix_blog_posts_status_published_at_id', table_name='blog_posts')
@@ -0,0 +1,62 @@
+"""Add contact message archive
+
+Revision ID: e4a1c7f9b2d6
+Revises: d8b3f6a2c4e7
+Create Date: 2026-10-18 21:48:16.205937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a1c7f9b2d6'
+down_revision: Union[str, None] = 'd8b3f6a2c4e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def message_columns():
+    inspector = sa.inspect(op.get_bind())
+    if 'contact_messages' not in inspector.get_table_names():
+        return None
+    return {column['name'] for column in inspector.get_columns('contact_messages')}
+
+
+def upgrade() -> None:
+    # contact_messages is created by the app, which then adds the column and counters itself
+    columns = message_columns()
+    if columns is None or 'is_archived' in columns:
+        return
+    op.add_column('contact_messages', sa.Column('is_archived', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.drop_index('ix_contact_messages_created_at_id', table_name='contact_messages')
+    op.create_index('ix_contact_messages_archived_created_at_id', 'contact_messages', ['is_archived', 'created_at', 'id'], unique=False)
+    # Nothing is archived yet; row 1 keeps counting the inbox
+    op.execute(
+        "INSERT INTO contact_inbox_counters (id, total, unread) SELECT 2, 0, 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM contact_inbox_counters WHERE id = 2)"
+    )
+
+
+def downgrade() -> None:
+    columns = message_columns()
+    if columns is None or 'is_archived' not in columns:
+        return
+    # Archived messages go back to the inbox
+    op.execute(
+        "UPDATE contact_inbox_counters SET "
+        "total = total + coalesce((SELECT total FROM contact_inbox_counters WHERE id = 2), 0), "
+        "unread = unread + coalesce((SELECT unread FROM contact_inbox_counters WHERE id = 2), 0) "
+        "WHERE id = 1"
+    )
+    op.execute("DELETE FROM contact_inbox_counters WHERE id = 2")
+    op.drop_index('ix_contact_messages_archived_created_at_id', table_name='contact_messages')
+    # When main.py's create_all made the table, it has the archive index and the
+    # counters migration adds this one too, so both are present
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('contact_messages')}
+    if 'ix_contact_messages_created_at_id' not in indexes:
+        op.create_index('ix_contact_messages_created_at_id', 'contact_messages', ['created_at', 'id'], unique=False)
+    with op.batch_alter_table('contact_messages') as batch_op:
+        batch_op.drop_column('is_archived')
@@ -0,0 +1,45 @@
+"""Add file derivatives table
+
+Revision ID: e81f4b2c9d06
+Revises: d3a7c5e9f182
+Create Date: 2026-10-18 15:48:12.264930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f4b2c9d06'
+down_revision: Union[str, None] = 'd3a7c5e9f182'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Like the sha256 column, this depends on the app-created files table;
+    # create_all adds it when the files table doesn't exist yet. main.py runs
+    # create_all on import, so it may also exist before the migration runs
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'files' not in tables or 'file_derivatives' in tables:
+        return
+    op.create_table('file_derivatives',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=False),
+    sa.Column('file_path', sa.String(length=500), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['file_id'], ['files.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_id', 'width', 'mime_type', name='uq_file_derivatives_file_width_type')
+    )
+
+
+def downgrade() -> None:
+    if 'file_derivatives' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('file_derivatives')
@@ -0,0 +1,37 @@
+"""Add rate limit buckets
+
+Revision ID: f1b5d9c3a7e4
+Revises: e4a1c7f9b2d6
+Create Date: 2026-10-18 22:31:07.412859
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b5d9c3a7e4'
+down_revision: Union[str, None] = 'e4a1c7f9b2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # main.py runs create_all on import, so a database the app has already
+    # started against has this table before the migration runs
+    if 'rate_limit_buckets' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('tat', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_rate_limit_buckets_tat', 'rate_limit_buckets', ['tat'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_limit_buckets_tat', table_name='rate_limit_buckets')
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,53 @@
+"""Add resumable upload sessions
+
+Revision ID: f5c1a8d3b7e2
+Revises: e81f4b2c9d06
+Create Date: 2026-10-18 17:05:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c1a8d3b7e2'
+down_revision: Union[str, None] = 'e81f4b2c9d06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # main.py runs create_all on import, so a database the app has already
+    # started against has these tables before the migration runs
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'upload_sessions' not in tables:
+        op.create_table('upload_sessions',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('original_filename', sa.String(length=255), nullable=False),
+        sa.Column('declared_type', sa.String(length=100), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('total_size', sa.BigInteger(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('temp_path', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.Enum('ACTIVE', 'FINALIZING', name='uploadsessionstatus'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_upload_sessions_expires_at'), 'upload_sessions', ['expires_at'], unique=False)
+    if 'upload_session_chunks' not in tables:
+        op.create_table('upload_session_chunks',
+        sa.Column('session_id', sa.String(), nullable=False),
+        sa.Column('chunk_index', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['upload_sessions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'chunk_index')
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('upload_session_chunks')
+    op.drop_index(op.f('ix_upload_sessions_expires_at'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
+    sa.Enum(name='uploadsessionstatus').drop(op.get_bind(), checkfirst=True)
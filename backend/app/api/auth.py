@@ -1,19 +1,36 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db
 from app.models.admin import AdminUser
 from app.schemas.auth import LoginRequest, LoginResponse, AdminUserResponse, ChangePasswordRequest
-from app.utils.auth import verify_password, get_password_hash, create_access_token
+from app.utils.auth import (
+    PasswordHasherBusy,
+    create_access_token,
+    get_password_hash_async,
+    verify_password_async
+)
 from app.dependencies.auth import get_current_admin
+from app.dependencies.rate_limit import rate_limit, trust_client
+from app.services.principal_cache import AdminPrincipal, principal_cache
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
-@router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+def password_hasher_busy_exception() -> HTTPException:
+    """Error returned when the password hashing pool is saturated."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+@router.post("/login", response_model=LoginResponse, dependencies=[Depends(rate_limit("login"))])
+async def login(login_data: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
     """Admin login endpoint."""
     # Find user by username
-    user = db.query(AdminUser).filter(AdminUser.username == login_data.username).first()
+    result = await db.execute(select(AdminUser).where(AdminUser.username == login_data.username))
+    user = result.scalar_one_or_none()
     
     # Validate input
     if not login_data.username or not login_data.password:
@@ -22,7 +39,14 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             detail="Username and password are required"
         )
     
-    if not user or not verify_password(login_data.password, user.password_hash):  # type: ignore
+    try:
+        password_ok = user is not None and await verify_password_async(
+            login_data.password, user.password_hash  # type: ignore
+        )
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception()
+    
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -37,7 +61,8 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     
     # Update last login
     user.last_login = datetime.utcnow()  # type: ignore
-    db.commit()
+    await db.commit()
+    await trust_client("login", request)
     
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
@@ -51,15 +76,15 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     )
 
 @router.get("/me", response_model=AdminUserResponse)
-async def get_current_user(current_admin: AdminUser = Depends(get_current_admin)):
+async def get_current_user(current_admin: AdminPrincipal = Depends(get_current_admin)):
     """Get current admin user information."""
     return current_admin
 
 @router.put("/password")
 async def change_password(
     password_data: ChangePasswordRequest,
-    current_admin: AdminUser = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_admin: AdminPrincipal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Change admin password."""
     # Validate input
@@ -75,13 +100,30 @@ async def change_password(
             detail="New password must be at least 8 characters long"
         )
     
-    if not verify_password(password_data.current_password, current_admin.password_hash):  # type: ignore
+    result = await db.execute(select(AdminUser).where(AdminUser.id == current_admin.id))
+    user = result.scalar_one()
+    
+    try:
+        password_ok = await verify_password_async(password_data.current_password, user.password_hash)  # type: ignore
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception()
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password"
         )
     
-    current_admin.password_hash = get_password_hash(password_data.new_password)  # type: ignore
-    db.commit()
+    try:
+        user.password_hash = await get_password_hash_async(password_data.new_password)  # type: ignore
+    except PasswordHasherBusy:
+        raise password_hasher_busy_exception()
+    # Committing drops the user's cached principals (see principal_cache)
+    await db.commit()
     
-    return {"message": "Password updated successfully"} 
\ No newline at end of file
+    return {"message": "Password updated successfully"}
+
+@router.get("/principal-cache/stats")
+async def get_principal_cache_stats(current_admin: AdminPrincipal = Depends(get_current_admin)):
+    """Get authenticated principal cache size, hits, misses and evictions (admin endpoint)"""
+    return principal_cache.stats()
@@ -1,35 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.models.database import get_db
 from app.dependencies.auth import get_current_admin
-from app.models.admin import AdminUser
+from app.dependencies.conditional import conditional_get
+from app.services.principal_cache import AdminPrincipal
 from app.models.blog import BlogPost, PostStatus
-from app.schemas.blog import BlogPostCreate, BlogPostUpdate, BlogPostResponse
+from app.schemas.blog import (
+    BlogPostCreate,
+    BlogPostUpdate,
+    BlogPostResponse,
+    BlogPostListResponse,
+    BlogPostPage,
+    BlogSearchPage,
+    BlogSearchResult,
+    PublishedPostResponse
+)
+from app.services.search import get_search_backend, highlight, tokenize
+from app.utils.http import etag_matches, not_modified
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.render import RENDERER_VERSION, render_markdown, rendered_post_hash
+from app.utils.serialization import json_response, response_columns, response_fields, row_dicts
 from datetime import datetime
 import uuid
 
 router = APIRouter(prefix="/api/blog", tags=["blog"])
 
-@router.get("/posts", response_model=List[BlogPostResponse])
+# Columns needed for post listings; never load the full content here
+LIST_COLUMNS = (
+    BlogPost.id,
+    BlogPost.title,
+    BlogPost.slug,
+    BlogPost.excerpt,
+    BlogPost.featured_image,
+    BlogPost.status,
+    BlogPost.published_at,
+    BlogPost.created_at,
+)
+
+# Admin listings are encoded straight from these columns, in the response model's field order
+POST_FIELDS = response_fields(BlogPostResponse)
+POST_COLUMNS = response_columns(BlogPost, BlogPostResponse)
+LIST_FIELDS = response_fields(BlogPostListResponse)
+
+def apply_rendering(post: BlogPost, rerender: bool = True) -> None:
+    """Render the post's Markdown (when needed) and refresh its content hash."""
+    if rerender or post.content_html is None or post.render_version != RENDERER_VERSION:
+        post.content_html = render_markdown(post.content)  # type: ignore
+        post.render_version = RENDERER_VERSION  # type: ignore
+    post.content_hash = rendered_post_hash(  # type: ignore
+        post.title,  # type: ignore
+        post.excerpt,  # type: ignore
+        post.featured_image,  # type: ignore
+        post.content_html,  # type: ignore
+        post.published_at  # type: ignore
+    )
+
+@router.get("/posts", response_model=List[BlogPostResponse], dependencies=[Depends(conditional_get("blog_posts"))])
 async def get_blog_posts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Get all blog posts with pagination"""
-    posts = db.query(BlogPost).offset(skip).limit(limit).all()
-    return posts
+    result = await db.execute(select(*POST_COLUMNS).offset(skip).limit(limit))
+    return json_response(row_dicts(result.all(), POST_FIELDS), response)
 
-@router.get("/posts/{post_id}", response_model=BlogPostResponse)
+@router.get("/posts/{post_id}", response_model=BlogPostResponse, dependencies=[Depends(conditional_get("blog_posts"))])
 async def get_blog_post(
     post_id: str,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Get a specific blog post by ID"""
-    post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+    result = await db.execute(select(BlogPost).where(BlogPost.id == post_id))
+    post = result.scalar_one_or_none()
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -40,8 +88,8 @@ async def get_blog_post(
 @router.post("/posts", response_model=BlogPostResponse)
 async def create_blog_post(
     post_data: BlogPostCreate,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Create a new blog post"""
     # Generate slug from title if not provided
@@ -51,7 +99,8 @@ async def create_blog_post(
     slug = re.sub(r'[^a-z0-9\-]', '', slug)
     
     # Check if slug already exists
-    existing_post = db.query(BlogPost).filter(BlogPost.slug == slug).first()
+    result = await db.execute(select(BlogPost).where(BlogPost.slug == slug))
+    existing_post = result.scalar_one_or_none()
     if existing_post:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,12 +114,14 @@ async def create_blog_post(
         excerpt=post_data.excerpt,
         content=post_data.content,
         status=post_data.status,
+        published_at=datetime.utcnow() if post_data.status == PostStatus.PUBLISHED else None,
         author_id=current_user.id
     )
+    apply_rendering(db_post)
     
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
+    await db.refresh(db_post)
     
     return db_post
 
@@ -78,11 +129,12 @@ async def create_blog_post(
 async def update_blog_post(
     post_id: str,
     post_data: BlogPostUpdate,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Update an existing blog post"""
-    db_post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+    result = await db.execute(select(BlogPost).where(BlogPost.id == post_id))
+    db_post = result.scalar_one_or_none()
     if not db_post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,38 +150,42 @@ async def update_blog_post(
     if post_data.status == PostStatus.PUBLISHED and db_post.published_at is None:  # type: ignore
         db_post.published_at = datetime.utcnow()  # type: ignore
     
-    db.commit()
-    db.refresh(db_post)
+    apply_rendering(db_post, rerender="content" in update_data)
+    
+    await db.commit()
+    await db.refresh(db_post)
     
     return db_post
 
 @router.delete("/posts/{post_id}")
 async def delete_blog_post(
     post_id: str,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Delete a blog post"""
-    db_post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+    result = await db.execute(select(BlogPost).where(BlogPost.id == post_id))
+    db_post = result.scalar_one_or_none()
     if not db_post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blog post not found"
         )
     
-    db.delete(db_post)
-    db.commit()
+    await db.delete(db_post)
+    await db.commit()
     
     return {"message": "Blog post deleted successfully"}
 
 @router.patch("/posts/{post_id}/publish")
 async def toggle_blog_post_publish(
     post_id: str,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Toggle the published status of a blog post"""
-    db_post = db.query(BlogPost).filter(BlogPost.id == post_id).first()
+    result = await db.execute(select(BlogPost).where(BlogPost.id == post_id))
+    db_post = result.scalar_one_or_none()
     if not db_post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -144,10 +200,114 @@ async def toggle_blog_post_publish(
     else:
         db_post.status = PostStatus.DRAFT  # type: ignore
     
-    db.commit()
-    db.refresh(db_post)
+    apply_rendering(db_post, rerender=False)
+    
+    await db.commit()
+    await db.refresh(db_post)
     
     return {
         "message": f"Blog post {'published' if db_post.status == PostStatus.PUBLISHED else 'unpublished'} successfully",  # type: ignore
         "status": db_post.status.value
-    } 
\ No newline at end of file
+    }
+
+@router.get(
+    "/public/posts",
+    response_model=BlogPostPage,
+    dependencies=[Depends(conditional_get("blog_posts", admin=False))]
+)
+async def get_published_posts(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get published blog posts, newest first, using cursor pagination (public endpoint)"""
+    query = select(*LIST_COLUMNS).where(
+        BlogPost.status == PostStatus.PUBLISHED,
+        BlogPost.published_at.isnot(None)
+    )
+    
+    if cursor:
+        # Keyset pagination: resume strictly after the last post of the previous page
+        published_at, post_id = decode_cursor(cursor)
+        query = query.where(tuple_(BlogPost.published_at, BlogPost.id) < tuple_(published_at, post_id))
+    
+    result = await db.execute(
+        query.order_by(BlogPost.published_at.desc(), BlogPost.id.desc()).limit(limit + 1)
+    )
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].published_at, rows[-1].id)
+    
+    return json_response({"posts": row_dicts(rows, LIST_FIELDS), "next_cursor": next_cursor}, response)
+
+@router.get("/public/posts/{slug}", response_model=PublishedPostResponse)
+async def get_published_post(
+    slug: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a published blog post by slug with pre-rendered HTML (public endpoint)"""
+    published = (BlogPost.slug == slug, BlogPost.status == PostStatus.PUBLISHED)
+    
+    # Revalidation only needs the stored hash, not the post body
+    if request.headers.get("if-none-match"):
+        content_hash = await db.scalar(select(BlogPost.content_hash).where(*published))
+        if content_hash and etag_matches(request, f'"{content_hash}"'):
+            return not_modified({"ETag": f'"{content_hash}"', "Cache-Control": "no-cache"})
+    
+    result = await db.execute(select(BlogPost).where(*published))
+    post = result.scalar_one_or_none()
+    if not post:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blog post not found"
+        )
+    
+    if post.content_hash:
+        response.headers["ETag"] = f'"{post.content_hash}"'
+        response.headers["Cache-Control"] = "no-cache"
+    return post
+
+@router.get(
+    "/public/search",
+    response_model=BlogSearchPage,
+    dependencies=[Depends(conditional_get("blog_posts", admin=False))]
+)
+async def search_published_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over published posts, best matches first (public endpoint)"""
+    terms = tokenize(q)
+    if not terms:
+        return BlogSearchPage(results=[])
+    
+    backend = get_search_backend(db.get_bind().dialect.name)
+    rows = await backend.search(db, terms, limit + 1, offset)
+    
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+    
+    return BlogSearchPage(
+        results=[
+            BlogSearchResult(
+                id=row.id,
+                title=row.title,
+                slug=row.slug,
+                excerpt=row.excerpt,
+                published_at=row.published_at,
+                snippet=highlight(row.snippet)
+            )
+            for row in rows
+        ],
+        next_offset=next_offset
+    )
@@ -1,52 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Request
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.models.database import get_db
 from app.dependencies.auth import get_current_admin
-from app.models.admin import AdminUser
+from app.dependencies.conditional import conditional_get
+from app.dependencies.rate_limit import rate_limit
+from app.services.principal_cache import AdminPrincipal
 from app.models.contact import ContactMessage
 from app.schemas.contact import (
     ContactMessageCreate, 
     ContactMessageUpdate, 
     ContactMessageResponse,
-    ContactMessageList
+    ContactMessageList,
+    ContactMessageBulkRequest,
+    ContactMessageArchiveRequest,
+    BulkOperationResult
 )
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import uuid
+from datetime import datetime
+from app.config import settings
+from app.services.contact_filter import duplicate_window, fingerprint
+from app.services.contact_inbox import INBOX, adjust_counters, inbox_page, moved, read_changed, removed
+from app.services.email_outbox import enqueue_email, outbox_sender
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.serialization import json_response, response_fields, row_dicts
 
 router = APIRouter(prefix="/api/contact", tags=["contact"])
 
-def send_notification_email(contact_message: ContactMessage) -> bool:
-    """Send notification email to admin about new contact message"""
-    try:
-        # Get email settings from environment
-        smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        smtp_username = os.getenv("SMTP_USERNAME")
-        smtp_password = os.getenv("SMTP_PASSWORD")
-        admin_email = os.getenv("ADMIN_EMAIL")
-        
-        if not all([smtp_username, smtp_password, admin_email]):
-            print("Email configuration incomplete, skipping email notification")
-            return False
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = smtp_username or ""
-        msg['To'] = admin_email or ""
-        msg['Subject'] = f"New Contact Message: {contact_message.subject}"
+# Inbox pages are encoded straight from these columns of the page rows
+MESSAGE_FIELDS = response_fields(ContactMessageResponse)
 
-        body = f"""
+def queue_notification_email(db: AsyncSession, contact_message: ContactMessage) -> bool:
+    """Queue a notification email to the admin about a new contact message"""
+    if not settings.admin_email:
+        print("Email configuration incomplete, skipping email notification")
+        return False
+    
+    body = f"""
         New contact message received from your website:
         
         From: {contact_message.name} ({contact_message.email})
         Subject: {contact_message.subject}
-        Date: {contact_message.created_at}
+        Date: {datetime.utcnow()}
         
         Message:
         {contact_message.message}
@@ -54,33 +50,45 @@ def send_notification_email(contact_message: ContactMessage) -> bool:
         ---
         This message was sent from your personal website contact form.
         """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            if smtp_username is not None and smtp_password is not None:
-                server.login(smtp_username, smtp_password)
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        print(f"Failed to send notification email: {e}")
-        return False
+    
+    enqueue_email(
+        db,
+        recipient=settings.admin_email,
+        subject=f"New Contact Message: {contact_message.subject}",
+        body=body
+    )
+    return True
 
-@router.post("/submit", response_model=ContactMessageResponse)
+@router.post("/submit", response_model=ContactMessageResponse, dependencies=[Depends(rate_limit("contact"))])
 async def submit_contact_message(
     message_data: ContactMessageCreate,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Submit a contact message (public endpoint)"""
     # Get client IP and user agent
     client_ip = request.client.host if request.client else None
     user_agent = request.headers.get("user-agent")
     
+    # Resubmissions and near-identical messages are turned away before anything is written or emailed
+    message_id = str(uuid.uuid4())
+    duplicate = duplicate_window.check(
+        fingerprint(message_data.email, message_data.subject, message_data.message, client_ip),
+        message_id
+    )
+    if duplicate is not None:
+        # The same sender sending the same message again gets the original back
+        original = await db.get(ContactMessage, duplicate.message_id) if duplicate.exact else None
+        if original is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A very similar message was already received"
+            )
+        return original
+    
     # Create contact message
     db_message = ContactMessage(
+        id=message_id,
         name=message_data.name,
         email=message_data.email,
         subject=message_data.subject,
@@ -89,52 +97,72 @@ async def submit_contact_message(
         user_agent=user_agent
     )
     
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
-    
-    # Send notification email (non-blocking)
     try:
-        send_notification_email(db_message)
-    except Exception as e:
-        print(f"Email notification failed: {e}")
+        db.add(db_message)
+        await adjust_counters(db, {INBOX: (1, 1)})
+        
+        # Queue the notification in the same transaction; the outbox sender delivers it
+        queued = queue_notification_email(db, db_message)
+        await db.commit()
+    except Exception:
+        duplicate_window.forget(message_id)
+        raise
+    await db.refresh(db_message)
+    
+    if queued:
+        outbox_sender.notify()
     
     return db_message
 
-@router.get("/messages", response_model=ContactMessageList)
+@router.get("/messages", response_model=ContactMessageList, dependencies=[Depends(conditional_get("contact_messages"))])
 async def get_contact_messages(
-    skip: int = 0,
-    limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    archived: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
-    """Get all contact messages (admin endpoint)"""
-    messages = db.query(ContactMessage).order_by(
-        ContactMessage.created_at.desc()
-    ).offset(skip).limit(limit).all()
-    
-    total = db.query(ContactMessage).count()
-    unread_count = db.query(ContactMessage).filter(
-        ContactMessage.is_read == False
-    ).count()
-    # Convert ContactMessage ORM objects to ContactMessageResponse models
-    message_responses = [ContactMessageResponse.from_orm(msg) for msg in messages]
-    return ContactMessageList(
-        messages=message_responses,
-        total=total,
-        unread_count=unread_count
-    )
+    """Get inbox (or archived) contact messages, newest first, using cursor pagination (admin endpoint)"""
+    # Keyset pagination: resume strictly after the last message of the previous page
+    after = decode_cursor(cursor) if cursor else None
+    rows, total, unread_count = await inbox_page(db, limit + 1, after, archived)
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    return json_response({
+        "messages": row_dicts(rows, MESSAGE_FIELDS),
+        "total": total,
+        "unread_count": unread_count,
+        "next_cursor": next_cursor
+    }, response)
+
+@router.get("/outbox/stats")
+async def get_outbox_stats(
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
+):
+    """Get notification email queue depth and send latency (admin endpoint)"""
+    return await outbox_sender.stats(db)
 
-@router.get("/messages/{message_id}", response_model=ContactMessageResponse)
+@router.get(
+    "/messages/{message_id}",
+    response_model=ContactMessageResponse,
+    dependencies=[Depends(conditional_get("contact_messages"))]
+)
 async def get_contact_message(
     message_id: str,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Get a specific contact message"""
-    message = db.query(ContactMessage).filter(
-        ContactMessage.id == message_id
-    ).first()
+    result = await db.execute(
+        select(ContactMessage).where(ContactMessage.id == message_id)
+    )
+    message = result.scalar_one_or_none()
     
     if not message:
         raise HTTPException(
@@ -148,13 +176,14 @@ async def get_contact_message(
 async def update_contact_message(
     message_id: str,
     message_data: ContactMessageUpdate,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Update a contact message (mark as read/unread)"""
-    message = db.query(ContactMessage).filter(
-        ContactMessage.id == message_id
-    ).first()
+    result = await db.execute(
+        select(ContactMessage).where(ContactMessage.id == message_id)
+    )
+    message = result.scalar_one_or_none()
     
     if not message:
         raise HTTPException(
@@ -162,72 +191,124 @@ async def update_contact_message(
             detail="Contact message not found"
         )
 
-    # Use SQLAlchemy's setattr to update the value of the column property
-    setattr(message, "is_read", message_data.is_read)
-    db.commit()
-    db.refresh(message)
+    # Only a change of state moves the unread counter, even with concurrent updates
+    result = await db.execute(
+        update(ContactMessage).where(
+            ContactMessage.id == message_id,
+            ContactMessage.is_read == (not message_data.is_read)
+        ).values(is_read=message_data.is_read).returning(ContactMessage.is_archived)
+    )
+    await adjust_counters(db, read_changed(result.all(), -1 if message_data.is_read else 1))
+    await db.commit()
+    await db.refresh(message)
 
     return message
 
 @router.delete("/messages/{message_id}")
 async def delete_contact_message(
     message_id: str,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Delete a contact message"""
-    message = db.query(ContactMessage).filter(
-        ContactMessage.id == message_id
-    ).first()
+    result = await db.execute(
+        delete(ContactMessage).where(ContactMessage.id == message_id)
+        .returning(ContactMessage.is_archived, ContactMessage.is_read)
+    )
+    deleted = result.all()
     
-    if not message:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Contact message not found"
         )
     
-    db.delete(message)
-    db.commit()
+    await adjust_counters(db, removed(deleted))
+    await db.commit()
     
     return {"message": "Contact message deleted successfully"}
 
 @router.post("/messages/{message_id}/mark-read")
 async def mark_message_as_read(
     message_id: str,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Mark a contact message as read"""
-    message = db.query(ContactMessage).filter(
-        ContactMessage.id == message_id
-    ).first()
+    result = await db.execute(
+        update(ContactMessage).where(
+            ContactMessage.id == message_id,
+            ContactMessage.is_read == False
+        ).values(is_read=True).returning(ContactMessage.is_archived)
+    )
+    changed = result.all()
     
-    if not message:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Contact message not found"
-        )
-
-    setattr(message, "is_read", True)
-    db.commit()
-    db.refresh(message)
+    if not changed:
+        found = await db.scalar(select(ContactMessage.id).where(ContactMessage.id == message_id))
+        if not found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Contact message not found"
+            )
+    
+    await adjust_counters(db, read_changed(changed, -1))
+    await db.commit()
 
     return {"message": "Message marked as read"}
 
 @router.post("/messages/bulk-mark-read")
 async def mark_multiple_messages_as_read(
     message_ids: List[str],
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Mark multiple contact messages as read"""
-    messages = db.query(ContactMessage).filter(
-        ContactMessage.id.in_(message_ids)
-    ).all()
+    result = await db.execute(
+        update(ContactMessage).where(
+            ContactMessage.id.in_(message_ids),
+            ContactMessage.is_read == False
+        ).values(is_read=True).returning(ContactMessage.is_archived)
+    )
+    changed = result.all()
+    await adjust_counters(db, read_changed(changed, -1))
+    await db.commit()
     
-    for message in messages:
-        setattr(message, "is_read", True)
+    return {"message": f"Marked {len(changed)} messages as read"}
+
+@router.post("/messages/bulk-delete", response_model=BulkOperationResult)
+async def delete_multiple_messages(
+    request_data: ContactMessageBulkRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
+):
+    """Delete multiple contact messages"""
+    result = await db.execute(
+        delete(ContactMessage).where(ContactMessage.id.in_(request_data.ids))
+        .returning(ContactMessage.is_archived, ContactMessage.is_read)
+    )
+    deleted = result.all()
+    await adjust_counters(db, removed(deleted))
+    await db.commit()
     
-    db.commit()
+    return BulkOperationResult(message=f"Deleted {len(deleted)} messages", affected=len(deleted))
+
+@router.post("/messages/bulk-archive", response_model=BulkOperationResult)
+async def archive_multiple_messages(
+    request_data: ContactMessageArchiveRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
+):
+    """Move multiple contact messages to the archive (or back to the inbox)"""
+    result = await db.execute(
+        update(ContactMessage).where(
+            ContactMessage.id.in_(request_data.ids),
+            ContactMessage.is_archived == (not request_data.archived)
+        ).values(is_archived=request_data.archived)
+        .returning(ContactMessage.is_archived, ContactMessage.is_read)
+    )
+    changed = result.all()
+    await adjust_counters(db, moved(changed, request_data.archived))
+    await db.commit()
     
-    return {"message": f"Marked {len(messages)} messages as read"} 
\ No newline at end of file
+    action = "Archived" if request_data.archived else "Restored"
+    return BulkOperationResult(message=f"{action} {len(changed)} messages", affected=len(changed))
@@ -1,92 +1,143 @@
 import os
-import shutil
+import uuid
+from datetime import datetime
 from pathlib import Path
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.models.database import get_db
 from app.dependencies.auth import get_current_admin
-from app.models.file import File as FileModel
-from app.schemas.file import FileCreate, FileResponse, FileUpdate
-import uuid
+from app.dependencies.conditional import conditional_get
+from app.models.database import dialect_insert
+from app.models.file import File as FileModel, FileDerivative
+from app.models.upload_session import UploadSession, UploadSessionChunk, UploadSessionStatus
+from app.schemas.file import (
+    FileBulkDeleteRequest,
+    FileBulkDeleteResult,
+    FileCreate,
+    FileDerivativeResponse,
+    FileResponse,
+    FileUpdate,
+    UploadSessionCreate,
+    UploadSessionResponse
+)
+from app.services.storage import storage, stored_file_response
+from app.services.image_derivatives import IMAGE_TYPES, accepted_image_types, derivative_generator, pick_variant
+from app.services.chunked_uploads import (
+    MAX_CHUNK_SIZE,
+    MIN_CHUNK_SIZE,
+    chunk_for_range,
+    create_part_file,
+    hash_and_sniff,
+    locked_part_file,
+    parse_content_range,
+    session_expiry,
+    total_chunks,
+    write_chunk
+)
+from app.services.uploads import (
+    INCOMING_DIR,
+    MIME_EXTENSIONS,
+    UPLOAD_DIR,
+    ReceivedUpload,
+    receive_upload,
+    store_content_addressed
+)
+from app.utils.serialization import json_response, response_columns, response_fields, row_dicts
 
 router = APIRouter(prefix="/api/files", tags=["files"])
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("uploads")
+# Listings are encoded straight from these columns, in the response model's field order
+FILE_FIELDS = response_fields(FileResponse)
+FILE_COLUMNS = response_columns(FileModel, FileResponse)
+
+# Create uploads directories if they don't exist
 UPLOAD_DIR.mkdir(exist_ok=True)
+INCOMING_DIR.mkdir(exist_ok=True)
 
-@router.post("/upload", response_model=FileResponse)
-async def upload_file(
-    file: UploadFile = File(...),
-    description: str = Form(None),
-    db: Session = Depends(get_db),
-    current_admin = Depends(get_current_admin)
-):
-    """Upload a file to the server"""
-    
-    # Validate file type (allow images and common document types)
-    allowed_types = [
-        "image/jpeg", "image/png", "image/gif", "image/webp",
-        "application/pdf", "text/plain", "application/msword",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    ]
-    
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File type {file.content_type} not allowed. Allowed types: {', '.join(allowed_types)}"
-        )
-    
-    # Generate unique filename
-    file_extension = Path(file.filename).suffix if file.filename else ""
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
-    
-    # Save file
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "description": {"type": "string"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+async def store_upload(db: AsyncSession, upload: ReceivedUpload, description: Optional[str]) -> FileModel:
+    """Move a received upload into storage and add its File record (not yet committed)."""
+    # Store by content hash so identical uploads share the same bytes
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
+        filename, file_path, _ = await store_content_addressed(upload, UPLOAD_DIR)
+    except OSError as e:
+        upload.temp_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     
-    # Get file size
-    file_size = os.path.getsize(file_path)
-    
-    # Create database record
     db_file = FileModel(
-        filename=unique_filename,
-        original_filename=file.filename,
-        file_path=str(file_path),
-        file_size=file_size,
-        mime_type=file.content_type,
-        description=description  # type: ignore
+        filename=filename,
+        original_filename=upload.original_filename,
+        file_path=file_path,
+        file_size=upload.size,
+        mime_type=upload.mime_type,
+        sha256=upload.sha256,
+        description=description
     )
     db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    return db_file
+
+@router.post("/upload", response_model=FileResponse, openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_file(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """Upload a file to the server"""
+    # The body is streamed to disk once: size-capped, hashed and type-sniffed on the way
+    upload = await receive_upload(request, INCOMING_DIR, settings.upload_max_bytes)
+    
+    db_file = await store_upload(db, upload, upload.fields.get("description"))
+    await db.commit()
+    await db.refresh(db_file)
+    
+    # Thumbnails and WebP/AVIF variants are generated in the background
+    if db_file.mime_type in IMAGE_TYPES:
+        derivative_generator.schedule(db_file.id)  # type: ignore
     
     return db_file
 
-@router.get("/files", response_model=List[FileResponse])
+@router.get("/files", response_model=List[FileResponse], dependencies=[Depends(conditional_get("files"))])
 async def list_files(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ):
     """List all uploaded files"""
-    files = db.query(FileModel).offset(skip).limit(limit).all()
-    return files
+    result = await db.execute(select(*FILE_COLUMNS).offset(skip).limit(limit))
+    return json_response(row_dicts(result.all(), FILE_FIELDS), response)
 
-@router.get("/files/{file_id}", response_model=FileResponse)
+@router.get("/files/{file_id}", response_model=FileResponse, dependencies=[Depends(conditional_get("files"))])
 async def get_file(
     file_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ):
     """Get a specific file by ID"""
-    file = db.query(FileModel).filter(FileModel.id == file_id).first()
+    result = await db.execute(select(FileModel).where(FileModel.id == file_id))
+    file = result.scalar_one_or_none()
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
     return file
@@ -95,61 +146,379 @@ async def get_file(
 async def update_file(
     file_id: int,
     file_update: FileUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ):
     """Update file metadata"""
-    db_file = db.query(FileModel).filter(FileModel.id == file_id).first()
+    result = await db.execute(select(FileModel).where(FileModel.id == file_id))
+    db_file = result.scalar_one_or_none()
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
     
     for field, value in file_update.dict(exclude_unset=True).items():
         setattr(db_file, field, value)
     
-    db.commit()
-    db.refresh(db_file)
+    await db.commit()
+    await db.refresh(db_file)
     return db_file
 
+async def delete_file_records(db: AsyncSession, file_ids: List[int]) -> Tuple[int, List[str]]:
+    """Delete file rows and their variant rows (not committed), in three statements.
+
+    Returns how many files were deleted and the stored paths nothing
+    references any more: stored objects (and their image variants) are
+    kept while another record shares the same content.
+    """
+    result = await db.execute(
+        delete(FileDerivative).where(FileDerivative.file_id.in_(file_ids))
+        .returning(FileDerivative.file_id, FileDerivative.file_path)
+    )
+    variants = result.all()
+    result = await db.execute(
+        delete(FileModel).where(FileModel.id.in_(file_ids))
+        .returning(FileModel.id, FileModel.file_path)
+    )
+    deleted = {row.id: row.file_path for row in result.all()}
+    if not deleted:
+        return 0, []
+    
+    result = await db.execute(
+        select(FileModel.file_path).distinct().where(FileModel.file_path.in_(set(deleted.values())))
+    )
+    shared = set(result.scalars().all())
+    unreferenced = {path for path in deleted.values() if path not in shared}
+    unreferenced.update(row.file_path for row in variants if deleted.get(row.file_id) not in shared)
+    return len(deleted), sorted(unreferenced)
+
+async def delete_stored(paths: List[str]) -> None:
+    """Remove stored objects after their rows are gone; failures leave orphans for reconcile_uploads.py."""
+    for path in paths:
+        try:
+            await storage.delete(path)
+        except Exception as e:
+            print(f"Failed to delete stored file {path}: {e}")
+
 @router.delete("/files/{file_id}")
 async def delete_file(
     file_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ):
     """Delete a file"""
-    db_file = db.query(FileModel).filter(FileModel.id == file_id).first()
-    if not db_file:
+    # Delete database records first: if removing the bytes then fails, the
+    # leftovers are orphans that reconcile_uploads.py cleans up
+    deleted, unreferenced = await delete_file_records(db, [file_id])
+    if not deleted:
         raise HTTPException(status_code=404, detail="File not found")
+    await db.commit()
     
-    # Delete physical file
-    try:
-        if os.path.exists(db_file.file_path):  # type: ignore
-            os.remove(db_file.file_path)  # type: ignore
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to delete file: {str(e)}")
-    
-    # Delete database record
-    db.delete(db_file)
-    db.commit()
-    
+    await delete_stored(unreferenced)
     return {"message": "File deleted successfully"}
 
+@router.post("/files/bulk-delete", response_model=FileBulkDeleteResult)
+async def delete_multiple_files(
+    request_data: FileBulkDeleteRequest,
+    db: AsyncSession = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """Delete multiple files"""
+    deleted, unreferenced = await delete_file_records(db, request_data.ids)
+    await db.commit()
+    
+    await delete_stored(unreferenced)
+    return FileBulkDeleteResult(message=f"Deleted {deleted} files", affected=deleted)
+
 @router.get("/files/{file_id}/download")
+@router.head("/files/{file_id}/download", include_in_schema=False)
 async def download_file(
     file_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_admin = Depends(get_current_admin)
 ):
-    """Download a file"""
-    db_file = db.query(FileModel).filter(FileModel.id == file_id).first()
+    """Download a file, with Range and conditional request support"""
+    result = await db.execute(
+        select(FileModel.file_path, FileModel.original_filename, FileModel.mime_type)
+        .where(FileModel.id == file_id)
+    )
+    db_file = result.one_or_none()
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
     
-    if not os.path.exists(db_file.file_path):  # type: ignore
-        raise HTTPException(status_code=404, detail="File not found on disk")
+    return await stored_file_response(request, db_file.file_path, db_file.mime_type, db_file.original_filename)
+
+@router.get(
+    "/files/{file_id}/derivatives",
+    response_model=List[FileDerivativeResponse],
+    dependencies=[Depends(conditional_get("file_derivatives"))]
+)
+async def list_file_derivatives(
+    file_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """List the generated variants of an image"""
+    result = await db.execute(
+        select(FileDerivative)
+        .where(FileDerivative.file_id == file_id)
+        .order_by(FileDerivative.width, FileDerivative.mime_type)
+    )
+    return result.scalars().all()
+
+@router.get("/images/{sha256}")
+async def get_image(
+    sha256: str,
+    request: Request,
+    width: Optional[int] = Query(None, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Serve the best variant of an uploaded image for the client's width and formats (public endpoint)"""
+    result = await db.execute(
+        select(FileModel.id, FileModel.file_path, FileModel.mime_type)
+        .where(FileModel.sha256 == sha256, FileModel.mime_type.in_(IMAGE_TYPES))
+        .order_by(FileModel.id)
+        .limit(1)
+    )
+    image = result.one_or_none()
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    result = await db.execute(
+        select(FileDerivative.width, FileDerivative.mime_type, FileDerivative.file_path)
+        .where(FileDerivative.file_id == image.id)
+    )
+    variant = pick_variant(result.all(), accepted_image_types(request.headers.get("accept", "")), width)
+    
+    if variant is None:
+        # Variants may still be generating; don't let caches keep the original for long
+        return await stored_file_response(request, image.file_path, image.mime_type, cache_control="public, no-cache", vary="Accept")
+    return await stored_file_response(request, variant.file_path, variant.mime_type, cache_control="public, max-age=86400", vary="Accept")
+
+async def get_upload_session(db: AsyncSession, session_id: str) -> UploadSession:
+    """Load an unexpired upload session or raise 404."""
+    result = await db.execute(
+        select(UploadSession).where(
+            UploadSession.id == session_id,
+            UploadSession.expires_at >= datetime.utcnow()
+        )
+    )
+    session = result.scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+async def upload_session_response(db: AsyncSession, session: UploadSession) -> UploadSessionResponse:
+    """Describe a session's progress, including which chunks are still missing."""
+    result = await db.execute(
+        select(UploadSessionChunk.chunk_index).where(UploadSessionChunk.session_id == session.id)
+    )
+    received = set(result.scalars().all())
+    chunks = total_chunks(session.total_size, session.chunk_size)  # type: ignore
+    return UploadSessionResponse(
+        id=session.id,  # type: ignore
+        filename=session.original_filename,  # type: ignore
+        size=session.total_size,  # type: ignore
+        chunk_size=session.chunk_size,  # type: ignore
+        total_chunks=chunks,
+        received_chunks=len(received),
+        missing_chunks=[index for index in range(chunks) if index not in received],
+        expires_at=session.expires_at  # type: ignore
+    )
+
+async def discard_upload_session(db: AsyncSession, session: UploadSession) -> None:
+    """Delete a session's rows (not committed) and its part file."""
+    await db.execute(delete(UploadSessionChunk).where(UploadSessionChunk.session_id == session.id))
+    await db.execute(delete(UploadSession).where(UploadSession.id == session.id))
+    await run_in_threadpool(Path(session.temp_path).unlink, missing_ok=True)  # type: ignore
+
+async def release_upload_session(db: AsyncSession, session_id: str, temp_path: str) -> None:
+    """Undo a failed finalize (after a rollback) and commit.
+
+    While the part file is intact the session is reopened, so the client can
+    send chunks or complete it again; otherwise there is nothing left to
+    resume and the session is dropped.
+    """
+    if await run_in_threadpool(os.path.exists, temp_path):
+        await db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == session_id)
+            .values(status=UploadSessionStatus.ACTIVE)
+        )
+    else:
+        await db.execute(delete(UploadSessionChunk).where(UploadSessionChunk.session_id == session_id))
+        await db.execute(delete(UploadSession).where(UploadSession.id == session_id))
+    await db.commit()
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=201)
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """Start a resumable upload; chunks are then sent with PUT /uploads/{id}"""
+    if session_data.size > settings.chunked_upload_max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the {settings.chunked_upload_max_bytes} byte upload limit"
+        )
+    chunk_size = session_data.chunk_size or settings.upload_chunk_size
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Chunk size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes"
+        )
+    
+    session_id = str(uuid.uuid4())
+    temp_path = INCOMING_DIR / f"{session_id}.part"
+    await run_in_threadpool(create_part_file, temp_path, session_data.size)
+    
+    session = UploadSession(
+        id=session_id,
+        original_filename=os.path.basename(session_data.filename),
+        declared_type=session_data.content_type,
+        description=session_data.description,
+        total_size=session_data.size,
+        chunk_size=chunk_size,
+        temp_path=str(temp_path),
+        expires_at=session_expiry()
+    )
+    db.add(session)
+    await db.commit()
+    
+    return await upload_session_response(db, session)
+
+@router.get("/uploads/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_progress(
+    session_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """Get the progress of a resumable upload, e.g. to resume after a dropped connection"""
+    session = await get_upload_session(db, session_id)
+    return await upload_session_response(db, session)
+
+@router.put("/uploads/{session_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """Upload one chunk, placed by its Content-Range; chunks may be sent in parallel and in any order"""
+    start, end, total = parse_content_range(request.headers.get("content-range"))
+    session = await get_upload_session(db, session_id)
+    if session.status != UploadSessionStatus.ACTIVE:  # type: ignore
+        raise HTTPException(status_code=409, detail="Upload is being finalized")
+    chunk_index = chunk_for_range(session, start, end, total)
+    
+    try:
+        async with locked_part_file(session.temp_path) as part:  # type: ignore
+            # Completing may have claimed the session since; it waits for writers holding the lock
+            still_active = await db.scalar(
+                select(UploadSession.id).where(
+                    UploadSession.id == session_id,
+                    UploadSession.status == UploadSessionStatus.ACTIVE
+                )
+            )
+            # Don't hold a pooled connection while the chunk streams in
+            await db.commit()
+            if still_active is None:
+                raise HTTPException(status_code=409, detail="Upload is being finalized")
+            await write_chunk(request, part, start, end - start + 1, request.headers.get("x-chunk-sha256"))
+            
+            await db.execute(
+                dialect_insert(db, UploadSessionChunk)
+                .values(session_id=session_id, chunk_index=chunk_index)
+                .on_conflict_do_nothing()
+            )
+            await db.execute(
+                update(UploadSession)
+                .where(UploadSession.id == session_id)
+                .values(expires_at=session_expiry())
+            )
+            await db.commit()
+    except FileNotFoundError:
+        # Finalized (or discarded) since the session was read
+        raise HTTPException(status_code=409, detail="Upload is being finalized")
+    
+    return await upload_session_response(db, session)
+
+@router.post("/uploads/{session_id}/complete", response_model=FileResponse)
+async def complete_upload(
+    session_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """Finalize a resumable upload once every chunk has arrived"""
+    session = await get_upload_session(db, session_id)
+    
+    # Claim the session so concurrent completes or late chunks can't interfere
+    result = await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session_id, UploadSession.status == UploadSessionStatus.ACTIVE)
+        .values(status=UploadSessionStatus.FINALIZING)
+    )
+    await db.commit()
+    if result.rowcount == 0:
+        raise HTTPException(status_code=409, detail="Upload is already being finalized")
+    
+    # Wait for chunk writes already under way, and keep late ones out until the file is stored
+    temp_path: str = session.temp_path  # type: ignore
+    async with locked_part_file(temp_path, exclusive=True):
+        try:
+            progress = await upload_session_response(db, session)
+            if progress.missing_chunks:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"{len(progress.missing_chunks)} chunks are still missing"
+                )
+            
+            # Chunks arrive out of order, so the hash is computed in one sequential pass here
+            sha256, mime_type = await run_in_threadpool(
+                hash_and_sniff,
+                temp_path,
+                session.declared_type,
+                session.original_filename
+            )
+            if mime_type is None:
+                await discard_upload_session(db, session)
+                await db.commit()
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File type not allowed. Allowed types: {', '.join(MIME_EXTENSIONS)}"
+                )
+            
+            upload = ReceivedUpload(
+                temp_path=Path(temp_path),
+                original_filename=session.original_filename,  # type: ignore
+                size=session.total_size,  # type: ignore
+                sha256=sha256,
+                mime_type=mime_type
+            )
+            db_file = await store_upload(db, upload, session.description)  # type: ignore
+            await discard_upload_session(db, session)
+            await db.commit()
+        except Exception:
+            # Don't leave the session stuck in FINALIZING until it expires
+            await db.rollback()
+            await release_upload_session(db, session_id, temp_path)
+            raise
+    await db.refresh(db_file)
+    
+    if db_file.mime_type in IMAGE_TYPES:
+        derivative_generator.schedule(db_file.id)  # type: ignore
+    
+    return db_file
+
+@router.delete("/uploads/{session_id}")
+async def abort_upload(
+    session_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_admin = Depends(get_current_admin)
+):
+    """Abandon a resumable upload and free its storage"""
+    session = await get_upload_session(db, session_id)
+    await discard_upload_session(db, session)
+    await db.commit()
     
-    return {
-        "file_path": db_file.file_path,
-        "filename": db_file.original_filename,
-        "mime_type": db_file.mime_type
-    } 
\ No newline at end of file
+    return {"message": "Upload cancelled successfully"}
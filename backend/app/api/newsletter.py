@@ -1,35 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File, status
+from pydantic import EmailStr
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.models.database import get_db
 from app.dependencies.auth import get_current_admin
-from app.models.admin import AdminUser
+from app.dependencies.conditional import conditional_get
+from app.dependencies.rate_limit import rate_limit
+from app.services.principal_cache import AdminPrincipal
 from app.models.newsletter import Newsletter, NewsletterStatus
-from app.schemas.newsletter import NewsletterCreate, NewsletterUpdate, NewsletterResponse, NewsletterSendRequest
-from datetime import datetime
+from app.schemas.newsletter import (
+    NewsletterCreate,
+    NewsletterUpdate,
+    NewsletterResponse,
+    NewsletterSendRequest,
+    NewsletterDeliveryProgress,
+    SubscriberImportResult
+)
+from app.services.newsletter_delivery import (
+    delete_deliveries,
+    delivery_engine,
+    enqueue_recipients,
+    enqueue_subscribers,
+    get_progress,
+    retry_failed
+)
+from app.services import subscribers
+from app.utils.serialization import json_response, response_columns, response_fields, row_dicts
 import uuid
 
 router = APIRouter(prefix="/api/newsletter", tags=["newsletter"])
 
-@router.get("/newsletters", response_model=List[NewsletterResponse])
+# Listings are encoded straight from these columns, in the response model's field order
+NEWSLETTER_FIELDS = response_fields(NewsletterResponse)
+NEWSLETTER_COLUMNS = response_columns(Newsletter, NewsletterResponse)
+
+@router.get("/newsletters", response_model=List[NewsletterResponse], dependencies=[Depends(conditional_get("newsletters"))])
 async def get_newsletters(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Get all newsletters with pagination"""
-    newsletters = db.query(Newsletter).offset(skip).limit(limit).all()
-    return newsletters
+    result = await db.execute(select(*NEWSLETTER_COLUMNS).offset(skip).limit(limit))
+    return json_response(row_dicts(result.all(), NEWSLETTER_FIELDS), response)
 
-@router.get("/newsletters/{newsletter_id}", response_model=NewsletterResponse)
+@router.get(
+    "/newsletters/{newsletter_id}",
+    response_model=NewsletterResponse,
+    dependencies=[Depends(conditional_get("newsletters"))]
+)
 async def get_newsletter(
     newsletter_id: str,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Get a specific newsletter by ID"""
-    newsletter = db.query(Newsletter).filter(Newsletter.id == newsletter_id).first()
+    result = await db.execute(select(Newsletter).where(Newsletter.id == newsletter_id))
+    newsletter = result.scalar_one_or_none()
     if not newsletter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -40,8 +70,8 @@ async def get_newsletter(
 @router.post("/newsletters", response_model=NewsletterResponse)
 async def create_newsletter(
     newsletter_data: NewsletterCreate,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Create a new newsletter"""
     db_newsletter = Newsletter(
@@ -53,8 +83,8 @@ async def create_newsletter(
     )
     
     db.add(db_newsletter)
-    db.commit()
-    db.refresh(db_newsletter)
+    await db.commit()
+    await db.refresh(db_newsletter)
     
     return db_newsletter
 
@@ -62,11 +92,12 @@ async def create_newsletter(
 async def update_newsletter(
     newsletter_id: str,
     newsletter_data: NewsletterUpdate,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Update an existing newsletter"""
-    db_newsletter = db.query(Newsletter).filter(Newsletter.id == newsletter_id).first()
+    result = await db.execute(select(Newsletter).where(Newsletter.id == newsletter_id))
+    db_newsletter = result.scalar_one_or_none()
     if not db_newsletter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,27 +108,35 @@ async def update_newsletter(
     for field, value in newsletter_data.dict(exclude_unset=True).items():
         setattr(db_newsletter, field, value)
     
-    db.commit()
-    db.refresh(db_newsletter)
+    await db.commit()
+    await db.refresh(db_newsletter)
     
     return db_newsletter
 
 @router.delete("/newsletters/{newsletter_id}")
 async def delete_newsletter(
     newsletter_id: str,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Delete a newsletter"""
-    db_newsletter = db.query(Newsletter).filter(Newsletter.id == newsletter_id).first()
+    result = await db.execute(select(Newsletter).where(Newsletter.id == newsletter_id))
+    db_newsletter = result.scalar_one_or_none()
     if not db_newsletter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Newsletter not found"
         )
     
-    db.delete(db_newsletter)
-    db.commit()
+    if db_newsletter.status == NewsletterStatus.SENDING:  # type: ignore
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Newsletter is being sent and cannot be deleted"
+        )
+    
+    await delete_deliveries(db, newsletter_id)
+    await db.delete(db_newsletter)
+    await db.commit()
     
     return {"message": "Newsletter deleted successfully"}
 
@@ -105,11 +144,12 @@ async def delete_newsletter(
 async def send_newsletter(
     newsletter_id: str,
     send_request: NewsletterSendRequest,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Send a newsletter"""
-    db_newsletter = db.query(Newsletter).filter(Newsletter.id == newsletter_id).first()
+    result = await db.execute(select(Newsletter).where(Newsletter.id == newsletter_id))
+    db_newsletter = result.scalar_one_or_none()
     if not db_newsletter:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,29 +162,78 @@ async def send_newsletter(
             detail="Newsletter has already been sent"
         )
     
-    # TODO: Implement actual email sending logic
-    # For now, just update the status
-    db_newsletter.status = NewsletterStatus.SENT  # type: ignore
-    db_newsletter.sent_at = datetime.utcnow()  # type: ignore
+    if db_newsletter.status == NewsletterStatus.SENDING:  # type: ignore
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Newsletter is already being sent"
+        )
     
-    db.commit()
-    db.refresh(db_newsletter)
+    if db_newsletter.status == NewsletterStatus.FAILED:  # type: ignore
+        # Nobody was reached last time; try its failed (not interrupted) recipients again
+        await retry_failed(db, newsletter_id)
+    
+    # Materialize one delivery row per recipient, then fan out in the background
+    if send_request.send_to_all:
+        await enqueue_subscribers(db, newsletter_id)
+    if send_request.custom_recipients:
+        await enqueue_recipients(db, newsletter_id, send_request.custom_recipients)
+    
+    db_newsletter.status = NewsletterStatus.SENDING  # type: ignore
+    await db.commit()
+    
+    progress = await get_progress(db, newsletter_id)
+    delivery_engine.start(newsletter_id)
     
     return {
-        "message": "Newsletter sent successfully",
+        "message": "Newsletter delivery started",
         "newsletter_id": newsletter_id,
-        "sent_at": db_newsletter.sent_at
+        "recipients": progress["total"]
     }
 
-@router.post("/subscribe")
+# Not revalidated: deliveries change with every message sent, so they carry no table version
+@router.get("/newsletters/{newsletter_id}/progress", response_model=NewsletterDeliveryProgress)
+async def get_newsletter_progress(
+    newsletter_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
+):
+    """Get per-recipient delivery progress for a newsletter"""
+    result = await db.execute(select(Newsletter.status).where(Newsletter.id == newsletter_id))
+    newsletter_status = result.scalar_one_or_none()
+    if newsletter_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Newsletter not found"
+        )
+    
+    progress = await get_progress(db, newsletter_id)
+    return NewsletterDeliveryProgress(
+        newsletter_id=newsletter_id,
+        status=newsletter_status,
+        **progress
+    )
+
+@router.post("/subscribe", dependencies=[Depends(rate_limit("subscribe"))])
 async def subscribe_to_newsletter(
-    email: str,
-    db: Session = Depends(get_db)
+    email: EmailStr,
+    db: AsyncSession = Depends(get_db)
 ):
     """Subscribe to newsletter (public endpoint)"""
-    # TODO: Implement newsletter subscription logic
-    # For now, just return success
+    # Idempotent: subscribing twice (or after unsubscribing) keeps one active row
+    await subscribers.subscribe(db, email)
+    await db.commit()
+    
     return {
         "message": "Successfully subscribed to newsletter",
-        "email": email
-    } 
\ No newline at end of file
+        "email": subscribers.normalize_email(email)
+    }
+
+@router.post("/subscribers/import", response_model=SubscriberImportResult)
+async def import_subscribers(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
+):
+    """Bulk import subscribers from a CSV file"""
+    result = await subscribers.import_csv(db, file.file)
+    return SubscriberImportResult(**result)
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.models.database import get_db
 from app.dependencies.auth import get_current_admin
-from app.models.admin import AdminUser
+from app.dependencies.conditional import conditional_get
+from app.services.principal_cache import AdminPrincipal
 from app.models.sections import SectionVisibility
+from app.services import section_visibility
+from app.services.section_visibility import DEFAULT_SECTIONS, default_visibility
+from app.utils.http import etag_matches, not_modified
 from app.schemas.sections import (
     SectionVisibilityCreate, 
     SectionVisibilityUpdate, 
@@ -14,105 +19,62 @@ from app.schemas.sections import (
 
 router = APIRouter(prefix="/api/sections", tags=["sections"])
 
-# Default sections that should exist
-DEFAULT_SECTIONS = [
-    "about",
-    "skills", 
-    "experience",
-    "portfolio",
-    "blog",
-    "newsletter",
-    "contact"
-]
-
 @router.get("/visibility", response_model=SectionVisibilityList)
 async def get_section_visibility(
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ):
     """Get visibility status of all sections (public endpoint)"""
-    sections = db.query(SectionVisibility).all()
-    
-    # Ensure all default sections exist
-    existing_sections = {s.section_name for s in sections}
-    for section_name in DEFAULT_SECTIONS:
-        if section_name not in existing_sections:
-            # Create default section with visibility based on section type
-            is_visible = section_name not in ["blog", "newsletter"]  # Hide blog/newsletter by default
-            new_section = SectionVisibility(
-                section_name=section_name,
-                is_visible=is_visible
-            )
-            db.add(new_section)
+    snapshot = await section_visibility.get_snapshot(db)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
     
-    db.commit()
+    if etag_matches(request, snapshot.etag):
+        return not_modified(headers)
     
-    # Return all sections
-    sections = db.query(SectionVisibility).all()
-    return SectionVisibilityList(sections=sections)  # type: ignore
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
-@router.get("/visibility/admin", response_model=SectionVisibilityList)
+@router.get(
+    "/visibility/admin",
+    response_model=SectionVisibilityList,
+    dependencies=[Depends(conditional_get("section_visibility"))]
+)
 async def get_section_visibility_admin(
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Get visibility status of all sections (admin endpoint)"""
-    sections = db.query(SectionVisibility).all()
-    
     # Ensure all default sections exist
-    existing_sections = {s.section_name for s in sections}
-    for section_name in DEFAULT_SECTIONS:
-        if section_name not in existing_sections:
-            # Create default section with visibility based on section type
-            is_visible = section_name not in ["blog", "newsletter"]  # Hide blog/newsletter by default
-            new_section = SectionVisibility(
-                section_name=section_name,
-                is_visible=is_visible,
-                updated_by=current_user.id
-            )
-            db.add(new_section)
-    
-    db.commit()
+    if await section_visibility.ensure_default_sections(db, updated_by=current_user.id):  # type: ignore
+        section_visibility.invalidate()
     
     # Return all sections
-    sections = db.query(SectionVisibility).all()
+    result = await db.execute(select(SectionVisibility))
+    sections = result.scalars().all()
     return SectionVisibilityList(sections=sections)  # type: ignore
 
 @router.put("/visibility/{section_name}", response_model=SectionVisibilityResponse)
 async def update_section_visibility(
     section_name: str,
     section_data: SectionVisibilityUpdate,
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Update visibility of a specific section"""
-    section = db.query(SectionVisibility).filter(
-        SectionVisibility.section_name == section_name
-    ).first()
-    
-    if not section:
-        # Create section if it doesn't exist
-        section = SectionVisibility(
-            section_name=section_name,
-            is_visible=section_data.is_visible,
-            updated_by=current_user.id
-        )
-        db.add(section)
-    else:
-        # Update existing section
-        section.is_visible = section_data.is_visible  # type: ignore
-        section.updated_by = current_user.id
-    
-    db.commit()
-    db.refresh(section)
-    
-    return section
+    # Creates the section if it doesn't exist
+    rows = await section_visibility.upsert_sections(
+        db, {section_name: section_data.is_visible}, updated_by=current_user.id
+    )
+    await db.commit()
+    section_visibility.invalidate()
+    
+    return SectionVisibilityResponse.model_validate(rows[0])
 
 @router.post("/visibility/bulk", response_model=SectionVisibilityList)
 async def update_multiple_sections(
     sections_data: List[SectionVisibilityUpdate],
     section_names: List[str],
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Update visibility of multiple sections at once"""
     if len(sections_data) != len(section_names):
@@ -121,61 +83,29 @@ async def update_multiple_sections(
             detail="Number of sections and data must match"
         )
     
-    updated_sections = []
-    
-    for section_name, section_data in zip(section_names, sections_data):
-        section = db.query(SectionVisibility).filter(
-            SectionVisibility.section_name == section_name
-        ).first()
-        
-        if not section:
-            # Create section if it doesn't exist
-            section = SectionVisibility(
-                section_name=section_name,
-                is_visible=section_data.is_visible,
-                updated_by=current_user.id
-            )
-            db.add(section)
-        else:
-            # Update existing section
-            section.is_visible = section_data.is_visible  # type: ignore
-            section.updated_by = current_user.id
-        
-        updated_sections.append(section)
+    # One upsert for every section; a name given twice keeps its last value
+    visibility = {
+        section_name: section_data.is_visible
+        for section_name, section_data in zip(section_names, sections_data)
+    }
+    rows = await section_visibility.upsert_sections(db, visibility, updated_by=current_user.id)
+    await db.commit()
+    section_visibility.invalidate()
     
-    db.commit()
-    
-    # Refresh all sections
-    for section in updated_sections:
-        db.refresh(section)
-    
-    return SectionVisibilityList(sections=updated_sections)
+    return SectionVisibilityList(sections=[SectionVisibilityResponse.model_validate(row) for row in rows])
 
 @router.post("/visibility/reset")
 async def reset_section_visibility(
-    db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     """Reset all sections to their default visibility states"""
-    for section_name in DEFAULT_SECTIONS:
-        section = db.query(SectionVisibility).filter(
-            SectionVisibility.section_name == section_name
-        ).first()
-        
-        if not section:
-            # Create section with default visibility
-            is_visible = section_name not in ["blog", "newsletter"]
-            section = SectionVisibility(
-                section_name=section_name,
-                is_visible=is_visible,
-                updated_by=current_user.id
-            )
-            db.add(section)
-        else:
-            # Reset to default visibility
-            section.is_visible = section_name not in ["blog", "newsletter"]  # type: ignore
-            section.updated_by = current_user.id
-    
-    db.commit()
-    
-    return {"message": "Section visibility reset to defaults"} 
\ No newline at end of file
+    await section_visibility.upsert_sections(
+        db,
+        {section_name: default_visibility(section_name) for section_name in DEFAULT_SECTIONS},
+        updated_by=current_user.id
+    )
+    await db.commit()
+    section_visibility.invalidate()
+    
+    return {"message": "Section visibility reset to defaults"}
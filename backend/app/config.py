@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,6 +14,29 @@ class Settings:
     secret_key: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     algorithm: str = os.getenv("ALGORITHM", "HS256")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    principal_cache_ttl_seconds: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    principal_cache_max_entries: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "1024"))
+    password_hash_max_concurrency: int = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", "2"))
+    password_hash_max_queue: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "16"))
+    
+    # Rate limiting of public write endpoints ("5/minute", "100/hour"; empty turns a limit off).
+    # Each route has a per-client limit and a total across all clients.
+    rate_limit_enabled: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    rate_limit_backend: str = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    rate_limit_max_keys: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    rate_limit_login: str = os.getenv("RATE_LIMIT_LOGIN", "10/minute")
+    rate_limit_login_total: str = os.getenv("RATE_LIMIT_LOGIN_TOTAL", "60/minute")
+    # Addresses that logged in successfully skip the login total for this long (0 turns it off)
+    rate_limit_login_trust_hours: float = float(os.getenv("RATE_LIMIT_LOGIN_TRUST_HOURS", "720"))
+    rate_limit_contact: str = os.getenv("RATE_LIMIT_CONTACT", "5/minute")
+    rate_limit_contact_total: str = os.getenv("RATE_LIMIT_CONTACT_TOTAL", "60/minute")
+    rate_limit_subscribe: str = os.getenv("RATE_LIMIT_SUBSCRIBE", "5/minute")
+    rate_limit_subscribe_total: str = os.getenv("RATE_LIMIT_SUBSCRIBE_TOTAL", "120/minute")
+    
+    # Response compression (zstd and br are offered only when their modules are installed)
+    compression_enabled: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    compression_min_size: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    compression_cache_max_bytes: int = int(os.getenv("COMPRESSION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
     
     # CORS
     allowed_origins: List[str] = [
@@ -25,6 +48,61 @@ class Settings:
     # Database
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./personal_website.db")
     
+    # Email
+    smtp_server: str = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+    smtp_port: int = int(os.getenv("SMTP_PORT", "587"))
+    smtp_username: Optional[str] = os.getenv("SMTP_USERNAME") or None
+    smtp_password: Optional[str] = os.getenv("SMTP_PASSWORD") or None
+    smtp_use_tls: bool = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+    smtp_from: Optional[str] = os.getenv("SMTP_FROM") or os.getenv("SMTP_USERNAME") or None
+    admin_email: Optional[str] = os.getenv("ADMIN_EMAIL") or None
+    
+    # Contact duplicate filter: resubmissions and near-identical messages seen within the
+    # window are not stored again (0 entries turns it off)
+    contact_duplicate_window_seconds: float = float(os.getenv("CONTACT_DUPLICATE_WINDOW_SECONDS", "3600"))
+    contact_duplicate_max_entries: int = int(os.getenv("CONTACT_DUPLICATE_MAX_ENTRIES", "10000"))
+    contact_duplicate_similarity: float = float(os.getenv("CONTACT_DUPLICATE_SIMILARITY", "0.8"))
+    
+    # Email outbox
+    outbox_batch_size: int = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    outbox_poll_interval_seconds: float = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "5"))
+    outbox_max_attempts: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+    outbox_retry_base_seconds: float = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+    
+    # Newsletter delivery
+    newsletter_smtp_pool_size: int = int(os.getenv("NEWSLETTER_SMTP_POOL_SIZE", "4"))
+    newsletter_messages_per_second: float = float(os.getenv("NEWSLETTER_MESSAGES_PER_SECOND", "10"))
+    newsletter_chunk_size: int = int(os.getenv("NEWSLETTER_CHUNK_SIZE", "500"))
+    
+    # File uploads
+    upload_max_bytes: int = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+    
+    # Resumable uploads
+    chunked_upload_max_bytes: int = int(os.getenv("CHUNKED_UPLOAD_MAX_BYTES", str(1024 * 1024 * 1024)))
+    upload_chunk_size: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+    upload_session_ttl_hours: float = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+    
+    # Storage ("local" keeps files under ./uploads; "s3" uses an S3-compatible bucket)
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "local").lower()
+    s3_endpoint_url: Optional[str] = os.getenv("S3_ENDPOINT_URL") or None
+    s3_bucket: Optional[str] = os.getenv("S3_BUCKET") or None
+    s3_region: str = os.getenv("S3_REGION", "us-east-1")
+    s3_access_key_id: Optional[str] = os.getenv("S3_ACCESS_KEY_ID") or None
+    s3_secret_access_key: Optional[str] = os.getenv("S3_SECRET_ACCESS_KEY") or None
+    s3_prefix: str = os.getenv("S3_PREFIX", "")
+    s3_path_style: bool = os.getenv("S3_PATH_STYLE", "true").lower() == "true"
+    s3_part_size: int = int(os.getenv("S3_PART_SIZE", str(16 * 1024 * 1024)))
+    s3_upload_concurrency: int = int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+    
+    # Image derivatives
+    image_derivative_widths: List[int] = [
+        int(width) for width in os.getenv("IMAGE_DERIVATIVE_WIDTHS", "320,640,1280,1920").split(",") if width.strip()
+    ]
+    image_derivative_formats: List[str] = [
+        name.strip().lower() for name in os.getenv("IMAGE_DERIVATIVE_FORMATS", "avif,webp").split(",") if name.strip()
+    ]
+    image_derivative_workers: int = int(os.getenv("IMAGE_DERIVATIVE_WORKERS", "2"))
+    
     # Environment
     environment: str = os.getenv("ENVIRONMENT", "development")
     debug: bool = os.getenv("DEBUG", "true").lower() == "true"
@@ -1,41 +1,50 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db
 from app.models.admin import AdminUser
+from app.services.principal_cache import AdminPrincipal, principal_cache
 from app.utils.auth import verify_token
 
 security = HTTPBearer()
 
 async def get_current_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> AdminUser:
+    db: AsyncSession = Depends(get_db)
+) -> AdminPrincipal:
     """Get the current authenticated admin user."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     token = credentials.credentials
-    payload = verify_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    user_id = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
-    
-    user = db.query(AdminUser).filter(AdminUser.id == user_id).first()
-    if user is None:
-        raise credentials_exception
-    
-    if not user.is_active:  # type: ignore
+    principal = principal_cache.get(token)
+
+    if principal is None:
+        payload = verify_token(token)
+
+        if payload is None:
+            raise credentials_exception
+
+        user_id = payload.get("sub")
+        if user_id is None:
+            raise credentials_exception
+
+        result = await db.execute(select(AdminUser).where(AdminUser.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+
+        principal = AdminPrincipal.from_user(user)
+        principal_cache.put(token, principal, payload.get("exp"))
+
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
-    
-    return user 
\ No newline at end of file
+
+    return principal
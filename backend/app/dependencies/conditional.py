@@ -0,0 +1,45 @@
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies.auth import get_current_admin
+from app.models.database import get_db
+from app.services import table_versions
+from app.utils.file_response import not_modified_since
+from app.utils.http import etag_matches
+
+def conditional_get(*tables: str, admin: bool = True):
+    """Dependency answering 304 Not Modified while ``tables`` are unchanged since the client's copy.
+
+    Runs before the endpoint, so a revalidation costs one version lookup
+    instead of the endpoint's queries. Admin routes authenticate first,
+    so a validator never answers for a caller who may not read the route.
+    """
+    cache_control = "private, no-cache" if admin else "no-cache"
+
+    async def check(request: Request, response: Response, db: AsyncSession) -> None:
+        resource = request.url.path + "?" + request.url.query
+        validators = await table_versions.validators(db, tables, resource)
+        headers = {"ETag": validators.etag, "Cache-Control": cache_control}
+        if validators.last_modified:
+            headers["Last-Modified"] = validators.last_modified
+
+        if request.headers.get("if-none-match") is not None:
+            unchanged = etag_matches(request, validators.etag)
+        else:
+            unchanged = validators.last_modified is not None and not_modified_since(request, validators.changed_at)
+        if unchanged:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    if not admin:
+        async def check_public(request: Request, response: Response, db: AsyncSession = Depends(get_db)) -> None:
+            await check(request, response, db)
+        return check_public
+
+    async def check_admin(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+        current_user=Depends(get_current_admin)
+    ) -> None:
+        await check(request, response, db)
+    return check_admin
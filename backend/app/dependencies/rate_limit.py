@@ -0,0 +1,24 @@
+from fastapi import HTTPException, Request, Response, status
+from app.services.rate_limit import rate_limiter
+
+def client_address(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+async def trust_client(name: str, request: Request) -> None:
+    """Let the requesting client skip the ``name`` route-wide limit, e.g. after a successful login."""
+    await rate_limiter.trust(name, client_address(request))
+
+def rate_limit(name: str):
+    """Dependency enforcing the ``name`` rate limits for the requesting client."""
+    async def check_rate_limit(request: Request, response: Response) -> None:
+        result = await rate_limiter.hit(name, client_address(request))
+        if result is None:
+            return
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers=result.headers()
+            )
+        response.headers.update(result.headers())
+    return check_rate_limit
@@ -0,0 +1,2 @@
+# Middleware package
+from .compression import CompressionMiddleware
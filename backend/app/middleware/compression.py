@@ -0,0 +1,342 @@
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: "br" is offered only when installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: "zstd" is offered only when installed
+    zstandard = None
+
+# Media types worth compressing besides text/*, +json and +xml
+COMPRESSIBLE_TYPES = {"application/json", "application/javascript", "application/xml", "image/svg+xml"}
+
+# Bodies at least this big are compressed in a worker thread instead of on the event loop
+THREAD_THRESHOLD = 64 * 1024
+
+class Codec(NamedTuple):
+    name: str
+    # compress(data, level) for whole bodies
+    compress: Callable[[bytes, int], bytes]
+    # stream(level) -> (compress chunk, finish) for streamed bodies
+    stream: Callable[[int], Tuple[Callable[[bytes], bytes], Callable[[], bytes]]]
+    # Levels for bodies compressed per request, and for bodies compressed once and cached
+    level: int
+    cached_level: int
+
+def gzip_stream(level: int):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+def brotli_stream(level: int):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.finish
+
+def zstd_stream(level: int):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return compressor.compress, compressor.flush
+
+def available_codecs() -> List[Codec]:
+    """Codecs this install can produce, most preferred first."""
+    codecs = []
+    if zstandard is not None:
+        codecs.append(Codec(
+            "zstd", lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), zstd_stream, 3, 9
+        ))
+    if brotli is not None:
+        codecs.append(Codec("br", lambda data, level: brotli.compress(data, quality=level), brotli_stream, 4, 7))
+    codecs.append(Codec("gzip", lambda data, level: zlib.compress(data, level, wbits=31), gzip_stream, 4, 6))
+    return codecs
+
+CODECS = available_codecs()
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: str) -> Optional[Codec]:
+    """Pick our most preferred codec the Accept-Encoding header allows (q > 0)."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for codec in CODECS:
+        if accepted.get(codec.name, accepted.get("*", 0.0)) > 0:
+            return codec
+    return None
+
+def compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith("+json")
+        or media_type.endswith("+xml")
+    )
+
+def timed_compress(codec: Codec, body: bytes, level: int) -> Tuple[bytes, float]:
+    """Compress a whole body; returns the bytes and the CPU seconds it took."""
+    start = time.thread_time()
+    compressed = codec.compress(body, level)
+    return compressed, time.thread_time() - start
+
+class CompressedCache:
+    """Compressed bodies of responses with a strong ETag, reused instead of recompressing.
+
+    Keyed by encoding, path, query and ETag (a strong ETag changes whenever
+    the body does), and bounded to ``max_bytes`` of compressed data with
+    least recently used entries dropped first.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, str, bytes, str], Tuple[int, bytes]]" = OrderedDict()
+
+    def get(self, key: Tuple[str, str, bytes, str], body_size: int) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        # A body of another size means the ETag wasn't a strong validator after all
+        if entry is None or entry[0] != body_size:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Tuple[str, str, bytes, str], body_size: int, compressed: bytes) -> None:
+        if len(compressed) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous[1])
+        self._entries[key] = (body_size, compressed)
+        self.size += len(compressed)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+class CompressionStats:
+    """Per-route totals: responses seen and compressed, bytes before and after, CPU spent."""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, float]] = {}
+
+    def record(
+        self,
+        route: str,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+        cpu_seconds: float = 0.0,
+        compressed: bool = False,
+        cache_hit: bool = False
+    ) -> None:
+        totals = self._routes.get(route)
+        if totals is None:
+            totals = self._routes[route] = {
+                "responses": 0, "compressed": 0, "cache_hits": 0,
+                "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0
+            }
+        totals["responses"] += 1
+        totals["compressed"] += compressed
+        totals["cache_hits"] += cache_hit
+        totals["bytes_in"] += bytes_in
+        totals["bytes_out"] += bytes_out
+        totals["cpu_seconds"] += cpu_seconds
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Totals per route, with bytes saved and CPU milliseconds per compressed response."""
+        report = {}
+        for route, totals in sorted(self._routes.items()):
+            report[route] = {
+                **totals,
+                "bytes_saved": totals["bytes_in"] - totals["bytes_out"],
+                "cpu_ms_per_response": (
+                    totals["cpu_seconds"] * 1000 / totals["compressed"] if totals["compressed"] else 0.0
+                )
+            }
+        return report
+
+    def clear(self) -> None:
+        self._routes.clear()
+
+compressed_cache = CompressedCache(max_bytes=settings.compression_cache_max_bytes)
+compression_stats = CompressionStats()
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', 'unmatched')}"
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts (zstd, br, gzip).
+
+    Only 200 responses of text-like types at least ``minimum_size`` bytes
+    long are compressed, and never ones already encoded, marked
+    no-transform or served in ranges. A body sent in one piece with a strong ETag is compressed
+    at a higher level once and then served from ``compressed_cache``;
+    other bodies are compressed per request, streamed ones chunk by chunk.
+    The ETag of a compressed response is made weak, since its bytes differ
+    from the identity response (weak comparison still matches it).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        codec = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressingSender(self, scope, codec, send))
+
+class CompressingSender:
+    """The ``send`` callable handed to the app for one request."""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, codec: Codec, send: Send):
+        self.minimum_size = middleware.minimum_size
+        self.scope = scope
+        self.codec = codec
+        self.send = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.stream: Optional[Tuple[Callable[[bytes], bytes], Callable[[], bytes]]] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+        elif message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if message["status"] == 304:
+                self.passthrough = True
+                self.match_weak_etag(message)
+                compression_stats.record(route_label(self.scope))
+                await self.send(message)
+            elif (
+                message["status"] != 200
+                or "content-encoding" in headers
+                or not compressible(headers.get("content-type", ""))
+                or "no-transform" in headers.get("cache-control", "")
+                # Ranges of a resource are offsets into its identity bytes; a compressed
+                # 200 would not match the 206s that resume it (If-Range)
+                or headers.get("accept-ranges", "none") != "none"
+                or "content-range" in headers
+            ):
+                self.passthrough = True
+                compression_stats.record(route_label(self.scope))
+                await self.send(message)
+            else:
+                self.start = message
+        elif message["type"] == "http.response.body":
+            if self.stream is not None:
+                await self.send_chunk(message)
+            elif not message.get("more_body", False):
+                await self.send_whole(message.get("body", b""))
+            else:
+                await self.start_stream(message)
+        else:
+            if self.start is not None and self.stream is None:
+                # The body goes out some other way (http.response.pathsend, zerocopysend):
+                # send the held start first, as it is
+                self.passthrough = True
+                compression_stats.record(route_label(self.scope))
+                await self.send(self.start)
+            await self.send(message)
+
+    async def send_whole(self, body: bytes) -> None:
+        start = self.start
+        # Anything after the body (trailers) goes out as it is
+        self.passthrough = True
+        route = route_label(self.scope)
+        if len(body) < self.minimum_size:
+            compression_stats.record(route, len(body), len(body))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        headers = MutableHeaders(raw=start["headers"])
+        etag = headers.get("etag")
+        key = None
+        compressed = None
+        cpu_seconds = 0.0
+        if etag and not etag.startswith("W/"):
+            key = (self.codec.name, self.scope["path"], self.scope["query_string"], etag)
+            compressed = compressed_cache.get(key, len(body))
+        cache_hit = compressed is not None
+        if compressed is None:
+            level = self.codec.cached_level if key is not None else self.codec.level
+            if len(body) >= THREAD_THRESHOLD:
+                compressed, cpu_seconds = await anyio.to_thread.run_sync(timed_compress, self.codec, body, level)
+            else:
+                compressed, cpu_seconds = timed_compress(self.codec, body, level)
+            if key is not None:
+                compressed_cache.put(key, len(body), compressed)
+
+        self.set_encoding(headers)
+        headers["Content-Length"] = str(len(compressed))
+        compression_stats.record(route, len(body), len(compressed), cpu_seconds, True, cache_hit)
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    async def start_stream(self, message: Message) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        self.set_encoding(headers)
+        del headers["Content-Length"]
+        self.stream = self.codec.stream(self.codec.level)
+        await self.send(self.start)
+        await self.send_chunk(message)
+
+    async def send_chunk(self, message: Message) -> None:
+        compress, finish = self.stream
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        start = time.thread_time()
+        output = compress(body)
+        if not more_body:
+            output += finish()
+        self.cpu_seconds += time.thread_time() - start
+        self.bytes_in += len(body)
+        self.bytes_out += len(output)
+        if not more_body:
+            compression_stats.record(
+                route_label(self.scope), self.bytes_in, self.bytes_out, self.cpu_seconds, True
+            )
+        if output or not more_body:
+            await self.send({"type": "http.response.body", "body": output, "more_body": more_body})
+
+    def match_weak_etag(self, message: Message) -> None:
+        """Send a 304's ETag in the weak form the client got it in with the compressed 200."""
+        headers = MutableHeaders(raw=message["headers"])
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            if_none_match = Headers(scope=self.scope).get("if-none-match", "")
+            if f"W/{etag}" in [tag.strip() for tag in if_none_match.split(",")]:
+                headers["ETag"] = f"W/{etag}"
+
+    def set_encoding(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.codec.name
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
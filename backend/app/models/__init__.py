@@ -2,9 +2,14 @@
 from .database import Base, get_db
 from .admin import AdminUser
 from .blog import BlogPost, PostStatus
-from .newsletter import Newsletter, NewsletterStatus
-from .contact import ContactMessage
+from .newsletter import Newsletter, NewsletterStatus, NewsletterDelivery, DeliveryStatus
+from .subscriber import Subscriber
+from .contact import ContactMessage, ContactInboxCounters
 from .sections import SectionVisibility
+from .outbox import EmailOutbox, OutboxStatus
+from .upload_session import UploadSession, UploadSessionStatus, UploadSessionChunk
+from .rate_limit import RateLimitBucket
+from .table_version import TableVersion
 
 # Update AdminUser to include relationships
 from sqlalchemy.orm import relationship
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
@@ -16,6 +16,9 @@ class BlogPost(Base):
     title = Column(String(255), nullable=False)
     slug = Column(String(255), unique=True, nullable=False, index=True)
     content = Column(Text, nullable=False)
+    content_html = Column(Text, nullable=True)  # sanitized HTML rendered on write
+    content_hash = Column(String(64), nullable=True)  # hash of the rendered post, served as ETag
+    render_version = Column(Integer, nullable=True)
     excerpt = Column(Text, nullable=True)
     featured_image = Column(String(255), nullable=True)
     status = Column(Enum(PostStatus), default=PostStatus.DRAFT)
@@ -25,4 +28,9 @@ class BlogPost(Base):
     author_id = Column(String, ForeignKey("admin_users.id"), nullable=False)
     
     # Relationship
-    author = relationship("AdminUser", back_populates="blog_posts") 
\ No newline at end of file
+    author = relationship("AdminUser", back_populates="blog_posts")
+    
+    # The public listing pages published posts newest first by (published_at, id)
+    __table_args__ = (
+        Index("ix_blog_posts_status_published_at_id", "status", "published_at", "id"),
+    ) 
\ No newline at end of file
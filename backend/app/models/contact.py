@@ -1,17 +1,33 @@
-from sqlalchemy import Column, String, Text, DateTime, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index
+from sqlalchemy.sql import false, func
 from app.models.database import Base
+from datetime import datetime, timezone
 import uuid
 
 class ContactMessage(Base):
     __tablename__ = "contact_messages"
-    
+
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False)
     email = Column(String(255), nullable=False)
     subject = Column(String(200), nullable=False)
     message = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set by the app so SQLite stores the same format the inbox cursor compares against
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
     is_read = Column(Boolean, default=False)
+    is_archived = Column(Boolean, default=False, server_default=false(), nullable=False)
     ip_address = Column(String(45), nullable=True)  # IPv6 compatible
-    user_agent = Column(Text, nullable=True) 
\ No newline at end of file
+    user_agent = Column(Text, nullable=True)
+
+    # The inbox and the archive each page newest first by (created_at, id)
+    __table_args__ = (
+        Index("ix_contact_messages_archived_created_at_id", "is_archived", "created_at", "id"),
+    )
+
+class ContactInboxCounters(Base):
+    __tablename__ = "contact_inbox_counters"
+
+    # One row per folder (1 inbox, 2 archive), updated in the same transaction as every message write
+    id = Column(Integer, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    unread = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.models.database import Base
 
@@ -11,6 +11,31 @@ class File(Base):
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String(100), nullable=False)
+    sha256 = Column(String(64), nullable=True, index=True)
     description = Column(Text, nullable=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Byte-ordered (COLLATE "C" on PostgreSQL) so reconciliation can walk
+    # paths in the same order storage lists them
+    __table_args__ = (
+        Index("ix_files_file_path", "file_path", postgresql_ops={"file_path": 'COLLATE "C"'}),
+    )
+
+class FileDerivative(Base):
+    __tablename__ = "file_derivatives"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    mime_type = Column(String(100), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    file_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Also serves lookups of a file's variants; keeps generation idempotent
+    __table_args__ = (
+        UniqueConstraint("file_id", "width", "mime_type", name="uq_file_derivatives_file_width_type"),
+        Index("ix_file_derivatives_file_path", "file_path", postgresql_ops={"file_path": 'COLLATE "C"'}),
+    )
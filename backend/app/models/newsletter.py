@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
@@ -7,7 +7,18 @@ import enum
 
 class NewsletterStatus(str, enum.Enum):
     DRAFT = "draft"
+    SENDING = "sending"
     SENT = "sent"
+    # Delivery finished without reaching any recipient
+    FAILED = "failed"
+
+class DeliveryStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    # Left mid-send by a task that died; may have gone out, so never retried
+    INTERRUPTED = "interrupted"
 
 class Newsletter(Base):
     __tablename__ = "newsletters"
@@ -22,4 +33,28 @@ class Newsletter(Base):
     author_id = Column(String, ForeignKey("admin_users.id"), nullable=False)
     
     # Relationship
-    author = relationship("AdminUser", back_populates="newsletters") 
\ No newline at end of file
+    author = relationship("AdminUser", back_populates="newsletters")
+    
+    # Delivery resumes newsletters still marked as sending on start
+    __table_args__ = (
+        Index("ix_newsletters_status", "status"),
+    )
+
+class NewsletterDelivery(Base):
+    __tablename__ = "newsletter_deliveries"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    newsletter_id = Column(String, ForeignKey("newsletters.id", ondelete="CASCADE"), nullable=False)
+    email = Column(String(255), nullable=False)
+    status = Column(Enum(DeliveryStatus), default=DeliveryStatus.PENDING, nullable=False)
+    error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    # The delivery task holding the row and until when; other tasks leave it alone until then
+    claimed_by = Column(String(36), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # One row per recipient; the engine walks pending rows in id order
+    __table_args__ = (
+        UniqueConstraint("newsletter_id", "email", name="uq_newsletter_deliveries_newsletter_email"),
+        Index("ix_newsletter_deliveries_newsletter_status_id", "newsletter_id", "status", "id"),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Float, String, Index
+from app.models.database import Base
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    # "<limit name>:<client>" (or "<limit name>:*" for a route's total budget)
+    key = Column(String(200), primary_key=True)
+    # Theoretical arrival time in Unix seconds; the bucket is full once it has passed
+    tat = Column(Float, nullable=False)
+
+    # Full buckets are purged by tat
+    __table_args__ = (
+        Index("ix_rate_limit_buckets_tat", "tat"),
+    )
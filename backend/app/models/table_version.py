@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Float, Integer, String
+from app.models.database import Base
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    # One row per tracked table, bumped by triggers on every insert, update and delete
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    # Unix seconds of the latest change, served as Last-Modified
+    changed_at = Column(Float, nullable=False)
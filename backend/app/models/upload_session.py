@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy.sql import func
+from app.models.database import Base
+import uuid
+import enum
+
+class UploadSessionStatus(str, enum.Enum):
+    ACTIVE = "active"
+    FINALIZING = "finalizing"
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    original_filename = Column(String(255), nullable=False)
+    declared_type = Column(String(100), nullable=True)
+    description = Column(Text, nullable=True)
+    total_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    temp_path = Column(String(500), nullable=False)
+    status = Column(Enum(UploadSessionStatus), default=UploadSessionStatus.ACTIVE, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class UploadSessionChunk(Base):
+    __tablename__ = "upload_session_chunks"
+    
+    # One row per chunk written; the composite key makes re-sending a chunk harmless
+    session_id = Column(String, ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True)
+    chunk_index = Column(Integer, primary_key=True)
@@ -1,5 +1,5 @@
 # Schemas package
 from .auth import LoginRequest, LoginResponse, AdminUserResponse, ChangePasswordRequest
-from .blog import BlogPostCreate, BlogPostUpdate, BlogPostResponse, BlogPostListResponse
+from .blog import BlogPostCreate, BlogPostUpdate, BlogPostResponse, BlogPostListResponse, BlogPostPage, PublishedPostResponse, BlogSearchResult, BlogSearchPage
 from .contact import ContactMessageCreate, ContactMessageResponse, ContactMessageUpdate, ContactMessageList
 from .sections import SectionVisibilityCreate, SectionVisibilityUpdate, SectionVisibilityResponse, SectionVisibilityList 
\ No newline at end of file
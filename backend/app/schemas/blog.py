@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from app.models.blog import PostStatus
 
@@ -31,6 +31,10 @@ class BlogPostResponse(BlogPostBase):
     class Config:
         from_attributes = True
 
+class PublishedPostResponse(BlogPostResponse):
+    content_html: Optional[str] = None
+    content_hash: Optional[str] = None
+
 class BlogPostListResponse(BaseModel):
     id: str
     title: str
@@ -42,4 +46,23 @@ class BlogPostListResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class BlogPostPage(BaseModel):
+    posts: List[BlogPostListResponse]
+    next_cursor: Optional[str] = None
+
+class BlogSearchResult(BaseModel):
+    id: str
+    title: str
+    slug: str
+    excerpt: Optional[str] = None
+    published_at: Optional[datetime] = None
+    snippet: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class BlogSearchPage(BaseModel):
+    results: List[BlogSearchResult]
+    next_offset: Optional[int] = None
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 
+# Most messages one bulk request may name; larger selections are sent in batches
+BULK_LIMIT = 1000
+
 class ContactMessageCreate(BaseModel):
     name: str
     email: EmailStr
@@ -19,6 +22,7 @@ class ContactMessageResponse(BaseModel):
     message: str
     created_at: datetime
     is_read: bool
+    is_archived: bool = False
     ip_address: Optional[str] = None
     user_agent: Optional[str] = None
 
@@ -28,4 +32,15 @@ class ContactMessageResponse(BaseModel):
 class ContactMessageList(BaseModel):
     messages: list[ContactMessageResponse]
     total: int
-    unread_count: int 
\ No newline at end of file
+    unread_count: int
+    next_cursor: Optional[str] = None
+
+class ContactMessageBulkRequest(BaseModel):
+    ids: list[str] = Field(..., min_length=1, max_length=BULK_LIMIT)
+
+class ContactMessageArchiveRequest(ContactMessageBulkRequest):
+    archived: bool = True
+
+class BulkOperationResult(BaseModel):
+    message: str
+    affected: int
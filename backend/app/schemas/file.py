@@ -1,6 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+# Most files one bulk request may name; larger selections are sent in batches
+BULK_LIMIT = 1000
 
 class FileBase(BaseModel):
     description: Optional[str] = None
@@ -22,8 +25,46 @@ class FileResponse(FileBase):
     file_path: str
     file_size: int
     mime_type: str
+    sha256: Optional[str] = None
     uploaded_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class FileDerivativeResponse(BaseModel):
+    id: int
+    file_id: int
+    width: int
+    height: int
+    mime_type: str
+    file_path: str
+    file_size: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)
+    content_type: Optional[str] = None
+    description: Optional[str] = None
+    chunk_size: Optional[int] = None
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    size: int
+    chunk_size: int
+    total_chunks: int
+    received_chunks: int
+    missing_chunks: List[int]
+    expires_at: datetime
+
+class FileBulkDeleteRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BULK_LIMIT)
+
+class FileBulkDeleteResult(BaseModel):
+    message: str
+    affected: int
@@ -28,4 +28,19 @@ class NewsletterResponse(NewsletterBase):
 
 class NewsletterSendRequest(BaseModel):
     send_to_all: bool = Field(True, description="Send to all subscribers")
-    custom_recipients: Optional[list[str]] = Field(None, description="Custom list of email addresses") 
\ No newline at end of file
+    custom_recipients: Optional[list[str]] = Field(None, description="Custom list of email addresses")
+
+class NewsletterDeliveryProgress(BaseModel):
+    newsletter_id: str
+    status: NewsletterStatus
+    total: int
+    pending: int
+    sending: int
+    sent: int
+    failed: int
+    interrupted: int
+
+class SubscriberImportResult(BaseModel):
+    processed: int
+    inserted: int
+    invalid: int
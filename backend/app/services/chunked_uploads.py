@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
+import anyio
+from fastapi import HTTPException, Request
+from sqlalchemy import delete, select
+from app.config import settings
+from app.models.database import AsyncSessionLocal
+from app.models.upload_session import UploadSession, UploadSessionChunk
+from app.services.uploads import INCOMING_DIR, SNIFF_BYTES, sniff_mime_type
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: part files are not locked
+    fcntl = None
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+# Bounds for a client-requested chunk size
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Block size used when hashing a finished upload
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# How often abandoned sessions and stray partial files are swept
+CLEANUP_INTERVAL_SECONDS = 600
+
+def session_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(hours=settings.upload_session_ttl_hours)
+
+def total_chunks(total_size: int, chunk_size: int) -> int:
+    return max(1, -(-total_size // chunk_size))
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, int]:
+    """Parse ``Content-Range: bytes start-end/total`` into inclusive offsets."""
+    match = CONTENT_RANGE_PATTERN.match((header or "").strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Expected a 'Content-Range: bytes start-end/total' header")
+    start, end, total = (int(value) for value in match.groups())
+    if end < start:
+        raise HTTPException(status_code=400, detail="Invalid Content-Range")
+    return start, end, total
+
+def chunk_for_range(session: UploadSession, start: int, end: int, total: int) -> int:
+    """Map a byte range to its chunk index, requiring whole, aligned chunks."""
+    chunk_size = session.chunk_size
+    if total != session.total_size or start % chunk_size:  # type: ignore
+        raise HTTPException(status_code=400, detail=f"Chunks must start at multiples of {chunk_size} bytes")
+    index = start // chunk_size
+    expected_end = min(start + chunk_size, total) - 1  # type: ignore
+    if end != expected_end:
+        raise HTTPException(status_code=400, detail=f"Chunk {index} must cover bytes {start}-{expected_end}")
+    return index  # type: ignore
+
+def create_part_file(path: Path, size: int) -> None:
+    """Create the sparse file chunks are written into."""
+    with open(path, "wb") as part:
+        part.truncate(size)
+
+def lock_part_file(part: BinaryIO, exclusive: bool) -> None:
+    """Take an advisory lock on an open part file, waiting for it (runs in a worker thread)."""
+    if fcntl is not None:
+        fcntl.flock(part.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+@asynccontextmanager
+async def locked_part_file(path: str, exclusive: bool = False) -> AsyncIterator[BinaryIO]:
+    """Open a part file under a lock that lasts until it is closed.
+
+    Chunk writers share the lock; finalizing takes it exclusively, so it
+    waits for writes already under way and no chunk lands in a file that
+    is being hashed or stored. Writers must check the session is still
+    active once they hold it. The lock is dropped with the process, so a
+    crashed writer never blocks finalizing. Raises FileNotFoundError when
+    the upload was already finalized or discarded.
+    """
+    part = await anyio.to_thread.run_sync(open, path, "r+b")
+    try:
+        await anyio.to_thread.run_sync(lock_part_file, part, exclusive)
+        yield part
+    finally:
+        await anyio.to_thread.run_sync(part.close)
+
+async def write_chunk(request: Request, part: BinaryIO, offset: int, length: int, expected_sha256: Optional[str]) -> None:
+    """Stream a request body into its place in the (locked) part file.
+
+    Chunks are written at their own offsets through separate handles, so
+    several can be uploaded in parallel. The body must be exactly
+    ``length`` bytes and, when given, match ``expected_sha256``.
+    """
+    hasher = hashlib.sha256() if expected_sha256 else None
+    received = 0
+    await anyio.to_thread.run_sync(part.seek, offset)
+    async for data in request.stream():
+        received += len(data)
+        if received > length:
+            raise HTTPException(status_code=400, detail=f"Chunk body is larger than {length} bytes")
+        if hasher:
+            hasher.update(data)
+        await anyio.to_thread.run_sync(part.write, data)
+    if received != length:
+        raise HTTPException(status_code=400, detail=f"Chunk body was {received} bytes, expected {length}")
+    if hasher and hasher.hexdigest() != expected_sha256.lower():  # type: ignore
+        raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+    await anyio.to_thread.run_sync(flush_to_disk, part)
+
+def flush_to_disk(part) -> None:
+    # A chunk is only recorded as received once its bytes are durable
+    part.flush()
+    os.fsync(part.fileno())
+
+def hash_and_sniff(path: str, declared_type: Optional[str], filename: str) -> Tuple[str, Optional[str]]:
+    """Hash a finished upload and identify its type (runs in a worker thread)."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as part:
+        head = part.read(SNIFF_BYTES)
+        hasher.update(head)
+        for block in iter(lambda: part.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest(), sniff_mime_type(head, declared_type, filename)
+
+def remove_part_files(paths: List[str]) -> None:
+    for path in paths:
+        Path(path).unlink(missing_ok=True)
+
+class UploadSessionCleaner:
+    """Background task that removes abandoned upload sessions.
+
+    Expired sessions lose their rows and part files. Partial files in the
+    incoming directory that no session owns (left by interrupted multipart
+    uploads) are removed once they are older than the session TTL.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.removed_sessions = 0
+        self.removed_files = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.cleanup()
+            except Exception as e:
+                print(f"Upload session cleanup failed: {e}")
+            await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
+
+    async def cleanup(self) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(UploadSession.id, UploadSession.temp_path)
+                .where(UploadSession.expires_at < datetime.utcnow())
+            )
+            expired = result.all()
+            if expired:
+                expired_ids = [row.id for row in expired]
+                await db.execute(delete(UploadSessionChunk).where(UploadSessionChunk.session_id.in_(expired_ids)))
+                await db.execute(delete(UploadSession).where(UploadSession.id.in_(expired_ids)))
+                await db.commit()
+                await anyio.to_thread.run_sync(remove_part_files, [row.temp_path for row in expired])
+                self.removed_sessions += len(expired)
+
+            result = await db.execute(select(UploadSession.temp_path))
+            owned = set(result.scalars().all())
+
+        self.removed_files += await anyio.to_thread.run_sync(self._sweep_stray_files, owned)
+
+    def _sweep_stray_files(self, owned) -> int:
+        cutoff = time.time() - settings.upload_session_ttl_hours * 3600
+        removed = 0
+        for path in INCOMING_DIR.glob("*.part"):
+            try:
+                if str(path) not in owned and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+upload_session_cleaner = UploadSessionCleaner()
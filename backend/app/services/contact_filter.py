@@ -0,0 +1,182 @@
+import operator
+import string
+import struct
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import partial
+from typing import Dict, List, NamedTuple, Optional
+from app.config import settings
+
+# Punctuation splits words like whitespace does, so "Hello," and "hello" are the same word
+PUNCTUATION = bytes.maketrans(string.punctuation.encode(), b" " * len(string.punctuation))
+
+# MinHash sketch: BINS minimums over the message's word hashes, compared in BANDS of BAND_ROWS
+BINS = 32
+BAND_ROWS = 4
+BANDS = BINS // BAND_ROWS
+BIN_WIDTH = 2 ** 64 // BINS
+BIN_STARTS = [-2 ** 63 + index * BIN_WIDTH for index in range(BINS)]
+SKETCH = struct.Struct(f"<{BINS}q")
+BAND_SIZE = SKETCH.size // BANDS
+
+# Shorter messages ("Hi!", "Thanks") are too alike to compare by similarity
+MIN_WORDS = 5
+
+class Fingerprint(NamedTuple):
+    # Hash of the sender, client and normalized text
+    exact: int
+    # Packed MinHash sketch of the words; None for short messages
+    sketch: Optional[bytes]
+
+class Match(NamedTuple):
+    message_id: str
+    # Same sender, client and text, as opposed to merely similar text
+    exact: bool
+
+def words(text: str) -> List[bytes]:
+    """Lowercased words of ``text``, punctuation dropped."""
+    return text.lower().encode().translate(PUNCTUATION).split()
+
+def minhash(tokens: List[bytes]) -> bytes:
+    """One-permutation MinHash sketch of a set of words, packed as BINS signed 64-bit ints.
+
+    Each word is hashed once; the hash range is cut into BINS equal bins and
+    each bin keeps its smallest hash. Sorting the hashes turns that into a
+    bisect per bin. A bin no word fell into borrows the value of the next
+    filled bin to its right (rotation densification), so two sketches agree
+    on about as many bins as the word sets' Jaccard similarity.
+    """
+    hashes = sorted(map(hash, tokens))
+    # Position of each bin's first hash; a bin is empty when the next bin starts at the same position
+    firsts = list(map(partial(bisect_left, hashes), BIN_STARTS))
+    firsts.append(len(hashes))
+    minimums: List[Optional[int]] = [
+        hashes[first] if first < following else None for first, following in zip(firsts, firsts[1:])
+    ]
+
+    if None in minimums:
+        filled = [position for position, value in enumerate(minimums) if value is not None]
+        for position in [position for position, value in enumerate(minimums) if value is None]:
+            index = bisect_left(filled, position)
+            donor = filled[index] if index < len(filled) else filled[0] + BINS
+            minimums[position] = hash((minimums[donor % BINS], donor - position))
+    return SKETCH.pack(*minimums)
+
+def band_keys(sketch: bytes) -> List[int]:
+    """LSH keys of a sketch: messages sharing any key are candidates for a similarity check."""
+    return [hash((band, sketch[band * BAND_SIZE:(band + 1) * BAND_SIZE])) for band in range(BANDS)]
+
+def similarity(first: bytes, second: bytes) -> float:
+    """Estimated Jaccard similarity of two messages' words: the share of bins their sketches agree on."""
+    return sum(map(operator.eq, SKETCH.unpack(first), SKETCH.unpack(second))) / BINS
+
+def fingerprint(email: str, subject: str, message: str, client: Optional[str]) -> Fingerprint:
+    """Fingerprint a contact submission.
+
+    Hashes are Python's own (salted per process), which is all an
+    in-memory window needs.
+    """
+    tokens = words(subject) + words(message)
+    exact = hash((email.strip().lower(), client, b" ".join(tokens)))
+    return Fingerprint(exact, minhash(tokens) if len(tokens) >= MIN_WORDS else None)
+
+class _Entry:
+    __slots__ = ("message_id", "fingerprint", "expires_at")
+
+    def __init__(self, message_id: str, fingerprint: Fingerprint, expires_at: float):
+        self.message_id = message_id
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+
+class DuplicateWindow:
+    """Fingerprints of the contact messages accepted in the last ``ttl`` seconds.
+
+    Holds at most ``max_entries`` (oldest dropped first; 0 turns the filter
+    off). Exact fingerprints and sketch bands are dict keys, so a check is
+    a fixed number of dict lookups plus a similarity test per candidate,
+    however full the window is. A band key points at the latest message
+    that had it. Each worker process keeps its own window.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._exact: Dict[int, _Entry] = {}
+        self._bands: Dict[int, _Entry] = {}
+        self.exact_matches = 0
+        self.similar_matches = 0
+
+    def check(self, fingerprint: Fingerprint, message_id: str) -> Optional[Match]:
+        """Match a submission against the window; when nothing matches it joins the window as ``message_id``."""
+        if self.max_entries <= 0:
+            return None
+        now = time.monotonic()
+        self._expire(now)
+
+        entry = self._exact.get(fingerprint.exact)
+        if entry is not None:
+            self.exact_matches += 1
+            return Match(entry.message_id, True)
+
+        keys = band_keys(fingerprint.sketch) if fingerprint.sketch is not None else []
+        checked = set()
+        for key in keys:
+            entry = self._bands.get(key)
+            if entry is None or entry.message_id in checked:
+                continue
+            checked.add(entry.message_id)
+            if similarity(entry.fingerprint.sketch, fingerprint.sketch) >= self.threshold:
+                self.similar_matches += 1
+                return Match(entry.message_id, False)
+
+        entry = _Entry(message_id, fingerprint, now + self.ttl)
+        self._entries[message_id] = entry
+        self._exact[fingerprint.exact] = entry
+        for key in keys:
+            self._bands[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries.values())))
+        return None
+
+    def forget(self, message_id: str) -> None:
+        """Drop a message that was never stored after all."""
+        entry = self._entries.get(message_id)
+        if entry is not None:
+            self._remove(entry)
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at > now:
+                break
+            self._remove(entry)
+
+    def _remove(self, entry: _Entry) -> None:
+        del self._entries[entry.message_id]
+        if self._exact.get(entry.fingerprint.exact) is entry:
+            del self._exact[entry.fingerprint.exact]
+        if entry.fingerprint.sketch is not None:
+            for key in band_keys(entry.fingerprint.sketch):
+                if self._bands.get(key) is entry:
+                    del self._bands[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._exact.clear()
+        self._bands.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "exact_matches": self.exact_matches,
+            "similar_matches": self.similar_matches
+        }
+
+duplicate_window = DuplicateWindow(
+    max_entries=settings.contact_duplicate_max_entries,
+    ttl=settings.contact_duplicate_window_seconds,
+    threshold=settings.contact_duplicate_similarity
+)
@@ -0,0 +1,121 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import case, exists, func, insert, literal, select, true, tuple_, update
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.contact import ContactInboxCounters, ContactMessage
+
+# Primary keys of the counters rows, one per folder
+INBOX = 1
+ARCHIVE = 2
+
+def folder_of(archived: bool) -> int:
+    return ARCHIVE if archived else INBOX
+
+def seed_counters_statement(folder: int):
+    """INSERT of a folder's counters row computed from the messages, when it doesn't exist yet."""
+    counts = select(
+        literal(folder),
+        func.count(),
+        func.coalesce(func.sum(case((ContactMessage.is_read == False, 1), else_=0)), 0)
+    ).select_from(ContactMessage).where(
+        ContactMessage.is_archived == (folder == ARCHIVE)
+    ).having(
+        # An aggregate always yields a row, so the existence check filters it in HAVING
+        ~exists().where(ContactInboxCounters.id == folder)
+    )
+    return insert(ContactInboxCounters).from_select(["id", "total", "unread"], counts)
+
+def install(connection: Connection) -> None:
+    """Create the counters rows for databases that predate them (create_all adds only the table)."""
+    for folder in (INBOX, ARCHIVE):
+        connection.execute(seed_counters_statement(folder))
+
+def count_by_folder(rows: Iterable[Row]) -> Dict[int, Tuple[int, int]]:
+    """(messages, unread messages) per folder of rows carrying ``is_archived`` and ``is_read``."""
+    counts: Dict[int, Tuple[int, int]] = {}
+    for row in rows:
+        total, unread = counts.get(folder_of(row.is_archived), (0, 0))
+        counts[folder_of(row.is_archived)] = (total + 1, unread + (1 if row.is_read == False else 0))
+    return counts
+
+def removed(rows: Iterable[Row]) -> Dict[int, Tuple[int, int]]:
+    """Counter deltas for deleted messages (as returned by DELETE ... RETURNING)."""
+    return {folder: (-total, -unread) for folder, (total, unread) in count_by_folder(rows).items()}
+
+def read_changed(rows: Iterable[Row], unread: int) -> Dict[int, Tuple[int, int]]:
+    """Counter deltas for messages whose read flag flipped; ``unread`` is +1 or -1 each.
+
+    Rows need only ``is_archived``.
+    """
+    deltas: Dict[int, Tuple[int, int]] = {}
+    for row in rows:
+        _, changed = deltas.get(folder_of(row.is_archived), (0, 0))
+        deltas[folder_of(row.is_archived)] = (0, changed + unread)
+    return deltas
+
+def moved(rows: Iterable[Row], archived: bool) -> Dict[int, Tuple[int, int]]:
+    """Counter deltas for messages moved into the archive (or back to the inbox)."""
+    total, unread = count_by_folder(rows).get(folder_of(archived), (0, 0))
+    return {folder_of(archived): (total, unread), folder_of(not archived): (-total, -unread)}
+
+async def adjust_counters(db: AsyncSession, deltas: Dict[int, Tuple[int, int]]) -> None:
+    """Apply per-folder (total, unread) deltas inside the caller's transaction.
+
+    One UPDATE covers every folder touched. It is relative
+    (``total = total + :delta``), so concurrent writers never overwrite
+    each other's changes; the row locks it takes are held only until the
+    surrounding commit.
+    """
+    deltas = {folder: delta for folder, delta in deltas.items() if delta != (0, 0)}
+    if not deltas:
+        return
+    folder = ContactInboxCounters.id
+    await db.execute(
+        update(ContactInboxCounters)
+        .where(folder.in_(deltas))
+        .values(
+            total=ContactInboxCounters.total + case(
+                {key: total for key, (total, _) in deltas.items()}, value=folder, else_=0
+            ),
+            unread=ContactInboxCounters.unread + case(
+                {key: unread for key, (_, unread) in deltas.items()}, value=folder, else_=0
+            )
+        )
+    )
+
+async def inbox_page(
+    db: AsyncSession,
+    limit: int,
+    after: Optional[Tuple[datetime, str]] = None,
+    archived: bool = False
+) -> Tuple[List[Row], int, int]:
+    """Fetch a page of a folder's messages, newest first, together with its counters.
+
+    One statement: the folder's counters row is outer-joined to the page, so
+    an empty page still returns the counts. ``after`` is the (created_at, id)
+    of the last message already shown; the page is read straight off the
+    ``(is_archived, created_at, id)`` index however deep it is. Returns
+    ``(rows, total, unread)``; rows carry the message columns.
+    """
+    page = select(ContactMessage).where(ContactMessage.is_archived == archived)
+    if after is not None:
+        page = page.where(tuple_(ContactMessage.created_at, ContactMessage.id) < tuple_(*after))
+    page = page.order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc()).limit(limit).subquery()
+
+    result = await db.execute(
+        select(
+            ContactInboxCounters.total.label("inbox_total"),
+            ContactInboxCounters.unread.label("inbox_unread"),
+            page
+        )
+        .select_from(ContactInboxCounters)
+        .outerjoin(page, true())
+        .where(ContactInboxCounters.id == folder_of(archived))
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+    rows = result.all()
+    if not rows:
+        return [], 0, 0
+    total, unread = rows[0].inbox_total, rows[0].inbox_unread
+    return [row for row in rows if row.id is not None], total, unread
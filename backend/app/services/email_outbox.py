@@ -0,0 +1,202 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.database import AsyncSessionLocal
+from app.models.outbox import EmailOutbox, OutboxStatus
+from app.services.mailer import SMTPMailer, build_message
+
+# How long a claimed batch is hidden from other senders before it can be retried
+CLAIM_LEASE = timedelta(minutes=5)
+
+# Close the SMTP connection after this long without any mail to send
+SMTP_IDLE_TIMEOUT_SECONDS = 60
+
+def enqueue_email(db: AsyncSession, recipient: str, subject: str, body: str) -> EmailOutbox:
+    """Add an email to the outbox as part of the caller's transaction."""
+    entry = EmailOutbox(recipient=recipient, subject=subject, body=body)
+    db.add(entry)
+    return entry
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff for the given number of attempts so far."""
+    return timedelta(seconds=settings.outbox_retry_base_seconds * 2 ** max(attempts - 1, 0))
+
+class OutboxSender:
+    """Background task that delivers pending outbox rows over a reused SMTP connection.
+
+    Batches are claimed with a single UPDATE ... RETURNING that pushes
+    ``next_attempt_at`` forward by a lease, so several app processes can run
+    a sender without double-sending. A crash mid-batch just lets the lease
+    expire and the rows are retried.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._mailer = SMTPMailer()
+        self._last_send = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.total_send_seconds = 0.0
+        self.last_send_seconds: Optional[float] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self._mailer.close)
+
+    def notify(self) -> None:
+        """Wake the sender after new mail was committed."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent_any = await self.process_batch()
+            except Exception as e:
+                print(f"Email outbox batch failed: {e}")
+                sent_any = False
+
+            if sent_any:
+                # More mail may be waiting; go again straight away
+                continue
+
+            if self._last_send and time.monotonic() - self._last_send > SMTP_IDLE_TIMEOUT_SECONDS:
+                await asyncio.to_thread(self._mailer.close)
+                self._last_send = 0.0
+
+            wake = self._wake
+            assert wake is not None
+            try:
+                await asyncio.wait_for(wake.wait(), settings.outbox_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+
+    async def _claim_batch(self, db: AsyncSession) -> List[Tuple[int, str, str, str, int]]:
+        now = datetime.utcnow()
+        due = (
+            select(EmailOutbox.id)
+            .where(
+                EmailOutbox.status == OutboxStatus.PENDING,
+                EmailOutbox.next_attempt_at <= now
+            )
+            # Longest-due first, read in order off the (status, next_attempt_at) index
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(settings.outbox_batch_size)
+        )
+        result = await db.execute(
+            update(EmailOutbox)
+            .where(
+                EmailOutbox.id.in_(due.scalar_subquery()),
+                EmailOutbox.status == OutboxStatus.PENDING,
+                EmailOutbox.next_attempt_at <= now
+            )
+            .values(
+                next_attempt_at=now + CLAIM_LEASE,
+                attempts=EmailOutbox.attempts + 1
+            )
+            .returning(
+                EmailOutbox.id,
+                EmailOutbox.recipient,
+                EmailOutbox.subject,
+                EmailOutbox.body,
+                EmailOutbox.attempts
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = [tuple(row) for row in result.all()]
+        await db.commit()
+        return rows  # type: ignore
+
+    def _send_batch(self, rows) -> List[Tuple[int, int, Optional[str]]]:
+        """Send claimed rows on the SMTP connection (runs in a worker thread)."""
+        outcomes = []
+        for outbox_id, recipient, subject, body, attempts in rows:
+            start = time.perf_counter()
+            try:
+                self._mailer.send(build_message(recipient, subject, body))
+                error = None
+            except Exception as e:
+                error = str(e)
+            elapsed = time.perf_counter() - start
+            if error is None:
+                self.total_send_seconds += elapsed
+                self.last_send_seconds = elapsed
+            outcomes.append((outbox_id, attempts, error))
+        return outcomes
+
+    async def process_batch(self) -> bool:
+        """Claim and send one batch. Returns True if any rows were claimed."""
+        async with AsyncSessionLocal() as db:
+            rows = await self._claim_batch(db)
+            if not rows:
+                return False
+
+            outcomes = await asyncio.to_thread(self._send_batch, rows)
+            self._last_send = time.monotonic()
+
+            now = datetime.utcnow()
+            sent_ids = [outbox_id for outbox_id, _, error in outcomes if error is None]
+            if sent_ids:
+                await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id.in_(sent_ids))
+                    .values(status=OutboxStatus.SENT, sent_at=now, last_error=None)
+                    .execution_options(synchronize_session=False)
+                )
+                self.sent += len(sent_ids)
+
+            for outbox_id, attempts, error in outcomes:
+                if error is None:
+                    continue
+                if attempts >= settings.outbox_max_attempts:
+                    values = {"status": OutboxStatus.FAILED, "last_error": error}
+                    self.failed += 1
+                else:
+                    values = {"next_attempt_at": now + retry_delay(attempts), "last_error": error}
+                    self.retried += 1
+                await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id == outbox_id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+
+            await db.commit()
+            return True
+
+    async def stats(self, db: AsyncSession) -> Dict[str, object]:
+        """Queue depth plus delivery counters and latency for this process."""
+        queue_depth = await db.scalar(
+            select(func.count()).select_from(EmailOutbox).where(
+                EmailOutbox.status == OutboxStatus.PENDING
+            )
+        )
+        average_ms = (self.total_send_seconds / self.sent * 1000) if self.sent else None
+        return {
+            "queue_depth": queue_depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "average_send_ms": average_ms,
+            "last_send_ms": self.last_send_seconds * 1000 if self.last_send_seconds is not None else None
+        }
+
+outbox_sender = OutboxSender()
@@ -0,0 +1,192 @@
+import asyncio
+import multiprocessing
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Set
+import anyio
+from sqlalchemy import select
+from app.config import settings
+from app.models.database import AsyncSessionLocal, dialect_insert
+from app.models.file import File, FileDerivative
+from app.services.storage import storage
+from app.services.uploads import INCOMING_DIR, UPLOAD_DIR
+from app.utils.images import generate_derivatives, supported_formats
+
+# Source types that get resized variants
+IMAGE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+DERIVATIVE_DIR = UPLOAD_DIR / "derivatives"
+
+# Files looked up per query when scanning for images without variants
+BACKFILL_BATCH_SIZE = 500
+
+class DerivativeGenerator:
+    """Generates image variants in a process pool, off the request path.
+
+    File ids are queued in memory and ``image_derivative_workers``
+    coroutines each keep one job running in the pool, which bounds CPU use.
+    Variants are named by content hash and recorded with an
+    insert-or-ignore, so regenerating is harmless; on startup any image
+    without variants is queued again, which covers jobs lost to a restart.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._scheduled: Set[int] = set()
+        self._formats: List[str] = []
+        self.generated = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        DERIVATIVE_DIR.mkdir(parents=True, exist_ok=True)
+        workers = max(1, settings.image_derivative_workers)
+        self._formats = supported_formats(settings.image_derivative_formats)
+        # Spawned workers don't inherit the server's threads or event loop
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(workers)]
+        self._tasks.append(asyncio.create_task(self.backfill()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._scheduled.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def schedule(self, file_id: int) -> None:
+        """Queue a file for variant generation (no-op if already queued)."""
+        if self._queue is None or file_id in self._scheduled:
+            return
+        self._scheduled.add(file_id)
+        self._queue.put_nowait(file_id)
+
+    async def backfill(self) -> None:
+        """Queue every image that has no variants yet."""
+        last_id = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(File.id)
+                    .outerjoin(FileDerivative, FileDerivative.file_id == File.id)
+                    .where(
+                        File.mime_type.in_(IMAGE_TYPES),
+                        FileDerivative.id.is_(None),
+                        File.id > last_id
+                    )
+                    .order_by(File.id)
+                    .limit(BACKFILL_BATCH_SIZE)
+                )
+                file_ids = result.scalars().all()
+            if not file_ids:
+                return
+            for file_id in file_ids:
+                self.schedule(file_id)
+            last_id = file_ids[-1]
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        while True:
+            file_id = await self._queue.get()
+            try:
+                await self.generate(file_id)
+            except Exception as e:
+                self.failed += 1
+                print(f"Image derivative generation failed for file {file_id}: {e}")
+            finally:
+                self._scheduled.discard(file_id)
+
+    async def generate(self, file_id: int) -> int:
+        """Generate and record the variants of one file; returns how many it has."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(File.file_path, File.mime_type, File.sha256).where(File.id == file_id)
+            )
+            source = result.one_or_none()
+        if source is None or source.mime_type not in IMAGE_TYPES:
+            return 0
+
+        source_path = storage.local_path(source.file_path)
+        workdir = None
+        output_dir = DERIVATIVE_DIR
+        if source_path is None:
+            # Remote storage: resize a local copy, then upload the variants
+            workdir = Path(await anyio.to_thread.run_sync(tempfile.mkdtemp, "", "derivatives-", str(INCOMING_DIR)))
+            source_path = str(workdir / "source")
+            output_dir = workdir / "variants"
+            await storage.download(source.file_path, Path(source_path))
+        try:
+            loop = asyncio.get_running_loop()
+            variants = await loop.run_in_executor(
+                self._executor,
+                generate_derivatives,
+                source_path,
+                str(output_dir),
+                source.sha256 or f"file-{file_id}",
+                settings.image_derivative_widths,
+                self._formats
+            )
+            if workdir is not None:
+                for variant in variants:
+                    local_path = Path(variant["file_path"])  # type: ignore
+                    variant["file_path"] = str(DERIVATIVE_DIR / local_path.relative_to(output_dir))
+                    await storage.save(variant["file_path"], local_path)  # type: ignore
+        finally:
+            if workdir is not None:
+                await anyio.to_thread.run_sync(shutil.rmtree, workdir, True)
+        if not variants:
+            return 0
+
+        async with AsyncSessionLocal() as db:
+            stmt = dialect_insert(db, FileDerivative.__table__).on_conflict_do_nothing(
+                index_elements=["file_id", "width", "mime_type"]
+            )
+            await db.execute(stmt, [{"file_id": file_id, **variant} for variant in variants])
+            await db.commit()
+        self.generated += 1
+        return len(variants)
+
+def accepted_image_types(accept: str) -> List[str]:
+    """Modern formats the client accepts, best first."""
+    accept = accept.lower()
+    return [mime for mime in ("image/avif", "image/webp") if mime in accept]
+
+def pick_variant(variants, accepted: List[str], width: Optional[int]):
+    """Choose the best variant for a client, or None to serve the original.
+
+    Prefers the first accepted modern format, then the JPEG/PNG fallback;
+    within a format takes the narrowest variant at least ``width`` wide,
+    or the widest one available.
+    """
+    for mime_type in accepted + [None]:
+        if mime_type is None:
+            candidates = [v for v in variants if v.mime_type not in ("image/avif", "image/webp")]
+        else:
+            candidates = [v for v in variants if v.mime_type == mime_type]
+        if not candidates:
+            continue
+        if width is None:
+            # The fallbacks are all narrower than the original
+            return None if mime_type is None else max(candidates, key=lambda v: v.width)
+        wide_enough = [v for v in candidates if v.width >= width]
+        if wide_enough:
+            return min(wide_enough, key=lambda v: v.width)
+        if mime_type is None:
+            # The original is wider than any fallback variant
+            return None
+        return max(candidates, key=lambda v: v.width)
+    return None
+
+derivative_generator = DerivativeGenerator()
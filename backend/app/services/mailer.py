@@ -0,0 +1,88 @@
+import smtplib
+from email.message import EmailMessage
+from typing import Optional
+from app.config import settings
+
+# Errors that reject a single message but leave the SMTP session usable
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+def build_message(recipient: str, subject: str, body: str, sender: Optional[str] = None) -> EmailMessage:
+    """Build a plain-text email message."""
+    msg = EmailMessage()
+    msg["From"] = sender or settings.smtp_from or settings.admin_email or "noreply@localhost"
+    msg["To"] = recipient
+    msg["Subject"] = subject
+    msg.set_content(body)
+    return msg
+
+class SMTPMailer:
+    """A single SMTP connection that is opened lazily and reused across sends.
+
+    Not thread-safe: each mailer must only be used by one thread at a time.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: Optional[bool] = None,
+        timeout: float = 30
+    ):
+        self.host = host or settings.smtp_server
+        self.port = port or settings.smtp_port
+        self.username = username if username is not None else settings.smtp_username
+        self.password = password if password is not None else settings.smtp_password
+        self.use_tls = settings.smtp_use_tls if use_tls is None else use_tls
+        self.timeout = timeout
+        self._server: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def send(self, msg: EmailMessage) -> None:
+        """Send a message, reconnecting once if the server dropped the connection.
+
+        Errors that only concern this message leave the connection open;
+        anything else closes it so the next send starts fresh.
+        """
+        try:
+            if self._server is None:
+                self._server = self._connect()
+            try:
+                self._server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._server = self._connect()
+                self._server.send_message(msg)
+        except MESSAGE_ERRORS:
+            raise
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Close the underlying connection, if open."""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except smtplib.SMTPException:
+            self._server.close()
+        except OSError:
+            pass
+        finally:
+            self._server = None
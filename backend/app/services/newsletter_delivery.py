@@ -0,0 +1,313 @@
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, literal, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.database import AsyncSessionLocal, dialect_insert
+from app.models.newsletter import DeliveryStatus, Newsletter, NewsletterDelivery, NewsletterStatus
+from app.models.subscriber import Subscriber
+from app.services.mailer import SMTPMailer, build_message
+from app.services.subscribers import normalize_email
+
+# Recipients inserted per statement when enqueueing an explicit list
+RECIPIENT_INSERT_BATCH = 1000
+
+# Slack on top of the time a claimed chunk takes to send before other tasks may take it over
+CLAIM_LEASE = timedelta(minutes=5)
+
+# How often a task with nothing left to claim checks on rows another task holds
+HELD_ROWS_POLL_SECONDS = 5
+
+class RateLimiter:
+    """Spaces calls evenly so no more than ``rate`` happen per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+def render_newsletter(newsletter: Newsletter) -> Tuple[str, str]:
+    """Render the subject and plain-text body shared by every recipient."""
+    body = (
+        f"{newsletter.content}\n\n"
+        "---\n"
+        "You are receiving this because you subscribed to the newsletter on my personal website.\n"
+    )
+    return newsletter.subject, body  # type: ignore
+
+async def enqueue_subscribers(db: AsyncSession, newsletter_id: str) -> None:
+    """Create a pending delivery for every active subscriber in one INSERT ... SELECT."""
+    recipients = select(literal(newsletter_id), Subscriber.email).where(Subscriber.is_active == True)
+    stmt = dialect_insert(db, NewsletterDelivery).from_select(
+        ["newsletter_id", "email"], recipients
+    ).on_conflict_do_nothing()
+    await db.execute(stmt)
+
+async def enqueue_recipients(db: AsyncSession, newsletter_id: str, emails: Iterable[str]) -> None:
+    """Create pending deliveries for an explicit list of addresses."""
+    batch: List[Dict[str, str]] = []
+    for email in emails:
+        batch.append({"newsletter_id": newsletter_id, "email": normalize_email(email)})
+        if len(batch) >= RECIPIENT_INSERT_BATCH:
+            await db.execute(dialect_insert(db, NewsletterDelivery).on_conflict_do_nothing(), batch)
+            batch = []
+    if batch:
+        await db.execute(dialect_insert(db, NewsletterDelivery).on_conflict_do_nothing(), batch)
+
+async def retry_failed(db: AsyncSession, newsletter_id: str) -> None:
+    """Return a newsletter's failed deliveries to the queue, unclaimed.
+
+    Interrupted deliveries are left alone; they may have gone out already.
+    """
+    await db.execute(
+        update(NewsletterDelivery)
+        .where(NewsletterDelivery.newsletter_id == newsletter_id, NewsletterDelivery.status == DeliveryStatus.FAILED)
+        .values(status=DeliveryStatus.PENDING, error=None, claimed_by=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+
+def claim_lease() -> timedelta:
+    """How long a claimed chunk is hidden from other tasks: time to send it at the rate limit, plus slack."""
+    rate = settings.newsletter_messages_per_second
+    sending = settings.newsletter_chunk_size / rate if rate > 0 else 0.0
+    return CLAIM_LEASE + timedelta(seconds=sending)
+
+async def claim_pending(db: AsyncSession, newsletter_id: str, claim: str) -> List[Row]:
+    """Claim the next chunk of unclaimed (or abandoned) pending deliveries, in id order, and commit."""
+    now = datetime.utcnow()
+    claimable = (
+        NewsletterDelivery.newsletter_id == newsletter_id,
+        NewsletterDelivery.status == DeliveryStatus.PENDING,
+        or_(NewsletterDelivery.lease_expires_at.is_(None), NewsletterDelivery.lease_expires_at <= now)
+    )
+    chunk = (
+        select(NewsletterDelivery.id)
+        .where(*claimable)
+        .order_by(NewsletterDelivery.id)
+        .limit(settings.newsletter_chunk_size)
+    )
+    result = await db.execute(
+        update(NewsletterDelivery)
+        .where(NewsletterDelivery.id.in_(chunk.scalar_subquery()), *claimable)
+        .values(claimed_by=claim, lease_expires_at=now + claim_lease())
+        .returning(NewsletterDelivery.id, NewsletterDelivery.email)
+        .execution_options(synchronize_session=False)
+    )
+    rows = sorted(result.all(), key=lambda row: row.id)
+    await db.commit()
+    return rows
+
+async def delete_deliveries(db: AsyncSession, newsletter_id: str) -> None:
+    """Delete a newsletter's deliveries (SQLite doesn't enforce the ON DELETE CASCADE)."""
+    await db.execute(
+        delete(NewsletterDelivery)
+        .where(NewsletterDelivery.newsletter_id == newsletter_id)
+        .execution_options(synchronize_session=False)
+    )
+
+async def fail_abandoned(db: AsyncSession, newsletter_ids: Iterable[str]) -> None:
+    """Mark INTERRUPTED the deliveries left SENDING by a task whose lease ran out; they may have gone out."""
+    await db.execute(
+        update(NewsletterDelivery)
+        .where(
+            NewsletterDelivery.newsletter_id.in_(list(newsletter_ids)),
+            NewsletterDelivery.status == DeliveryStatus.SENDING,
+            # Rows from before leases existed have none
+            or_(NewsletterDelivery.lease_expires_at.is_(None), NewsletterDelivery.lease_expires_at <= datetime.utcnow())
+        )
+        .values(status=DeliveryStatus.INTERRUPTED, error="Interrupted mid-send; not retried to avoid duplicates")
+        .execution_options(synchronize_session=False)
+    )
+
+async def finish_newsletter(db: AsyncSession, newsletter_id: str) -> bool:
+    """Mark the newsletter SENT (or FAILED when no delivery succeeded) unless rows are still outstanding.
+
+    Returns False while any delivery is still pending or being sent.
+    """
+    progress = await get_progress(db, newsletter_id)
+    if progress[DeliveryStatus.PENDING.value] or progress[DeliveryStatus.SENDING.value]:
+        return False
+    if progress[DeliveryStatus.SENT.value] or not progress["total"]:
+        values = {"status": NewsletterStatus.SENT, "sent_at": datetime.utcnow()}
+    else:
+        values = {"status": NewsletterStatus.FAILED}
+    await db.execute(
+        update(Newsletter)
+        .where(Newsletter.id == newsletter_id, Newsletter.status == NewsletterStatus.SENDING)
+        .values(**values)
+    )
+    return True
+
+async def get_progress(db: AsyncSession, newsletter_id: str) -> Dict[str, int]:
+    """Count deliveries per status for a newsletter."""
+    result = await db.execute(
+        select(NewsletterDelivery.status, func.count())
+        .where(NewsletterDelivery.newsletter_id == newsletter_id)
+        .group_by(NewsletterDelivery.status)
+    )
+    counts = {status.value: 0 for status in DeliveryStatus}
+    for delivery_status, count in result.all():
+        counts[delivery_status.value] = count
+    counts["total"] = sum(counts.values())
+    return counts
+
+class NewsletterDeliveryEngine:
+    """Fans a newsletter out to its pending deliveries in the background.
+
+    Pending rows are claimed ``newsletter_chunk_size`` at a time with an
+    UPDATE ... RETURNING that stamps them with the task's claim token and a
+    lease, so several app processes can deliver the same newsletter without
+    sending anyone a message twice, and memory stays flat no matter how many
+    recipients there are. Each slice of a claim is marked SENDING (only while
+    the claim still holds) before it goes out and SENT/FAILED right after.
+    When a task dies, its PENDING rows are claimed again once the lease
+    runs out; its SENDING rows are marked INTERRUPTED, which retries skip,
+    so delivery stays at-most-once per recipient.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def is_running(self, newsletter_id: str) -> bool:
+        task = self._tasks.get(newsletter_id)
+        return task is not None and not task.done()
+
+    def start(self, newsletter_id: str) -> None:
+        """Start delivering a newsletter in the background."""
+        if self.is_running(newsletter_id):
+            return
+        task = asyncio.create_task(self._deliver(newsletter_id))
+        self._tasks[newsletter_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(newsletter_id, None))
+
+    async def resume_interrupted(self) -> None:
+        """Resume newsletters that were still sending when the process stopped."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Newsletter.id).where(Newsletter.status == NewsletterStatus.SENDING)
+            )
+            newsletter_ids = result.scalars().all()
+            if not newsletter_ids:
+                return
+            await fail_abandoned(db, newsletter_ids)
+            await db.commit()
+
+        for newsletter_id in newsletter_ids:
+            self.start(newsletter_id)
+
+    async def stop(self) -> None:
+        """Cancel running deliveries; they resume on the next startup."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _deliver(self, newsletter_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            newsletter = await db.get(Newsletter, newsletter_id)
+            if newsletter is None:
+                return
+            subject, body = render_newsletter(newsletter)
+
+        pool_size = max(1, settings.newsletter_smtp_pool_size)
+        executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="newsletter-smtp")
+        mailers: asyncio.Queue = asyncio.Queue()
+        for _ in range(pool_size):
+            mailers.put_nowait(SMTPMailer())
+        limiter = RateLimiter(settings.newsletter_messages_per_second)
+        slice_size = pool_size * 4
+        claim = str(uuid.uuid4())
+
+        try:
+            while True:
+                async with AsyncSessionLocal() as db:
+                    rows = await claim_pending(db, newsletter_id, claim)
+                if rows:
+                    for start in range(0, len(rows), slice_size):
+                        await self._send_slice(
+                            rows[start:start + slice_size], claim, subject, body, mailers, executor, limiter
+                        )
+                    continue
+
+                async with AsyncSessionLocal() as db:
+                    await fail_abandoned(db, [newsletter_id])
+                    finished = await finish_newsletter(db, newsletter_id)
+                    await db.commit()
+                if finished:
+                    break
+                # Another task still holds rows; wait for it to finish them or for its lease to run out
+                await asyncio.sleep(HELD_ROWS_POLL_SECONDS)
+        finally:
+            loop = asyncio.get_running_loop()
+            while not mailers.empty():
+                await loop.run_in_executor(executor, mailers.get_nowait().close)
+            executor.shutdown(wait=False)
+
+    async def _send_slice(self, rows, claim, subject, body, mailers, executor, limiter) -> None:
+        ids = [row.id for row in rows]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(NewsletterDelivery)
+                .where(
+                    NewsletterDelivery.id.in_(ids),
+                    NewsletterDelivery.status == DeliveryStatus.PENDING,
+                    NewsletterDelivery.claimed_by == claim
+                )
+                .values(status=DeliveryStatus.SENDING)
+                .returning(NewsletterDelivery.id)
+                .execution_options(synchronize_session=False)
+            )
+            # Rows whose lease ran out may have been claimed by another task since
+            held = set(result.scalars().all())
+            await db.commit()
+        rows = [row for row in rows if row.id in held]
+        if not rows:
+            return
+
+        loop = asyncio.get_running_loop()
+
+        async def send_one(delivery_id: int, email: str) -> Tuple[int, Optional[str]]:
+            await limiter.wait()
+            mailer = await mailers.get()
+            try:
+                await loop.run_in_executor(executor, mailer.send, build_message(email, subject, body))
+                return delivery_id, None
+            except Exception as e:
+                return delivery_id, str(e)
+            finally:
+                mailers.put_nowait(mailer)
+
+        outcomes = await asyncio.gather(*(send_one(row.id, row.email) for row in rows))
+
+        now = datetime.utcnow()
+        sent_ids = [delivery_id for delivery_id, error in outcomes if error is None]
+        async with AsyncSessionLocal() as db:
+            if sent_ids:
+                await db.execute(
+                    update(NewsletterDelivery)
+                    .where(NewsletterDelivery.id.in_(sent_ids))
+                    .values(status=DeliveryStatus.SENT, sent_at=now)
+                )
+            for delivery_id, error in outcomes:
+                if error is not None:
+                    await db.execute(
+                        update(NewsletterDelivery)
+                        .where(NewsletterDelivery.id == delivery_id)
+                        .values(status=DeliveryStatus.FAILED, error=error)
+                    )
+            await db.commit()
+
+delivery_engine = NewsletterDeliveryEngine()
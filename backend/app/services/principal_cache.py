@@ -0,0 +1,132 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.admin import AdminUser
+
+@dataclass(frozen=True)
+class AdminPrincipal:
+    """Immutable snapshot of the authenticated admin user."""
+    id: str
+    username: str
+    email: str
+    is_active: bool
+    created_at: datetime
+    last_login: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: AdminUser) -> "AdminPrincipal":
+        return cls(
+            id=user.id,  # type: ignore
+            username=user.username,  # type: ignore
+            email=user.email,  # type: ignore
+            is_active=bool(user.is_active),
+            created_at=user.created_at,  # type: ignore
+            last_login=user.last_login  # type: ignore
+        )
+
+class PrincipalCache:
+    """Bounded LRU cache of verified tokens to admin principals.
+
+    Entries are keyed by the verified token and can be dropped per user id.
+    They expire after ``ttl`` seconds or when the token itself expires,
+    whichever comes first. A hit skips both the JWT decode and the
+    AdminUser lookup.
+
+    Admin users who are deleted, or whose password or any column held in
+    the principal changes, through any ORM session in this process are
+    dropped once that session commits. Changes made elsewhere (another process, raw SQL) are only
+    picked up when the entries expire.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, AdminPrincipal]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[AdminPrincipal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            del self._entries[token]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return principal
+
+    def put(self, token: str, principal: AdminPrincipal, token_exp: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + self.ttl
+        if token_exp is not None:
+            # Never outlive the token itself
+            expires_at = min(expires_at, time.monotonic() + (token_exp - time.time()))
+
+        self._entries[token] = (expires_at, principal)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached token for a user (password change, deactivation)."""
+        stale = [token for token, (_, principal) in self._entries.items() if principal.id == user_id]
+        for token in stale:
+            del self._entries[token]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+principal_cache = PrincipalCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl=settings.principal_cache_ttl_seconds
+)
+
+# Users whose cached principals go stale once the session commits
+STALE_PRINCIPALS_KEY = "stale_principals"
+
+# Columns copied into a principal, plus the password (changing it revokes sessions)
+PRINCIPAL_COLUMNS = tuple(field.name for field in fields(AdminPrincipal)) + ("password_hash",)
+
+def mark_stale(target: AdminUser) -> None:
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault(STALE_PRINCIPALS_KEY, set()).add(target.id)
+
+@event.listens_for(AdminUser, "after_update")
+def admin_user_updated(mapper, connection, target: AdminUser) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in PRINCIPAL_COLUMNS):
+        mark_stale(target)
+
+@event.listens_for(AdminUser, "after_delete")
+def admin_user_deleted(mapper, connection, target: AdminUser) -> None:
+    mark_stale(target)
+
+@event.listens_for(Session, "after_commit")
+def invalidate_stale_principals(session: Session) -> None:
+    for user_id in session.info.pop(STALE_PRINCIPALS_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def forget_stale_principals(session: Session) -> None:
+    session.info.pop(STALE_PRINCIPALS_KEY, None)
@@ -0,0 +1,254 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from sqlalchemy import case, delete, select
+from app.config import settings
+from app.models.database import AsyncSessionLocal, dialect_insert
+from app.models.rate_limit import RateLimitBucket
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+class Rate:
+    """``limit`` requests per ``window`` seconds, refilled evenly.
+
+    Enforced as a token bucket holding ``limit`` tokens, using the generic
+    cell rate algorithm (GCRA): a bucket is a single number, its
+    theoretical arrival time (TAT). Each allowed request pushes the TAT one
+    ``interval`` further; a request is refused while the TAT is more than
+    ``tolerance`` ahead of now, i.e. while the bucket is empty.
+    """
+    __slots__ = ("limit", "window", "interval", "tolerance", "policy")
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.interval = window / limit
+        # A hair of slack so float rounding never refuses the last token
+        self.tolerance = window - self.interval + 1e-6
+        self.policy = f"{limit};w={window:g}"
+
+def parse_rate(spec: str) -> Optional[Rate]:
+    """Parse "5/minute", "100/hour" or "10/30" (per 30 seconds); an empty spec or 0 turns the limit off."""
+    spec = spec.strip()
+    if not spec:
+        return None
+    count, _, period = spec.partition("/")
+    period = period.strip().lower()
+    try:
+        window = PERIODS.get(period.rstrip("s")) or float(period)
+        limit = int(count)
+    except ValueError:
+        raise ValueError(f"Invalid rate limit: {spec!r}")
+    if limit <= 0:
+        return None
+    if window <= 0:
+        raise ValueError(f"Invalid rate limit: {spec!r}")
+    return Rate(limit, window)
+
+class RateLimitResult:
+    """Outcome of taking a token from one bucket."""
+    __slots__ = ("allowed", "rate", "remaining", "reset", "retry_after")
+
+    def __init__(self, rate: Rate, allowed: bool, tat: float, now: float):
+        ahead = tat - now
+        self.allowed = allowed
+        self.rate = rate
+        # Whole tokens left, and seconds until the bucket is full again
+        self.remaining = max(int((rate.window - ahead) / rate.interval + 1e-9), 0) if allowed else 0
+        self.reset = max(math.ceil(ahead), 0)
+        # Seconds until the next token
+        self.retry_after = 0 if allowed else max(math.ceil(ahead - rate.tolerance), 1)
+
+    def headers(self) -> Dict[str, str]:
+        """RateLimit-* headers (IETF httpapi draft), plus Retry-After when refused."""
+        headers = {
+            "RateLimit-Limit": str(self.rate.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+            "RateLimit-Policy": self.rate.policy
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+class MemoryBackend:
+    """Buckets held in this process, in a bounded LRU of key -> TAT.
+
+    A bucket is one float, so the structure stays small; at ``max_keys``
+    the least recently seen key is evicted, which only forgets a client that
+    has been quiet the longest (it gets a full bucket if it comes back).
+    Each worker process enforces its own budget.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self.evictions = 0
+
+    async def hit(self, key: str, rate: Rate) -> Tuple[bool, float, float]:
+        """Take a token from ``key``'s bucket; returns (allowed, TAT, now)."""
+        now = time.monotonic()
+        tats = self._tats
+        tat = tats.get(key, now)
+        if tat < now:
+            tat = now
+        if tat - now > rate.tolerance:
+            tats.move_to_end(key)
+            return False, tat, now
+
+        tat += rate.interval
+        tats[key] = tat
+        tats.move_to_end(key)
+        if len(tats) > self.max_keys:
+            tats.popitem(last=False)
+            self.evictions += 1
+        return True, tat, now
+
+    async def mark(self, key: str, seconds: float) -> None:
+        """Keep ``key`` set for ``seconds``."""
+        self._tats[key] = time.monotonic() + seconds
+        self._tats.move_to_end(key)
+        if len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+            self.evictions += 1
+
+    async def is_marked(self, key: str) -> bool:
+        return self._tats.get(key, 0.0) > time.monotonic()
+
+    def clear(self) -> None:
+        self._tats.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self._tats), "evictions": self.evictions}
+
+class DatabaseBackend:
+    """Buckets in the rate_limit_buckets table, one budget shared by every worker.
+
+    Taking a token is a single upsert whose update only applies while the
+    bucket has a token, so concurrent workers can't overspend it; a refusal
+    costs one more SELECT for the Retry-After time. Buckets that have
+    refilled completely carry no state and are purged every
+    ``purge_every`` requests. Times are Unix seconds, so workers' clocks
+    should agree.
+    """
+
+    def __init__(self, purge_every: int = 1000):
+        self.purge_every = purge_every
+        self.requests = 0
+
+    async def hit(self, key: str, rate: Rate) -> Tuple[bool, float, float]:
+        """Take a token from ``key``'s bucket; returns (allowed, TAT, now)."""
+        now = time.time()
+        buckets = RateLimitBucket.__table__
+        async with AsyncSessionLocal() as db:
+            statement = dialect_insert(db, buckets).values(key=key, tat=now + rate.interval)
+            statement = statement.on_conflict_do_update(
+                index_elements=[buckets.c.key],
+                set_={"tat": case((buckets.c.tat > now, buckets.c.tat), else_=now) + rate.interval},
+                where=buckets.c.tat - now <= rate.tolerance
+            ).returning(buckets.c.tat)
+            tat = (await db.execute(statement)).scalar_one_or_none()
+            allowed = tat is not None
+            if not allowed:
+                tat = await db.scalar(select(buckets.c.tat).where(buckets.c.key == key))
+                if tat is None:
+                    tat = now
+
+            self.requests += 1
+            if self.requests % self.purge_every == 0:
+                await db.execute(delete(buckets).where(buckets.c.tat < now))
+            await db.commit()
+        return allowed, tat, now
+
+    async def mark(self, key: str, seconds: float) -> None:
+        """Keep ``key`` set for ``seconds`` (purged like a full bucket once it lapses)."""
+        buckets = RateLimitBucket.__table__
+        until = time.time() + seconds
+        async with AsyncSessionLocal() as db:
+            statement = dialect_insert(db, buckets).values(key=key, tat=until)
+            await db.execute(statement.on_conflict_do_update(index_elements=[buckets.c.key], set_={"tat": until}))
+            await db.commit()
+
+    async def is_marked(self, key: str) -> bool:
+        buckets = RateLimitBucket.__table__
+        async with AsyncSessionLocal() as db:
+            until = await db.scalar(select(buckets.c.tat).where(buckets.c.key == key))
+        return until is not None and until > time.time()
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests}
+
+class RateLimiter:
+    """Named limits, each a per-client bucket plus one bucket for the route as a whole.
+
+    The per-client bucket stops a single address from flooding a route;
+    the route bucket caps the total work (DB commits, SMTP, bcrypt) that
+    many addresses together can cause. Requests the per-client bucket
+    refuses never reach the route bucket. Clients trusted on a route (for
+    login: addresses that recently logged in successfully) skip its route
+    bucket, so a flood from other addresses can't lock them out.
+    """
+
+    def __init__(
+        self,
+        backend,
+        limits: Dict[str, Tuple[Optional[Rate], Optional[Rate]]],
+        trust_seconds: Optional[Dict[str, float]] = None
+    ):
+        self.backend = backend
+        self.limits = limits
+        self.trust_seconds = trust_seconds or {}
+
+    async def trust(self, name: str, client: str) -> None:
+        """Exempt ``client`` from the ``name`` route bucket for the configured time."""
+        seconds = self.trust_seconds.get(name)
+        if seconds and name in self.limits:
+            await self.backend.mark(f"{name}:trusted:{client}", seconds)
+
+    async def hit(self, name: str, client: str) -> Optional[RateLimitResult]:
+        """Take a token for ``client`` on the ``name`` limits; None when they are off.
+
+        The result reported is the refusal, or else whichever bucket has
+        fewer tokens left.
+        """
+        per_client, total = self.limits.get(name, (None, None))
+        result = None
+        if per_client is not None:
+            result = RateLimitResult(per_client, *await self.backend.hit(f"{name}:{client}", per_client))
+            if not result.allowed:
+                return result
+        if total is not None and not (
+            name in self.trust_seconds and await self.backend.is_marked(f"{name}:trusted:{client}")
+        ):
+            route = RateLimitResult(total, *await self.backend.hit(f"{name}:*", total))
+            if result is None or not route.allowed or route.remaining < result.remaining:
+                result = route
+        return result
+
+def get_backend(backend: str):
+    """Create the rate limit backend selected by RATE_LIMIT_BACKEND."""
+    if backend == "memory":
+        return MemoryBackend(max_keys=settings.rate_limit_max_keys)
+    if backend == "database":
+        return DatabaseBackend()
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+def configured_limits() -> Dict[str, Tuple[Optional[Rate], Optional[Rate]]]:
+    """(per client, route total) rates of each limited route, from the settings."""
+    if not settings.rate_limit_enabled:
+        return {}
+    return {
+        "login": (parse_rate(settings.rate_limit_login), parse_rate(settings.rate_limit_login_total)),
+        "contact": (parse_rate(settings.rate_limit_contact), parse_rate(settings.rate_limit_contact_total)),
+        "subscribe": (parse_rate(settings.rate_limit_subscribe), parse_rate(settings.rate_limit_subscribe_total))
+    }
+
+def configured_trust() -> Dict[str, float]:
+    """Seconds a client stays trusted on each route that grants trust."""
+    return {"login": settings.rate_limit_login_trust_hours * 3600}
+
+rate_limiter = RateLimiter(get_backend(settings.rate_limit_backend), configured_limits(), configured_trust())
@@ -0,0 +1,218 @@
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, List, Optional
+from sqlalchemy import delete, select, union
+from app.models.database import AsyncSessionLocal
+from app.models.file import File, FileDerivative
+from app.services.storage import storage
+from app.services.uploads import UPLOAD_DIR
+from app.utils.compat import anext
+
+# Distinct paths read from each table per query
+PATH_BATCH_SIZE = 5000
+
+# Orphans or missing paths checked (and repaired) together
+CHECK_BATCH_SIZE = 500
+
+# How many orphans and missing paths the report names
+REPORT_SAMPLE_SIZE = 20
+
+# Entries walked between progress callbacks
+PROGRESS_INTERVAL = 100000
+
+@dataclass
+class ReconciliationReport:
+    stored: int = 0
+    referenced: int = 0
+    orphans: int = 0
+    orphan_bytes: int = 0
+    recent_orphans: int = 0
+    missing: int = 0
+    removed_orphans: int = 0
+    removed_files: int = 0
+    removed_derivatives: int = 0
+    orphan_samples: List[str] = field(default_factory=list)
+    missing_samples: List[str] = field(default_factory=list)
+
+class Throttle:
+    """Spaces operations out to at most ``rate`` per second (0 disables it)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next > now:
+            await asyncio.sleep(self._next - now)
+        self._next = max(now, self._next) + self.interval
+
+def byte_ordered(column, dialect_name: str):
+    # PostgreSQL's usual collations ignore punctuation; storage lists keys by byte
+    return column.collate("C") if dialect_name == "postgresql" else column
+
+async def referenced_paths(model) -> AsyncIterator[str]:
+    """Distinct ``file_path`` values of a table in byte order, in keyset batches."""
+    last = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            path = byte_ordered(model.file_path, db.bind.dialect.name)
+            query = select(path).distinct().order_by(path).limit(PATH_BATCH_SIZE)
+            if last is not None:
+                query = query.where(path > last)
+            paths = (await db.execute(query)).scalars().all()
+        if not paths:
+            return
+        for value in paths:
+            yield value
+        last = paths[-1]
+
+async def merge_sorted(*streams: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Merge sorted async streams into one sorted stream without duplicates."""
+    heads = []
+    for index, stream in enumerate(streams):
+        value = await anext(stream, None)
+        if value is not None:
+            heads.append((value, index))
+    heapq.heapify(heads)
+    previous = None
+    while heads:
+        value, index = heapq.heappop(heads)
+        if value != previous:
+            yield value
+            previous = value
+        following = await anext(streams[index], None)
+        if following is not None:
+            heapq.heappush(heads, (following, index))
+
+def is_internal(key: str) -> bool:
+    # .incoming holds in-progress uploads; dot files are temporary names
+    return any(part.startswith(".") for part in key.split("/"))
+
+async def still_referenced(paths: List[str]) -> set:
+    async with AsyncSessionLocal() as db:
+        found = set()
+        for model in (File, FileDerivative):
+            result = await db.execute(select(model.file_path).where(model.file_path.in_(paths)))
+            found.update(result.scalars().all())
+    return found
+
+class Reconciler:
+    """Compares stored upload objects with the paths the database references.
+
+    Both sides are streamed in byte order and merge-joined: storage is
+    walked one directory (or listing page) at a time and each table is read
+    in keyset batches over its ``file_path`` index, so memory stays flat
+    however many entries there are. Orphans (objects no row references)
+    and missing files (rows whose object is gone) are re-checked before
+    being reported, since uploads and deletes may race the walk. With
+    ``repair``, orphans older than ``grace_seconds`` are deleted and rows
+    pointing at missing files are removed (missing variants only drop the
+    variant rows, so the image is regenerated), at most ``ops_per_second``
+    storage operations per second.
+    """
+
+    def __init__(
+        self,
+        repair: bool = False,
+        grace_seconds: float = 3600,
+        ops_per_second: float = 50,
+        progress: Optional[Callable[[ReconciliationReport], None]] = None
+    ):
+        self.repair = repair
+        self.grace_seconds = grace_seconds
+        self.throttle = Throttle(ops_per_second)
+        self.progress = progress
+        self.report = ReconciliationReport()
+
+    async def run(self) -> ReconciliationReport:
+        prefix = f"{UPLOAD_DIR}/"
+        stored = (key async for key in storage.iter_keys(prefix) if not is_internal(key))
+        referenced = merge_sorted(referenced_paths(File), referenced_paths(FileDerivative))
+        orphans: List[str] = []
+        missing: List[str] = []
+        report = self.report
+
+        key = await anext(stored, None)
+        path = await anext(referenced, None)
+        walked = 0
+        while key is not None or path is not None:
+            if path is None or (key is not None and key < path):
+                report.stored += 1
+                orphans.append(key)  # type: ignore
+                key = await anext(stored, None)
+            elif key is None or path < key:
+                report.referenced += 1
+                missing.append(path)
+                path = await anext(referenced, None)
+            else:
+                report.stored += 1
+                report.referenced += 1
+                key = await anext(stored, None)
+                path = await anext(referenced, None)
+
+            if len(orphans) >= CHECK_BATCH_SIZE:
+                await self.check_orphans(orphans)
+                orphans = []
+            if len(missing) >= CHECK_BATCH_SIZE:
+                await self.check_missing(missing)
+                missing = []
+            walked += 1
+            if self.progress and walked % PROGRESS_INTERVAL == 0:
+                self.progress(report)
+
+        if orphans:
+            await self.check_orphans(orphans)
+        if missing:
+            await self.check_missing(missing)
+        return report
+
+    async def check_orphans(self, keys: List[str]) -> None:
+        report = self.report
+        # A row may have been committed since its batch was read
+        referenced = await still_referenced(keys)
+        keys = [key for key in keys if key not in referenced]
+        cutoff = time.time() - self.grace_seconds
+        for key in keys:
+            info = await storage.stat(key)
+            if info is None:
+                continue
+            if info.modified > cutoff:
+                # Possibly an upload whose row isn't committed yet
+                report.recent_orphans += 1
+                continue
+            report.orphans += 1
+            report.orphan_bytes += info.size
+            if len(report.orphan_samples) < REPORT_SAMPLE_SIZE:
+                report.orphan_samples.append(key)
+            if self.repair:
+                await self.throttle.wait()
+                await storage.delete(key)
+                report.removed_orphans += 1
+
+    async def check_missing(self, paths: List[str]) -> None:
+        report = self.report
+        # The object may have been stored after the walk passed its key
+        confirmed = [path for path in paths if not await storage.exists(path)]
+        report.missing += len(confirmed)
+        report.missing_samples.extend(confirmed[:REPORT_SAMPLE_SIZE - len(report.missing_samples)])
+        if not self.repair or not confirmed:
+            return
+
+        await self.throttle.wait()
+        async with AsyncSessionLocal() as db:
+            # Dropping all of an image's variant rows gets it regenerated by the
+            # derivative backfill on the next start
+            file_ids = union(
+                select(File.id).where(File.file_path.in_(confirmed)),
+                select(FileDerivative.file_id).where(FileDerivative.file_path.in_(confirmed))
+            )
+            result = await db.execute(delete(FileDerivative).where(FileDerivative.file_id.in_(file_ids)))
+            report.removed_derivatives += result.rowcount
+            result = await db.execute(delete(File).where(File.file_path.in_(confirmed)))
+            report.removed_files += result.rowcount
+            await db.commit()
@@ -0,0 +1,151 @@
+import html
+import re
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Control characters used to mark snippet matches before HTML-escaping
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    """Escape a raw snippet and turn match markers into <mark> tags."""
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+class SqliteFtsSearch:
+    """FTS5 index over blog_posts kept in sync by triggers.
+
+    The index is an external-content table keyed by blog_posts.rowid, so
+    the text is not stored twice. VACUUM may renumber rowids of tables
+    without an INTEGER PRIMARY KEY; run rebuild_search_index.py after one.
+    """
+
+    DDL = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS blog_posts_fts USING fts5(
+            title, excerpt, content,
+            content='blog_posts', content_rowid='rowid',
+            tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ai AFTER INSERT ON blog_posts BEGIN
+            INSERT INTO blog_posts_fts(rowid, title, excerpt, content)
+            VALUES (new.rowid, new.title, new.excerpt, new.content);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ad AFTER DELETE ON blog_posts BEGIN
+            INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, content)
+            VALUES ('delete', old.rowid, old.title, old.excerpt, old.content);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS blog_posts_fts_au AFTER UPDATE OF title, excerpt, content ON blog_posts BEGIN
+            INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, content)
+            VALUES ('delete', old.rowid, old.title, old.excerpt, old.content);
+            INSERT INTO blog_posts_fts(rowid, title, excerpt, content)
+            VALUES (new.rowid, new.title, new.excerpt, new.content);
+        END
+        """,
+    ]
+
+    # Rank in the inner query and build snippets only for the page being
+    # returned; snippet() is far more expensive than bm25()
+    SEARCH_SQL = text(f"""
+        SELECT p.id, p.title, p.slug, p.excerpt, p.published_at,
+               snippet(blog_posts_fts, -1, '{MATCH_START}', '{MATCH_END}', '…', 16) AS snippet,
+               page.rank
+        FROM (
+            SELECT f.rowid AS post_rowid, bm25(blog_posts_fts, 10.0, 4.0, 1.0) AS rank
+            FROM blog_posts_fts f
+            JOIN blog_posts p ON p.rowid = f.rowid
+            WHERE blog_posts_fts MATCH :query AND p.status = 'PUBLISHED'
+            ORDER BY rank
+            LIMIT :limit OFFSET :offset
+        ) page
+        JOIN blog_posts_fts ON blog_posts_fts.rowid = page.post_rowid
+        JOIN blog_posts p ON p.rowid = page.post_rowid
+        WHERE blog_posts_fts MATCH :query
+        ORDER BY page.rank
+    """)
+
+    def build_query(self, terms: List[str]) -> str:
+        # Quote every term so user input can't inject FTS syntax. No prefix
+        # matching: a short prefix can expand to most of the vocabulary
+        return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+    def install(self, connection: Connection) -> None:
+        existed = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'blog_posts_fts'"
+        ).first()
+        for statement in self.DDL:
+            connection.exec_driver_sql(statement)
+        if not existed:
+            # Triggers only cover future writes; index posts that already exist
+            self.rebuild(connection)
+
+    def rebuild(self, connection: Connection) -> None:
+        connection.exec_driver_sql("INSERT INTO blog_posts_fts(blog_posts_fts) VALUES ('rebuild')")
+
+    async def search(self, db: AsyncSession, terms: List[str], limit: int, offset: int):
+        result = await db.execute(self.SEARCH_SQL, {
+            "query": self.build_query(terms),
+            "limit": limit,
+            "offset": offset
+        })
+        return result.all()
+
+class PostgresFullTextSearch:
+    """tsvector search backed by a GIN expression index, always in sync."""
+
+    DOCUMENT = (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') || "
+        "setweight(to_tsvector('english', content), 'C')"
+    )
+
+    # The WHERE expression must match the index expression for the GIN
+    # index to be used, so columns stay unqualified as in the index
+    SEARCH_SQL = text(f"""
+        SELECT id, title, slug, excerpt, published_at,
+               ts_headline('english', content, q,
+                   'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxWords=24, MinWords=8') AS snippet,
+               -ts_rank({DOCUMENT}, q) AS rank
+        FROM blog_posts, websearch_to_tsquery('english', :query) q
+        WHERE ({DOCUMENT}) @@ q AND status = 'PUBLISHED'
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    """)
+
+    def install(self, connection: Connection) -> None:
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_blog_posts_search ON blog_posts USING GIN (({self.DOCUMENT}))"
+        )
+
+    def rebuild(self, connection: Connection) -> None:
+        connection.exec_driver_sql("REINDEX INDEX ix_blog_posts_search")
+
+    async def search(self, db: AsyncSession, terms: List[str], limit: int, offset: int):
+        result = await db.execute(self.SEARCH_SQL, {
+            "query": " ".join(terms),
+            "limit": limit,
+            "offset": offset
+        })
+        return result.all()
+
+def get_search_backend(dialect_name: str):
+    """Pick the search implementation for a database dialect."""
+    if dialect_name == "postgresql":
+        return PostgresFullTextSearch()
+    return SqliteFtsSearch()
+
+def tokenize(query: str) -> List[str]:
+    """Split a user query into plain search terms."""
+    return WORD_PATTERN.findall(query)
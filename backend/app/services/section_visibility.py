@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import dialect_insert
+from app.models.sections import SectionVisibility
+from app.schemas.sections import SectionVisibilityList
+
+# Default sections that should exist
+DEFAULT_SECTIONS = [
+    "about",
+    "skills",
+    "experience",
+    "portfolio",
+    "blog",
+    "newsletter",
+    "contact"
+]
+
+# Sections hidden until the admin turns them on
+HIDDEN_BY_DEFAULT = ["blog", "newsletter"]
+
+@dataclass(frozen=True)
+class VisibilitySnapshot:
+    """Pre-serialized public visibility payload and its validator."""
+    body: bytes
+    etag: str
+
+_snapshot: Optional[VisibilitySnapshot] = None
+_generation = 0
+_lock = asyncio.Lock()
+
+def default_visibility(section_name: str) -> bool:
+    """Return the default visibility for a section."""
+    return section_name not in HIDDEN_BY_DEFAULT
+
+async def ensure_default_sections(db: AsyncSession, updated_by: Optional[str] = None) -> bool:
+    """Create any missing default sections. Returns True if rows were added."""
+    result = await db.execute(select(SectionVisibility.section_name))
+    existing_sections = set(result.scalars().all())
+    missing = [name for name in DEFAULT_SECTIONS if name not in existing_sections]
+    if not missing:
+        return False
+
+    for section_name in missing:
+        db.add(SectionVisibility(
+            section_name=section_name,
+            is_visible=default_visibility(section_name),
+            updated_by=updated_by
+        ))
+
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request created the defaults first
+        await db.rollback()
+        return False
+    return True
+
+async def upsert_sections(
+    db: AsyncSession,
+    visibility: Dict[str, bool],
+    updated_by: Optional[str] = None
+) -> List[Row]:
+    """Set the visibility of several sections in one INSERT ... ON CONFLICT statement.
+
+    Missing sections are created. Returns the written rows (without loading
+    ORM objects); the caller commits and then calls ``invalidate()``.
+    """
+    if not visibility:
+        return []
+    insert = dialect_insert(db, SectionVisibility)
+    statement = insert.values([
+        {
+            "id": str(uuid.uuid4()),
+            "section_name": section_name,
+            "is_visible": is_visible,
+            "updated_by": updated_by
+        }
+        for section_name, is_visible in visibility.items()
+    ]).on_conflict_do_update(
+        index_elements=[SectionVisibility.section_name],
+        set_={
+            "is_visible": insert.excluded.is_visible,
+            "updated_by": insert.excluded.updated_by,
+            "updated_at": func.now()
+        }
+    ).returning(
+        SectionVisibility.id,
+        SectionVisibility.section_name,
+        SectionVisibility.is_visible,
+        SectionVisibility.updated_at,
+        SectionVisibility.updated_by
+    )
+    result = await db.execute(statement)
+    return result.all()
+
+async def get_snapshot(db: AsyncSession) -> VisibilitySnapshot:
+    """Return the cached visibility snapshot, building it on first use.
+
+    The snapshot is per process; every write endpoint must call
+    ``invalidate()`` after committing so the next read rebuilds it.
+    """
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+
+    async with _lock:
+        if _snapshot is not None:
+            return _snapshot
+        return await _rebuild(db)
+
+async def _rebuild(db: AsyncSession) -> VisibilitySnapshot:
+    global _snapshot
+    generation = _generation
+    await ensure_default_sections(db)
+
+    result = await db.execute(select(SectionVisibility))
+    payload = SectionVisibilityList(sections=result.scalars().all())  # type: ignore
+    body = payload.model_dump_json().encode()
+    snapshot = VisibilitySnapshot(
+        body=body,
+        etag=f'"{hashlib.sha1(body).hexdigest()}"'
+    )
+
+    # Only publish if no write invalidated the data while we were reading it
+    if generation == _generation:
+        _snapshot = snapshot
+    return snapshot
+
+def invalidate() -> None:
+    """Drop the cached snapshot after section visibility changes."""
+    global _snapshot, _generation
+    _generation += 1
+    _snapshot = None
@@ -0,0 +1,428 @@
+import hashlib
+import hmac
+import math
+import os
+import shutil
+import xml.etree.ElementTree as ElementTree
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+import anyio
+import httpx
+from fastapi import HTTPException, Request, Response
+from app.config import settings
+from app.utils.compat import aclosing
+from app.utils.file_response import RangeStreamResponse, file_response, range_response
+
+# Size of the pieces object bodies are streamed in, in both directions
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# S3 rejects multipart parts below 5 MiB (except the last) and more than 10,000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+# Keys listed per worker-thread hop when walking local storage
+LIST_BATCH_SIZE = 1000
+
+class StorageError(OSError):
+    """A storage backend failed to read, write or delete an object."""
+
+@dataclass
+class StoredObject:
+    size: int
+    modified: float
+    etag: str
+
+async def read_file_range(path: Path, offset: int, length: int) -> AsyncIterator[bytes]:
+    """Yield ``length`` bytes of a local file from ``offset``, one chunk at a time."""
+    async with await anyio.open_file(path, mode="rb") as file:
+        await file.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk = await file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise StorageError(f"{path} shrank while it was being stored")
+            remaining -= len(chunk)
+            yield chunk
+
+def move_into_place(source: Path, target: Path) -> None:
+    # Flush before the rename so a crash can't leave a named but empty file
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(source, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(source, target)
+
+def list_directory(path: Path) -> List[Tuple[str, bool]]:
+    """(name, is_dir) entries of a directory, ordered as the full keys would sort."""
+    try:
+        with os.scandir(path) as entries:
+            listing = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries]
+    except FileNotFoundError:
+        return []
+    # "ab/..." must sort against a sibling "ab-x" as the full key does
+    listing.sort(key=lambda entry: entry[0] + "/" if entry[1] else entry[0])
+    return listing
+
+def walk_keys(root: Path, directory: str) -> Iterator[str]:
+    for name, is_dir in list_directory(root / directory):
+        key = f"{directory}/{name}"
+        if is_dir:
+            yield from walk_keys(root, key)
+        else:
+            yield key
+
+class LocalStorage:
+    """Objects are files on local disk; keys are paths relative to ``root``.
+
+    Keys look like ``uploads/ab/cd/<sha256>.jpg``, which is also what
+    ``File.file_path`` has always held, so existing rows work unchanged.
+    """
+
+    def __init__(self, root: Path = Path(".")):
+        self.root = root
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path of the object on this machine (lets downloads use zero-copy sends)."""
+        return str(self.root / key)
+
+    async def exists(self, key: str) -> bool:
+        return await anyio.to_thread.run_sync(os.path.isfile, self.root / key)
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, self.root / key)
+        except FileNotFoundError:
+            return None
+        return StoredObject(
+            size=stat_result.st_size,
+            modified=stat_result.st_mtime,
+            etag=f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        )
+
+    async def save(self, key: str, source: Path) -> None:
+        """Store a local file under ``key``, consuming the file."""
+        await anyio.to_thread.run_sync(move_into_place, source, self.root / key)
+
+    async def download(self, key: str, destination: Path) -> None:
+        """Copy the object to a local file."""
+        await anyio.to_thread.run_sync(shutil.copyfile, self.root / key, destination)
+
+    def iter_range(self, key: str, offset: int, length: int) -> AsyncIterator[bytes]:
+        return read_file_range(self.root / key, offset, length)
+
+    async def delete(self, key: str) -> None:
+        await anyio.to_thread.run_sync(lambda: (self.root / key).unlink(missing_ok=True))
+
+    async def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        """Yield every key under the ``prefix`` directory in byte order.
+
+        The tree is walked depth-first one directory listing at a time, in
+        batches of keys per worker-thread hop, so memory is bounded by the
+        largest single directory rather than the whole tree.
+        """
+        keys = walk_keys(self.root, prefix.rstrip("/"))
+        while True:
+            batch = await anyio.to_thread.run_sync(lambda: list(islice(keys, LIST_BATCH_SIZE)))
+            if not batch:
+                return
+            for key in batch:
+                yield key
+
+    async def close(self) -> None:
+        pass
+
+class S3Storage:
+    """Objects live in an S3-compatible bucket (AWS S3, MinIO, R2...).
+
+    Requests are signed with AWS Signature Version 4 and bodies are
+    streamed: uploads larger than one part go up as a multipart upload
+    whose parts are read from disk and sent a few at a time, and reads are
+    ranged GETs forwarded chunk by chunk. Memory use therefore stays at a
+    few chunks per transfer whatever the object size.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        access_key_id: str,
+        secret_access_key: str,
+        region: str = "us-east-1",
+        endpoint_url: Optional[str] = None,
+        prefix: str = "",
+        path_style: bool = True,
+        part_size: int = 16 * 1024 * 1024,
+        upload_concurrency: int = 4
+    ):
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.endpoint_url = (endpoint_url or f"https://s3.{region}.amazonaws.com").rstrip("/")
+        self.prefix = prefix
+        self.path_style = path_style
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.upload_concurrency = max(1, upload_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def object_url(self, key: Optional[str]) -> str:
+        """URL of an object, or of the bucket itself when ``key`` is None."""
+        path = "" if key is None else quote(self.prefix + key, safe="/")
+        if self.path_style:
+            return f"{self.endpoint_url}/{self.bucket}/{path}"
+        endpoint = urlsplit(self.endpoint_url)
+        return f"{endpoint.scheme}://{self.bucket}.{endpoint.netloc}/{path}"
+
+    def build_request(
+        self,
+        method: str,
+        key: Optional[str],
+        query: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content=None
+    ) -> httpx.Request:
+        """Build a SigV4-signed request; bodies are sent as UNSIGNED-PAYLOAD."""
+        url = self.object_url(key)
+        canonical_query = "&".join(
+            f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}"
+            for name, value in sorted((query or {}).items())
+        )
+        amz_date = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        signed = {
+            "host": urlsplit(url).netloc,
+            "x-amz-content-sha256": "UNSIGNED-PAYLOAD",
+            "x-amz-date": amz_date
+        }
+        signed_names = ";".join(sorted(signed))
+        canonical_request = "\n".join([
+            method,
+            urlsplit(url).path,
+            canonical_query,
+            "".join(f"{name}:{signed[name]}\n" for name in sorted(signed)),
+            signed_names,
+            "UNSIGNED-PAYLOAD"
+        ])
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest()
+        ])
+        signing_key = f"AWS4{self.secret_access_key}".encode()
+        for part in (amz_date[:8], self.region, "s3", "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        request_headers = {name: value for name, value in signed.items() if name != "host"}
+        request_headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={signed_names}, Signature={signature}"
+        )
+        request_headers.update(headers or {})
+        return self.client().build_request(
+            method,
+            f"{url}?{canonical_query}" if canonical_query else url,
+            headers=request_headers,
+            content=content
+        )
+
+    async def request(self, method: str, key: Optional[str], expected=(200,), **kwargs) -> httpx.Response:
+        response = await self.client().send(self.build_request(method, key, **kwargs))
+        if response.status_code not in expected:
+            raise StorageError(f"S3 {method} {key} failed with {response.status_code}: {response.text[:200]}")
+        return response
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        response = await self.request("HEAD", key, expected=(200, 404))
+        if response.status_code == 404:
+            return None
+        return StoredObject(
+            size=int(response.headers["content-length"]),
+            modified=parsedate_to_datetime(response.headers["last-modified"]).timestamp(),
+            etag=response.headers["etag"]
+        )
+
+    async def exists(self, key: str) -> bool:
+        return await self.stat(key) is not None
+
+    async def iter_range(self, key: str, offset: int, length: int) -> AsyncIterator[bytes]:
+        """Stream ``length`` bytes of an object from ``offset`` with a ranged GET."""
+        if length <= 0:
+            return
+        request = self.build_request("GET", key, headers={"range": f"bytes={offset}-{offset + length - 1}"})
+        response = await self.client().send(request, stream=True)
+        try:
+            # A 200 means the range was ignored, which is only usable from offset 0
+            if response.status_code != 206 and not (response.status_code == 200 and offset == 0):
+                await response.aread()
+                raise StorageError(f"S3 GET {key} failed with {response.status_code}: {response.text[:200]}")
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def download(self, key: str, destination: Path) -> None:
+        """Stream the whole object to a local file."""
+        info = await self.stat(key)
+        if info is None:
+            raise StorageError(f"S3 object {key} does not exist")
+        async with await anyio.open_file(destination, mode="wb") as file:
+            async with aclosing(self.iter_range(key, 0, info.size)) as chunks:
+                async for chunk in chunks:
+                    await file.write(chunk)
+
+    async def save(self, key: str, source: Path) -> None:
+        """Upload a local file under ``key``, consuming the file."""
+        size = (await anyio.to_thread.run_sync(os.stat, source)).st_size
+        # Parts grow for very large files so they stay within the part count limit
+        part_size = max(self.part_size, math.ceil(size / MAX_PARTS))
+        if size <= part_size:
+            await self.request(
+                "PUT", key,
+                headers={"content-length": str(size)},
+                content=read_file_range(source, 0, size)
+            )
+        else:
+            await self._multipart_upload(key, source, size, part_size)
+        await anyio.to_thread.run_sync(lambda: source.unlink(missing_ok=True))
+
+    async def _multipart_upload(self, key: str, source: Path, size: int, part_size: int) -> None:
+        response = await self.request("POST", key, query={"uploads": ""})
+        upload_id = find_xml_text(response.content, "UploadId")
+        if not upload_id:
+            raise StorageError(f"S3 did not start a multipart upload for {key}")
+
+        etags: Dict[int, str] = {}
+        limiter = anyio.Semaphore(self.upload_concurrency)
+
+        async def upload_part(number: int) -> None:
+            offset = (number - 1) * part_size
+            length = min(part_size, size - offset)
+            async with limiter:
+                response = await self.request(
+                    "PUT", key,
+                    query={"partNumber": str(number), "uploadId": upload_id},
+                    headers={"content-length": str(length)},
+                    content=read_file_range(source, offset, length)
+                )
+            etags[number] = response.headers["etag"]
+
+        try:
+            async with anyio.create_task_group() as task_group:
+                for number in range(1, math.ceil(size / part_size) + 1):
+                    task_group.start_soon(upload_part, number)
+
+            manifest = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etags[number]}</ETag></Part>"
+                for number in sorted(etags)
+            )
+            response = await self.request(
+                "POST", key,
+                query={"uploadId": upload_id},
+                content=f"<CompleteMultipartUpload>{manifest}</CompleteMultipartUpload>".encode()
+            )
+            # Completion can fail after the 200 status line has been sent
+            if b"<Error>" in response.content:
+                raise StorageError(f"S3 could not complete the upload of {key}: {response.text[:200]}")
+        except BaseException:
+            # Don't leave orphaned parts behind (they are billed until aborted)
+            with anyio.CancelScope(shield=True):
+                try:
+                    await self.request("DELETE", key, expected=(200, 204, 404), query={"uploadId": upload_id})
+                except (httpx.HTTPError, StorageError):
+                    pass
+            raise
+
+    async def delete(self, key: str) -> None:
+        await self.request("DELETE", key, expected=(200, 204, 404))
+
+    async def iter_keys(self, prefix: str) -> AsyncIterator[str]:
+        """Yield every key under ``prefix`` in byte order, a listing page at a time."""
+        query = {"list-type": "2", "prefix": self.prefix + prefix}
+        while True:
+            response = await self.request("GET", None, query=query)
+            document = ElementTree.fromstring(response.content)
+            for element in document.iter():
+                if element.tag.rsplit("}", 1)[-1] == "Key" and element.text:
+                    yield element.text[len(self.prefix):]
+            token = find_xml_text(response.content, "NextContinuationToken")
+            if find_xml_text(response.content, "IsTruncated") != "true" or not token:
+                return
+            query["continuation-token"] = token
+
+def find_xml_text(document: bytes, tag: str) -> Optional[str]:
+    """Text of the first element named ``tag`` in an S3 response, ignoring namespaces."""
+    for element in ElementTree.fromstring(document).iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text
+    return None
+
+def get_storage(backend: str):
+    """Create the storage driver selected by STORAGE_BACKEND."""
+    if backend == "s3":
+        return S3Storage(
+            bucket=settings.s3_bucket,  # type: ignore
+            access_key_id=settings.s3_access_key_id,  # type: ignore
+            secret_access_key=settings.s3_secret_access_key,  # type: ignore
+            region=settings.s3_region,
+            endpoint_url=settings.s3_endpoint_url,
+            prefix=settings.s3_prefix,
+            path_style=settings.s3_path_style,
+            part_size=settings.s3_part_size,
+            upload_concurrency=settings.s3_upload_concurrency
+        )
+    if backend == "local":
+        return LocalStorage()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+async def stored_file_response(
+    request: Request,
+    key: str,
+    media_type: str,
+    filename: Optional[str] = None,
+    cache_control: str = "private, no-cache",
+    vary: Optional[str] = None
+) -> Response:
+    """Serve a stored object with validators, conditional GET and single-range support."""
+    path = storage.local_path(key)
+    if path is not None:
+        return file_response(request, path, media_type, filename, cache_control, vary)
+
+    info = await storage.stat(key)
+    if info is None:
+        raise HTTPException(status_code=404, detail="File not found in storage")
+    return range_response(
+        request,
+        info.size,
+        info.modified,
+        info.etag,
+        media_type,
+        lambda offset, length, whole, status_code, headers, send_body: RangeStreamResponse(
+            lambda: storage.iter_range(key, offset, length), length, status_code, headers, media_type, send_body
+        ),
+        filename,
+        cache_control,
+        vary
+    )
+
+storage = get_storage(settings.storage_backend)
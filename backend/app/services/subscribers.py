@@ -0,0 +1,94 @@
+import csv
+import io
+from typing import BinaryIO, Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.models.database import dialect_insert
+from app.models.subscriber import Subscriber
+
+# Rows inserted per statement during a bulk import
+IMPORT_BATCH_SIZE = 5000
+
+def normalize_email(email: str) -> str:
+    """Canonical form used for the unique subscriber index."""
+    return email.strip().lower()
+
+def looks_like_email(email: str) -> bool:
+    """Cheap sanity check for imported rows (the public endpoint validates fully)."""
+    local, _, domain = email.partition("@")
+    return bool(local) and "." in domain and len(email) <= 255 and " " not in email
+
+async def subscribe(db: AsyncSession, email: str) -> None:
+    """Add or reactivate a subscriber with a single idempotent statement."""
+    stmt = dialect_insert(db, Subscriber).values(email=normalize_email(email), is_active=True)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Subscriber.email],
+        set_={"is_active": True}
+    )
+    await db.execute(stmt)
+
+class SubscriberCsv:
+    """Reads subscriber addresses from a CSV upload, one batch per call.
+
+    Uses the ``email`` column if the first row is a header, otherwise the
+    first column. Reading blocks, so callers run ``read_batch`` in a
+    worker thread.
+    """
+
+    def __init__(self, upload: BinaryIO):
+        # Starlette's SpooledTemporaryFile only gained readable() in Python 3.11,
+        # which TextIOWrapper needs; wrap the file object underneath it instead
+        raw = getattr(upload, "_file", upload)
+        self.rows = enumerate(csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")))
+        self.email_column = 0
+        self.processed = 0
+        self.invalid = 0
+
+    def read_batch(self) -> List[Dict[str, object]]:
+        """Up to IMPORT_BATCH_SIZE distinct valid rows; empty once the file is exhausted."""
+        batch: List[Dict[str, object]] = []
+        seen_in_batch = set()
+        for line_number, row in self.rows:
+            if not row:
+                continue
+            if line_number == 0:
+                header = [cell.strip().lower() for cell in row]
+                if "email" in header:
+                    self.email_column = header.index("email")
+                    continue
+
+            self.processed += 1
+            email = normalize_email(row[self.email_column]) if len(row) > self.email_column else ""
+            if not looks_like_email(email):
+                self.invalid += 1
+                continue
+            if email in seen_in_batch:
+                continue
+
+            seen_in_batch.add(email)
+            batch.append({"email": email, "is_active": True})
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                break
+        return batch
+
+async def import_csv(db: AsyncSession, upload: BinaryIO) -> Dict[str, int]:
+    """Stream subscribers from a CSV file and insert them in batches.
+
+    Existing subscribers are left untouched. Only one batch is held in
+    memory at a time, and parsing runs in the threadpool so a large file
+    doesn't hold up other requests.
+    """
+    rows = SubscriberCsv(upload)
+    # Core table insert so executemany reports a plain rowcount
+    stmt = dialect_insert(db, Subscriber.__table__).on_conflict_do_nothing(index_elements=["email"])
+
+    inserted = 0
+    while True:
+        batch = await run_in_threadpool(rows.read_batch)
+        if not batch:
+            break
+        result = await db.execute(stmt, batch)
+        await db.commit()
+        inserted += max(result.rowcount, 0)
+
+    return {"processed": rows.processed, "inserted": inserted, "invalid": rows.invalid}
@@ -0,0 +1,109 @@
+import hashlib
+import time
+from email.utils import formatdate
+from typing import Iterable, NamedTuple, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.table_version import TableVersion
+
+# Tables whose changes invalidate the validators of the read endpoints
+TRACKED_TABLES = [
+    "blog_posts",
+    "newsletters",
+    "files",
+    "file_derivatives",
+    "section_visibility",
+    "contact_messages",
+]
+
+# Tables tracked before whose triggers are dropped: newsletter deliveries are
+# written a row (or a chunk) at a time while sending, and every per-row
+# trigger serialized on the one version row
+UNTRACKED_TABLES = ["newsletter_deliveries"]
+
+SQLITE_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+
+class Validators(NamedTuple):
+    etag: str
+    # Unix seconds of the latest change to any of the tables
+    changed_at: float
+    # None while that second is still running: another change in it would not move the date
+    last_modified: Optional[str]
+
+def sqlite_triggers(table: str) -> Iterable[str]:
+    bump = (
+        f"UPDATE table_versions SET version = version + 1, changed_at = {SQLITE_NOW} "
+        f"WHERE table_name = '{table}';"
+    )
+    for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+        yield f"CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN {bump} END"
+
+def sqlite_drop_triggers(table: str) -> Iterable[str]:
+    for suffix in ("ai", "au", "ad"):
+        yield f"DROP TRIGGER IF EXISTS {table}_version_{suffix}"
+
+POSTGRES_FUNCTION = """
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE table_versions SET version = version + 1, changed_at = extract(epoch FROM clock_timestamp())
+        WHERE table_name = TG_TABLE_NAME;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+def postgres_triggers(table: str) -> Iterable[str]:
+    # Once per statement, however many rows it touches
+    yield f"DROP TRIGGER IF EXISTS {table}_version ON {table}"
+    yield (
+        f"CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+    )
+
+def postgres_drop_triggers(table: str) -> Iterable[str]:
+    yield f"DROP TRIGGER IF EXISTS {table}_version ON {table}"
+
+def install(connection: Connection) -> None:
+    """Create the version rows and the triggers that bump them (create_all adds only the table).
+
+    Also drops the triggers and rows of tables no longer tracked.
+    """
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    connection.execute(
+        insert(TableVersion).values([
+            {"table_name": table, "version": 0, "changed_at": time.time()} for table in TRACKED_TABLES
+        ]).on_conflict_do_nothing(index_elements=["table_name"])
+    )
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(POSTGRES_FUNCTION)
+        statements = [ddl for table in TRACKED_TABLES for ddl in postgres_triggers(table)]
+        statements += [ddl for table in UNTRACKED_TABLES for ddl in postgres_drop_triggers(table)]
+    else:
+        statements = [ddl for table in TRACKED_TABLES for ddl in sqlite_triggers(table)]
+        statements += [ddl for table in UNTRACKED_TABLES for ddl in sqlite_drop_triggers(table)]
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    connection.execute(delete(TableVersion).where(TableVersion.table_name.in_(UNTRACKED_TABLES)))
+
+async def validators(db: AsyncSession, tables: Iterable[str], resource: str) -> Validators:
+    """Validators for ``resource`` built from the versions of the tables it is read from.
+
+    One primary key lookup per table; no row of the tables themselves is
+    read. The ETag is strong: the same versions always produce the same
+    body.
+    """
+    tables = sorted(tables)
+    result = await db.execute(
+        select(TableVersion.table_name, TableVersion.version, TableVersion.changed_at)
+        .where(TableVersion.table_name.in_(tables))
+    )
+    rows = sorted(result.all())
+    versions = ",".join(f"{row.table_name}:{row.version}" for row in rows)
+    changed_at = max((row.changed_at for row in rows), default=0.0)
+    etag = hashlib.sha1(f"{resource}|{versions}".encode()).hexdigest()
+    last_modified = formatdate(changed_at, usegmt=True) if int(changed_at) < int(time.time()) else None
+    return Validators(f'"{etag}"', changed_at, last_modified)
@@ -0,0 +1,267 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+import anyio
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException, Request
+from app.services.storage import storage
+from app.utils.paths import shard_path
+
+# Stored uploads, and where partial uploads are written before being moved in
+UPLOAD_DIR = Path("uploads")
+INCOMING_DIR = UPLOAD_DIR / ".incoming"
+
+# Accepted content types and the extension stored files get for each
+MIME_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "application/pdf": ".pdf",
+    "text/plain": ".txt",
+    "application/msword": ".doc",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+    "video/mp4": ".mp4",
+    "video/webm": ".webm",
+}
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# ISO base media brands played as MP4 (excludes HEIF images and QuickTime)
+MP4_BRANDS = {b"isom", b"iso2", b"iso4", b"iso5", b"iso6", b"mp41", b"mp42", b"avc1", b"dash", b"M4V "}
+
+# Bytes inspected to identify a file's real type
+SNIFF_BYTES = 2048
+
+# Limit on the combined size of non-file form fields
+MAX_FIELD_BYTES = 64 * 1024
+
+# Allowance for multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+def sniff_mime_type(head: bytes, declared_type: Optional[str], filename: str) -> Optional[str]:
+    """Identify an upload from its leading bytes; None if it isn't an accepted type.
+
+    The declared type is only used to tell a .docx apart from any other ZIP.
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        return "application/msword"
+    if head[4:8] == b"ftyp":
+        return "video/mp4" if head[8:12] in MP4_BRANDS else None
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        # EBML header; only the WebM flavour of Matroska is accepted
+        return "video/webm" if b"webm" in head[:64] else None
+    if head.startswith(b"PK\x03\x04"):
+        if declared_type == DOCX_TYPE or filename.lower().endswith(".docx"):
+            return DOCX_TYPE
+        return None
+    if looks_like_text(head):
+        return "text/plain"
+    return None
+
+def looks_like_text(head: bytes) -> bool:
+    """UTF-8 without NUL bytes, and not markup a browser might render."""
+    if b"\x00" in head or head.lstrip().startswith(b"<"):
+        return False
+    # The sample may end mid-character
+    for cut in range(4):
+        try:
+            head[:len(head) - cut].decode("utf-8")
+            return True
+        except UnicodeDecodeError:
+            continue
+    return False
+
+@dataclass
+class ReceivedUpload:
+    """A file streamed to a temporary path, with what was learned on the way."""
+    temp_path: Path
+    original_filename: str
+    size: int
+    sha256: str
+    mime_type: str
+    fields: Dict[str, str] = field(default_factory=dict)
+
+class StreamingUploadParser:
+    """Multipart parser that writes the file part straight to disk.
+
+    The file is hashed, size-checked and type-sniffed as it arrives, so
+    the body is read exactly once and an oversized or disallowed upload
+    is rejected without being stored.
+    """
+
+    def __init__(self, incoming_dir: Path, max_bytes: int, file_field: str = "file"):
+        self.incoming_dir = incoming_dir
+        self.max_bytes = max_bytes
+        self.file_field = file_field
+        self.fields: Dict[str, str] = {}
+        self.field_bytes = 0
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.mime_type: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.declared_type: Optional[str] = None
+        self.temp_file: Optional[BinaryIO] = None
+        self.file_done = False
+        self._pending: List[bytes] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._part_headers: Dict[bytes, bytes] = {}
+        self._part_name = ""
+        self._part_is_file = False
+        self._part_data = b""
+
+    def on_part_begin(self) -> None:
+        self._part_headers = {}
+        self._part_data = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._part_headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._part_headers.get(b"content-disposition", b""))
+        self._part_name = options.get(b"name", b"").decode("utf-8", "replace")
+        self._part_is_file = b"filename" in options
+        if not self._part_is_file:
+            return
+        if self._part_name != self.file_field or self.temp_file is not None:
+            raise HTTPException(status_code=400, detail=f"Expected a single file in the '{self.file_field}' field")
+        self.filename = os.path.basename(options[b"filename"].decode("utf-8", "replace"))
+        content_type = self._part_headers.get(b"content-type")
+        self.declared_type = content_type.decode("latin-1").strip().lower() if content_type else None
+        self.temp_file = tempfile.NamedTemporaryFile(dir=self.incoming_dir, suffix=".part", delete=False)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        if not self._part_is_file:
+            self.field_bytes += len(chunk)
+            if self.field_bytes > MAX_FIELD_BYTES:
+                raise HTTPException(status_code=413, detail="Form fields are too large")
+            self._part_data += chunk
+            return
+
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds the {self.max_bytes} byte upload limit")
+        if self.mime_type is None and len(self.head) < SNIFF_BYTES:
+            self.head += chunk[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self._sniff()
+        self._pending.append(chunk)
+
+    def on_part_end(self) -> None:
+        if self._part_is_file:
+            if self.mime_type is None:
+                self._sniff()
+            self.file_done = True
+        else:
+            self.fields[self._part_name] = self._part_data.decode("utf-8", "replace")
+
+    def _sniff(self) -> None:
+        self.mime_type = sniff_mime_type(self.head, self.declared_type, self.filename or "")
+        if self.mime_type is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type not allowed. Allowed types: {', '.join(MIME_EXTENSIONS)}"
+            )
+
+    def _write_pending(self, chunks: List[bytes]) -> None:
+        for chunk in chunks:
+            self.hasher.update(chunk)
+            self.temp_file.write(chunk)  # type: ignore
+
+    def _finish_file(self) -> None:
+        # Temp files are created 0600; stored uploads are world-readable like before
+        os.fchmod(self.temp_file.fileno(), 0o644)  # type: ignore
+        self.temp_file.close()  # type: ignore
+
+    def discard(self) -> None:
+        if self.temp_file is not None:
+            self.temp_file.close()
+            Path(self.temp_file.name).unlink(missing_ok=True)
+
+    async def parse(self, request: Request) -> ReceivedUpload:
+        _, params = parse_options_header(request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+
+        parser = multipart.MultipartParser(boundary, {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        })
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if self._pending:
+                    pending, self._pending = self._pending, []
+                    await anyio.to_thread.run_sync(self._write_pending, pending)
+            parser.finalize()
+
+            if not self.file_done:
+                raise HTTPException(status_code=400, detail=f"No file in the '{self.file_field}' field")
+            await anyio.to_thread.run_sync(self._finish_file)
+        except BaseException:
+            self.discard()
+            raise
+
+        return ReceivedUpload(
+            temp_path=Path(self.temp_file.name),  # type: ignore
+            original_filename=self.filename or "upload",
+            size=self.size,
+            sha256=self.hasher.hexdigest(),
+            mime_type=self.mime_type,  # type: ignore
+            fields=self.fields
+        )
+
+async def receive_upload(request: Request, incoming_dir: Path, max_bytes: int) -> ReceivedUpload:
+    """Stream a multipart upload to ``incoming_dir`` in a single pass."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {max_bytes} byte upload limit")
+    return await StreamingUploadParser(incoming_dir, max_bytes).parse(request)
+
+async def store_content_addressed(upload: ReceivedUpload, upload_dir: Path) -> Tuple[str, str, bool]:
+    """Move a received upload into storage under its content-addressed, sharded key.
+
+    Returns (filename, key, reused); when identical bytes are already
+    stored the temporary file is dropped and the existing copy is reused,
+    so a duplicate upload costs no space and no write.
+    """
+    filename = f"{upload.sha256}{MIME_EXTENSIONS[upload.mime_type]}"
+    key = str(shard_path(upload_dir, filename))
+    # Files stored before sharding stay in the top level until shard_uploads.py moves them
+    for existing in (key, str(upload_dir / filename)):
+        if await storage.exists(existing):
+            await anyio.to_thread.run_sync(lambda: upload.temp_path.unlink(missing_ok=True))
+            return filename, existing, True
+    await storage.save(key, upload.temp_path)
+    return filename, key, False
@@ -0,0 +1,31 @@
+# Fallbacks for async helpers the standard library gained in Python 3.10;
+# the backend still supports 3.9
+
+try:
+    from contextlib import aclosing
+except ImportError:  # Python 3.9
+    class aclosing:
+        """Async context manager that closes an async generator on exit (contextlib.aclosing)."""
+
+        def __init__(self, thing):
+            self.thing = thing
+
+        async def __aenter__(self):
+            return self.thing
+
+        async def __aexit__(self, *exc_info):
+            await self.thing.aclose()
+
+try:
+    anext = anext
+except NameError:  # Python 3.9
+    _MISSING = object()
+
+    async def anext(iterator, default=_MISSING):
+        """The next item of an async iterator, or ``default`` once it is exhausted (builtin anext)."""
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            if default is _MISSING:
+                raise
+            return default
@@ -0,0 +1,261 @@
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Callable, Optional, Tuple
+from urllib.parse import quote
+import anyio
+from fastapi import HTTPException, Request, Response, status
+from starlette.types import Receive, Scope, Send
+from app.utils.compat import aclosing
+from app.utils.http import etag_matches, not_modified
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    """Build a Content-Disposition header, RFC 5987-encoding non-ASCII names."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive (start, end) offsets.
+
+    Returns None when the header should be ignored (unsupported unit or
+    multiple ranges) and raises ValueError when it is unsatisfiable.
+    """
+    match = RANGE_PATTERN.match(header.replace(" ", ""))
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+def not_modified_since(request: Request, mtime: float) -> bool:
+    """Evaluate If-Modified-Since (only consulted without If-None-Match)."""
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(mtime) <= since
+
+class RangeStreamResponse(Response):
+    """Sends ``length`` bytes produced by an async iterator of chunks.
+
+    The server applies backpressure between chunks and the iterator is
+    abandoned as soon as the client leaves, so only one chunk is held in
+    memory however large the body is.
+    """
+
+    def __init__(
+        self,
+        chunks: Callable[[], AsyncIterator[bytes]],
+        length: int,
+        status_code: int,
+        headers: dict,
+        media_type: str,
+        send_body: bool = True
+    ):
+        self.chunks = chunks
+        self.length = length
+        self.send_body = send_body
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        await self.send_content(scope, receive, send)
+
+    async def send_content(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async with anyio.create_task_group() as task_group:
+            async def stream_then_cancel() -> None:
+                await self._stream_chunks(send)
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(stream_then_cancel)
+            await self._wait_for_disconnect(receive)
+            task_group.cancel_scope.cancel()
+
+    async def _stream_chunks(self, send: Send) -> None:
+        remaining = self.length
+        async with aclosing(self.chunks()) as chunks:
+            async for chunk in chunks:
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining <= 0:
+                    break
+        if remaining > 0:
+            # Source shrank underneath us; end the body rather than hang
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _wait_for_disconnect(self, receive: Receive) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+
+class RangeFileResponse(RangeStreamResponse):
+    """Sends ``length`` bytes of a file starting at ``offset``.
+
+    Uses the ASGI zero-copy extensions when the server advertises them
+    (``http.response.zerocopysend`` for any range, ``http.response.pathsend``
+    for whole files) so the bytes never pass through Python. Otherwise the
+    file is read in a worker thread chunk by chunk.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        length: int,
+        whole_file: bool,
+        status_code: int,
+        headers: dict,
+        media_type: str,
+        send_body: bool = True
+    ):
+        self.path = path
+        self.offset = offset
+        self.whole_file = whole_file
+        super().__init__(self._read_chunks, length, status_code, headers, media_type, send_body)
+
+    async def send_content(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False
+                })
+            return
+        if self.whole_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+        await super().send_content(scope, receive, send)
+
+    async def _read_chunks(self) -> AsyncIterator[bytes]:
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+def range_response(
+    request: Request,
+    size: int,
+    mtime: float,
+    etag: str,
+    media_type: str,
+    body: Callable[[int, int, bool, int, dict, bool], Response],
+    filename: Optional[str] = None,
+    cache_control: str = "private, no-cache",
+    vary: Optional[str] = None
+) -> Response:
+    """Apply validators, conditional GET and single-range handling to a stored object.
+
+    ``body(offset, length, whole, status_code, headers, send_body)`` builds
+    the response that actually sends the selected bytes.
+    """
+    last_modified = formatdate(mtime, usegmt=True)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control
+    }
+    if vary:
+        headers["Vary"] = vary
+
+    if request.headers.get("if-none-match") is not None:
+        if etag_matches(request, etag):
+            return not_modified(headers)
+    elif not_modified_since(request, mtime):
+        return not_modified(headers)
+
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range needs a strong match; otherwise the whole (changed) file is sent
+    if range_header and request.method == "GET" and (if_range is None or if_range in (etag, last_modified)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+
+    send_body = request.method != "HEAD"
+    if byte_range is None:
+        return body(0, size, True, status.HTTP_200_OK, headers, send_body)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return body(
+        start, end - start + 1, start == 0 and end == size - 1,
+        status.HTTP_206_PARTIAL_CONTENT, headers, send_body
+    )
+
+def file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: Optional[str] = None,
+    cache_control: str = "private, no-cache",
+    vary: Optional[str] = None
+) -> Response:
+    """Serve a file with validators, conditional GET and single-range support."""
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found on disk")
+
+    size = stat_result.st_size
+    return range_response(
+        request,
+        size,
+        stat_result.st_mtime,
+        f'"{stat_result.st_mtime_ns:x}-{size:x}"',
+        media_type,
+        lambda offset, length, whole, status_code, headers, send_body: RangeFileResponse(
+            path, offset, length, whole, status_code, headers, media_type, send_body
+        ),
+        filename,
+        cache_control,
+        vary
+    )
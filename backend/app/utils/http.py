@@ -0,0 +1,16 @@
+from fastapi import Request, Response, status
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header matches an ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+def not_modified(headers: dict) -> Response:
+    """Build an empty 304 response carrying the given validator headers."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,98 @@
+import os
+from pathlib import Path
+from typing import Dict, List, Sequence
+from PIL import Image, ImageOps
+from app.utils.paths import shard_path
+
+# Encoder name, MIME type, file extension and save options per output format
+OUTPUT_FORMATS = {
+    "avif": ("AVIF", "image/avif", ".avif", {"quality": 60}),
+    "webp": ("WEBP", "image/webp", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("PNG", "image/png", ".png", {"optimize": True}),
+}
+
+# EXIF orientations that rotate the image by 90 degrees
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+def supported_formats(formats: Sequence[str]) -> List[str]:
+    """Filter formats down to those this Pillow build can encode."""
+    Image.init()
+    return [name for name in formats if name in OUTPUT_FORMATS and OUTPUT_FORMATS[name][0] in Image.SAVE]
+
+def plan_widths(source_width: int, widths: Sequence[int]) -> List[int]:
+    """Target widths for an image, largest first.
+
+    Never upscales; the source width itself is included only when it is
+    within the configured range, so huge originals aren't re-encoded whole.
+    """
+    planned = {width for width in widths if width < source_width}
+    if not widths or source_width <= max(widths):
+        planned.add(source_width)
+    return sorted(planned, reverse=True)
+
+def derivative_path(output_dir: Path, key: str, width: int, format_name: str) -> Path:
+    return shard_path(output_dir, f"{key}-{width}{OUTPUT_FORMATS[format_name][2]}")
+
+def generate_derivatives(
+    source_path: str,
+    output_dir: str,
+    key: str,
+    widths: Sequence[int],
+    formats: Sequence[str]
+) -> List[Dict[str, object]]:
+    """Write resized variants of an image and describe each one.
+
+    Runs in a worker process. Outputs are named by ``key`` (the content
+    hash), width and format, so variants that already exist are reused
+    without decoding the source again; this makes the call idempotent.
+    Besides ``formats`` at every width, each smaller width also gets a
+    JPEG or PNG fallback for clients that accept neither.
+    """
+    output = Path(output_dir)
+    with Image.open(source_path) as source:
+        if getattr(source, "is_animated", False):
+            # Resizing would drop the animation; keep serving the original
+            return []
+
+        width, height = source.size
+        if source.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        fallback = "jpeg" if source.format == "JPEG" else "png"
+
+        image = None
+        results = []
+        for target_width in plan_widths(width, widths):
+            target_height = max(1, round(height * target_width / width))
+            names = list(formats)
+            if target_width < width:
+                names.append(fallback)
+            paths = {name: derivative_path(output, key, target_width, name) for name in names}
+
+            missing = [name for name, path in paths.items() if not path.exists()]
+            if missing:
+                if image is None:
+                    image = ImageOps.exif_transpose(source)
+                    if image.mode not in ("RGB", "RGBA"):
+                        has_alpha = "transparency" in image.info or image.mode in ("LA", "PA")
+                        image = image.convert("RGBA" if has_alpha else "RGB")
+                # Widths go largest first, so each resize starts from the previous one
+                if image.width != target_width:
+                    image = image.resize((target_width, target_height), Image.LANCZOS, reducing_gap=3.0)
+                paths[missing[0]].parent.mkdir(parents=True, exist_ok=True)
+                for name in missing:
+                    encoder, _, _, options = OUTPUT_FORMATS[name]
+                    encoded = image.convert("RGB") if encoder == "JPEG" and image.mode != "RGB" else image
+                    temp_path = paths[name].with_name(f".{paths[name].name}.{os.getpid()}.tmp")
+                    encoded.save(temp_path, encoder, **options)
+                    os.replace(temp_path, paths[name])
+
+            for name, path in paths.items():
+                results.append({
+                    "width": target_width,
+                    "height": target_height,
+                    "mime_type": OUTPUT_FORMATS[name][1],
+                    "file_path": str(path),
+                    "file_size": path.stat().st_size
+                })
+        return results
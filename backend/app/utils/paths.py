@@ -0,0 +1,16 @@
+from pathlib import Path
+
+# Stored files are spread over two levels of two-character prefix
+# directories (uploads/ab/cd/abcd...), so no directory grows past a few
+# entries per 65,536 files stored
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+def shard_path(root: Path, filename: str) -> Path:
+    """Sharded location of a stored file, keyed by its (hash or uuid) name."""
+    prefixes = [filename[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH] for level in range(SHARD_LEVELS)]
+    return root.joinpath(*prefixes, filename)
+
+def is_sharded(root: Path, path: Path) -> bool:
+    """Whether ``path`` is already at the sharded location for its name."""
+    return path == shard_path(root, path.name)
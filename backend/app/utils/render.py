@@ -0,0 +1,45 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+import markdown
+import nh3
+
+# Bump whenever rendering output changes; rerender_posts.py re-renders stale posts
+RENDERER_VERSION = 1
+
+MARKDOWN_EXTENSIONS = ["extra", "sane_lists"]
+
+def render_markdown(content: str) -> str:
+    """Render Markdown to sanitized HTML."""
+    html = markdown.markdown(content, extensions=MARKDOWN_EXTENSIONS, output_format="html")
+    return nh3.clean(html)
+
+def rendered_post_hash(
+    title: str,
+    excerpt: Optional[str],
+    featured_image: Optional[str],
+    content_html: str,
+    published_at: Optional[datetime]
+) -> str:
+    """Hash everything a reader sees for a post; used as its strong ETag."""
+    payload = json.dumps([
+        RENDERER_VERSION,
+        title,
+        excerpt,
+        featured_image,
+        content_html,
+        published_at.isoformat() if published_at else None
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def render_post(
+    title: str,
+    excerpt: Optional[str],
+    featured_image: Optional[str],
+    content: str,
+    published_at: Optional[datetime]
+) -> Tuple[str, str]:
+    """Render a post's content and return (content_html, content_hash)."""
+    content_html = render_markdown(content)
+    return content_html, rendered_post_hash(title, excerpt, featured_image, content_html, published_at)
@@ -0,0 +1,63 @@
+import json
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+def response_fields(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    """Field names of a response schema, in the order it serializes them."""
+    return tuple(schema.model_fields)
+
+def response_columns(model, schema: Type[BaseModel]) -> tuple:
+    """The model's table column for each field of a response schema, in the schema's order.
+
+    Table columns rather than mapped attributes: a select of them runs as
+    a plain Core statement, without the ORM's per-row loading.
+    """
+    return tuple(model.__table__.c[name] for name in response_fields(schema))
+
+def row_dicts(rows: Sequence[Row], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """Column rows as dicts keyed by ``fields``.
+
+    Rows selected with exactly ``fields`` (see ``response_columns``) are
+    zipped as they are; rows carrying other columns too are picked by
+    position.
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    if tuple(keys) == tuple(fields):
+        return [dict(zip(fields, row)) for row in rows]
+    pick = itemgetter(*[keys.index(field) for field in fields])
+    return [dict(zip(fields, pick(row))) for row in rows]
+
+def dumps(content: Any) -> bytes:
+    """JSON-encode plain content (dicts, lists, datetimes) the way FastAPI's response encoding does."""
+    if orjson is not None:
+        # UTC as "Z", as Pydantic writes it
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(
+        content, default=jsonable_encoder, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+def json_response(content: Any, response: Optional[Response] = None) -> Response:
+    """Encode content that already has the route's response model shape, skipping its validation.
+
+    FastAPI validates whatever an endpoint returns against the response
+    model before encoding it; a returned Response goes out as it is. Build
+    ``content`` from the schema's own fields (``response_columns`` and
+    ``row_dicts``) so the body matches the documented schema. Headers
+    dependencies set on ``response`` (validators, rate limits) are carried
+    over, since FastAPI only merges them into responses it builds itself.
+    """
+    encoded = Response(content=dumps(content), media_type="application/json")
+    if response is not None:
+        encoded.raw_headers.extend(response.raw_headers)
+    return encoded
@@ -0,0 +1,34 @@
+from pathlib import Path
+import anyio
+from starlette.datastructures import URL
+from starlette.exceptions import HTTPException
+from starlette.responses import RedirectResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+from app.utils.paths import is_sharded, shard_path
+
+class ShardedStaticFiles(StaticFiles):
+    """Static files that redirect flat paths to their sharded location.
+
+    Files stored before sharding were linked as /uploads/<name> (or
+    /uploads/derivatives/<name>) from posts, newsletters and elsewhere;
+    once shard_uploads.py has moved them, those URLs redirect to
+    /uploads/ab/cd/<name> instead of returning 404.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as exc:
+            flat = Path(path)
+            if exc.status_code != 404 or is_sharded(flat.parent, flat):
+                raise
+            sharded = shard_path(flat.parent, flat.name)
+            _, stat_result = await anyio.to_thread.run_sync(self.lookup_path, str(sharded))
+            if stat_result is None:
+                raise
+            mount_path = scope.get("root_path", "")
+            return RedirectResponse(
+                url=URL(scope=scope).replace(path=f"{mount_path}/{sharded.as_posix()}"),
+                status_code=301
+            )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bulk write endpoints across batch sizes.
+For each size in BENCH_BATCH_SIZES, calls the sections bulk update, the
+contact message bulk mark-read/archive/delete and the files bulk delete
+endpoints against a throwaway SQLite database, counting the SQL statements
+each call issues and timing it. The statement count must not grow with the
+batch size.
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+SIZES = [int(size) for size in os.getenv("BENCH_BATCH_SIZES", "1,10,100,1000").split(",")]
+
+workdir = Path(tempfile.mkdtemp())
+os.chdir(workdir)
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+from sqlalchemy import event, insert  # noqa: E402
+from app.api import contact, files, sections  # noqa: E402
+from app.models.contact import ContactMessage  # noqa: E402
+from app.models.database import AsyncSessionLocal, Base, async_engine, engine  # noqa: E402
+from app.models.file import File, FileDerivative  # noqa: E402
+from app.schemas.contact import ContactMessageArchiveRequest, ContactMessageBulkRequest  # noqa: E402
+from app.schemas.file import FileBulkDeleteRequest  # noqa: E402
+from app.schemas.sections import SectionVisibilityUpdate  # noqa: E402
+from app.services import contact_inbox  # noqa: E402
+from app.services.principal_cache import AdminPrincipal  # noqa: E402
+
+ADMIN = AdminPrincipal(
+    id="bench-admin", username="bench", email="bench@example.com",
+    is_active=True, created_at=datetime.now(timezone.utc)
+)
+
+statements = 0
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(*args):
+    global statements
+    statements += 1
+
+def populate(size):
+    """Add `size` unread messages and `size` files (each with one variant) for this round."""
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as connection:
+        connection.execute(insert(ContactMessage), [
+            {
+                "id": f"{size}-{index:06d}", "name": "Sender", "email": "sender@example.com",
+                "subject": f"Message {index}", "message": "Hello there",
+                "created_at": start + timedelta(seconds=index), "is_read": False
+            }
+            for index in range(size)
+        ])
+        connection.execute(insert(File), [
+            {
+                "id": size * 10000 + index, "filename": f"{index}.jpg", "original_filename": f"{index}.jpg",
+                "file_path": f"{size}/{index}.jpg", "file_size": 1, "mime_type": "image/jpeg"
+            }
+            for index in range(size)
+        ])
+        connection.execute(insert(FileDerivative), [
+            {
+                "file_id": size * 10000 + index, "width": 320, "height": 240, "mime_type": "image/webp",
+                "file_path": f"{size}/{index}-320.webp", "file_size": 1
+            }
+            for index in range(size)
+        ])
+
+async def measure(call):
+    """Run one endpoint call in its own session; returns (statements, seconds, affected)."""
+    global statements
+    async with AsyncSessionLocal() as db:
+        statements = 0
+        start = time.perf_counter()
+        result = await call(db)
+        elapsed = time.perf_counter() - start
+    affected = getattr(result, "affected", None)
+    if affected is None and hasattr(result, "sections"):
+        affected = len(result.sections)
+    return statements, elapsed, affected
+
+async def run_batch(size):
+    message_ids = [f"{size}-{index:06d}" for index in range(size)]
+    file_ids = [size * 10000 + index for index in range(size)]
+    names = [f"section-{index}" for index in range(size)]
+    return [
+        ("sections bulk", await measure(lambda db: sections.update_multiple_sections(
+            [SectionVisibilityUpdate(is_visible=index % 2 == 0) for index in range(size)], names,
+            db=db, current_user=ADMIN
+        ))),
+        ("messages mark-read", await measure(lambda db: contact.mark_multiple_messages_as_read(
+            message_ids, db=db, current_user=ADMIN
+        ))),
+        ("messages archive", await measure(lambda db: contact.archive_multiple_messages(
+            ContactMessageArchiveRequest(ids=message_ids), db=db, current_user=ADMIN
+        ))),
+        ("messages delete", await measure(lambda db: contact.delete_multiple_messages(
+            ContactMessageBulkRequest(ids=message_ids), db=db, current_user=ADMIN
+        ))),
+        ("files delete", await measure(lambda db: files.delete_multiple_files(
+            FileBulkDeleteRequest(ids=file_ids), db=db, current_admin=ADMIN
+        ))),
+    ]
+
+def main():
+    """Run the benchmark."""
+    try:
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            contact_inbox.install(connection)
+        counts = {}
+        print(f"{'operation':<20}  {'batch':>6}  {'statements':>10}  {'affected':>8}  {'time':>10}")
+        for size in SIZES:
+            populate(size)
+            for name, (issued, elapsed, affected) in asyncio.run(run_batch(size)):
+                counts.setdefault(name, set()).add(issued)
+                print(f"{name:<20}  {size:>6,}  {issued:>10}  {affected if affected is not None else '-':>8}  {elapsed * 1000:>7.2f} ms")
+        growing = [name for name, issued in counts.items() if len(issued) > 1]
+        if growing:
+            print(f"❌ Statement count grows with the batch size: {', '.join(growing)}")
+            sys.exit(1)
+        print("✅ Statement count is the same for every batch size")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
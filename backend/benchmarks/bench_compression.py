@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression per route and encoding.
+Creates BENCH_POSTS published posts and as many contact messages in a
+throwaway SQLite database, then requests the public and admin post lists,
+one public post and the contact inbox (all with strong ETags, so their
+compressed bodies are cached) BENCH_REQUESTS times each with every encoding
+this install can produce. Reports per route the bytes before and after,
+bytes saved and CPU milliseconds per compressed response, and how much
+faster a cached response is than compressing it. Then compresses each
+route's body BENCH_REQUESTS times at the level used per request (for
+bodies without a strong ETag). Fails when that runs slower than
+BENCH_MIN_MB_PER_SECOND of input per CPU second for any route, or when a
+text file download (served in ranges) is compressed.
+"""
+
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+POSTS = int(os.getenv("BENCH_POSTS", "100"))
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "50"))
+MIN_MB_PER_SECOND = float(os.getenv("BENCH_MIN_MB_PER_SECOND", "20"))
+
+workdir = Path(tempfile.mkdtemp())
+os.chdir(workdir)
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["COMPRESSION_ENABLED"] = "true"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.middleware.compression import CODECS, compressed_cache, compression_stats, timed_compress  # noqa: E402
+from init_admin import create_admin_user  # noqa: E402
+import main as app_main  # noqa: E402
+
+WORDS = [
+    "latency", "throughput", "cache", "index", "query", "request", "render", "python", "sqlite", "async",
+    "the", "a", "of", "to", "and", "in", "is", "it", "for", "on", "with", "that", "this", "we", "was"
+]
+
+def paragraph(rng):
+    words = rng.choices(WORDS, k=rng.randint(40, 80)) + [f"term{rng.randrange(100000)}" for _ in range(5)]
+    rng.shuffle(words)
+    return " ".join(words).capitalize() + "."
+
+def seed(client, headers):
+    """Create the posts, contact messages and text file; returns a post slug and the file id."""
+    rng = random.Random(7)
+    slug = None
+    for index in range(POSTS):
+        post = client.post("/api/blog/posts", headers=headers, json={
+            "title": f"Post number {index}",
+            "content": "\n\n".join(paragraph(rng) for _ in range(8)),
+            "excerpt": paragraph(rng),
+            "status": "published"
+        }).json()
+        slug = slug or post["slug"]
+        client.post("/api/contact/submit", json={
+            "name": f"Sender {index}", "email": f"sender{index}@example.com",
+            "subject": f"Question {index}", "message": paragraph(rng)
+        })
+    text = "\n".join(paragraph(rng) for _ in range(2000)).encode()
+    upload = client.post("/api/files/upload", headers=headers, files={"file": ("notes.txt", text, "text/plain")}).json()
+    return slug, upload["id"]
+
+def timed_requests(client, path, headers):
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, (path, response.status_code)
+    return latencies
+
+def main():
+    """Run the benchmark."""
+    try:
+        create_admin_user("bench", "bench@example.com", "bench-password")
+        with TestClient(app_main.app) as client:
+            token = client.post("/api/auth/login", json={"username": "bench", "password": "bench-password"}).json()["access_token"]
+            admin = {"Authorization": f"Bearer {token}"}
+            slug, file_id = seed(client, admin)
+            routes = [
+                ("/api/blog/public/posts?limit=100", {}),
+                ("/api/blog/posts?limit=100", admin),
+                (f"/api/blog/public/posts/{slug}", {}),
+                ("/api/contact/messages?limit=100", admin),
+            ]
+
+            slowest = None
+            print(f"{POSTS} posts, {REQUESTS} requests per route and encoding")
+            print(f"{'encoding':<9}{'route':<40}{'bytes in':>11}{'bytes out':>11}{'saved':>8}{'cpu ms':>9}{'cached':>8}")
+            for codec in CODECS:
+                compression_stats.clear()
+                compressed_cache.clear()
+                for path, headers in routes:
+                    timed_requests(client, path, {**headers, "Accept-Encoding": codec.name})
+                for route, totals in compression_stats.report().items():
+                    if not totals["compressed"] or not route.startswith("GET "):
+                        continue
+                    per_response = totals["bytes_in"] / totals["responses"]
+                    print(
+                        f"{codec.name:<9}{route:<40}{per_response:>11,.0f}"
+                        f"{totals['bytes_out'] / totals['responses']:>11,.0f}"
+                        f"{totals['bytes_saved'] / totals['bytes_in']:>8.1%}"
+                        f"{totals['cpu_ms_per_response']:>9.3f}{totals['cache_hits']:>8}"
+                    )
+
+            # Compressing per request, as for bodies without a strong ETag
+            for path, headers in routes:
+                body = client.get(path, headers={**headers, "Accept-Encoding": "identity"}).content
+                for codec in CODECS:
+                    cpu_seconds = sum(timed_compress(codec, body, codec.level)[1] for _ in range(REQUESTS))
+                    speed = len(body) * REQUESTS / cpu_seconds / 2**20
+                    if slowest is None or speed < slowest[0]:
+                        slowest = (speed, codec.name, path.split("?")[0])
+
+            # The cached post against the same post compressed on every request
+            post = f"/api/blog/public/posts/{slug}"
+            accept = {"Accept-Encoding": CODECS[0].name}
+            compressed_cache.clear()
+            cached = statistics.median(timed_requests(client, post, accept))
+            uncached = []
+            for _ in range(REQUESTS):
+                compressed_cache.clear()
+                start = time.perf_counter()
+                client.get(post, headers=accept)
+                uncached.append((time.perf_counter() - start) * 1000)
+            identity = statistics.median(timed_requests(client, post, {"Accept-Encoding": "identity"}))
+            print(
+                f"public post ({CODECS[0].name}): cached {cached:.2f} ms, compressed per request "
+                f"{statistics.median(uncached):.2f} ms, uncompressed {identity:.2f} ms (median)"
+            )
+
+            # Resuming a download with If-Range needs the same bytes as the 206s
+            download = client.get(f"/api/files/files/{file_id}/download", headers={**admin, **accept})
+            ranged_encoding = download.headers.get("content-encoding")
+
+        speed, name, route = slowest
+        print(f"slowest per request: {name} on {route} at {speed:.1f} MB per CPU second")
+        if ranged_encoding:
+            print(f"❌ The text file download, served in ranges, was compressed with {ranged_encoding}")
+            sys.exit(1)
+        if speed < MIN_MB_PER_SECOND:
+            print(f"❌ Compression runs below {MIN_MB_PER_SECOND:g} MB per CPU second")
+            sys.exit(1)
+        print(f"✅ Compression keeps above {MIN_MB_PER_SECOND:g} MB per CPU second on every route")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
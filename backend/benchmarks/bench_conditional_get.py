@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark conditional GET on the read endpoints.
+Creates BENCH_ROWS posts, contact messages and newsletters in a throwaway
+SQLite database, then for every route with table-version validators times
+BENCH_REQUESTS full responses against BENCH_REQUESTS revalidations with
+the ETag from the first one, counting the SQL statements each issues.
+Reports per route the statements and bytes a revalidation avoids, and the
+time saved. Fails when a revalidation is not answered 304, or issues more
+than the single version lookup.
+"""
+
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+ROWS = int(os.getenv("BENCH_ROWS", "100"))
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "100"))
+
+workdir = Path(tempfile.mkdtemp())
+os.chdir(workdir)
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["CONTACT_DUPLICATE_MAX_ENTRIES"] = "0"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from app.models.database import async_engine  # noqa: E402
+from init_admin import create_admin_user  # noqa: E402
+import main as app_main  # noqa: E402
+
+statements = 0
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(*args):
+    global statements
+    statements += 1
+
+def seed(client, headers):
+    """Create the rows (and a file per ten rows); returns a post id, message id and newsletter id."""
+    text = "Measuring revalidation against full responses on the admin and public read routes. " * 20
+    for index in range(ROWS):
+        post = client.post("/api/blog/posts", headers=headers, json={
+            "title": f"Post {index}", "content": text, "excerpt": text[:200], "status": "published"
+        }).json()
+        message = client.post("/api/contact/submit", json={
+            "name": f"Sender {index}", "email": f"sender{index}@example.com",
+            "subject": f"Question {index}", "message": text
+        }).json()
+        newsletter = client.post("/api/newsletter/newsletters", headers=headers, json={
+            "subject": f"Issue {index}", "content": text
+        }).json()
+        if index % 10 == 0:
+            client.post("/api/files/upload", headers=headers, files={"file": (f"notes{index}.txt", text.encode(), "text/plain")})
+    return post["id"], message["id"], newsletter["id"]
+
+def measure(client, path, headers):
+    """(statements, bytes, median ms) per request, for full responses and for revalidations."""
+    global statements
+    results = []
+    # The first call may write (the sections route creates missing defaults), moving the versions
+    client.get(path, headers=headers)
+    etag = client.get(path, headers=headers).headers["etag"]
+    for request_headers, expected in ((headers, 200), ({**headers, "If-None-Match": etag}, 304)):
+        latencies = []
+        size = 0
+        statements = 0
+        for _ in range(REQUESTS):
+            start = time.perf_counter()
+            response = client.get(path, headers=request_headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != expected:
+                raise AssertionError(f"{path} answered {response.status_code}, expected {expected}")
+            size += len(response.content)
+        results.append((statements / REQUESTS, size / REQUESTS, statistics.median(latencies)))
+    return results
+
+def main():
+    """Run the benchmark."""
+    try:
+        create_admin_user("bench", "bench@example.com", "bench-password")
+        with TestClient(app_main.app) as client:
+            token = client.post("/api/auth/login", json={"username": "bench", "password": "bench-password"}).json()["access_token"]
+            admin = {"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"}
+            public = {"Accept-Encoding": "identity"}
+            post_id, message_id, newsletter_id = seed(client, admin)
+            routes = [
+                ("/api/blog/posts", admin),
+                (f"/api/blog/posts/{post_id}", admin),
+                ("/api/blog/public/posts?limit=100", public),
+                ("/api/blog/public/search?q=revalidation", public),
+                ("/api/newsletter/newsletters", admin),
+                (f"/api/newsletter/newsletters/{newsletter_id}", admin),
+                ("/api/files/files", admin),
+                ("/api/sections/visibility/admin", admin),
+                ("/api/contact/messages?limit=100", admin),
+                (f"/api/contact/messages/{message_id}", admin),
+            ]
+
+            print(f"{ROWS} rows per table, {REQUESTS} requests each (statements and bytes per request, median ms)")
+            print(f"{'route':<48}{'full':>7}{'304':>6}{'avoided':>9}{'bytes':>10}{'full ms':>9}{'304 ms':>8}")
+            failures = []
+            for path, headers in routes:
+                try:
+                    (full_sql, full_bytes, full_ms), (revalidated_sql, _, revalidated_ms) = measure(client, path, headers)
+                except AssertionError as error:
+                    failures.append(str(error))
+                    continue
+                label = path.split("?")[0].replace(post_id, "{id}").replace(message_id, "{id}").replace(newsletter_id, "{id}")
+                print(
+                    f"{label:<48}{full_sql:>7.1f}{revalidated_sql:>6.1f}{full_sql - revalidated_sql:>9.1f}"
+                    f"{full_bytes:>10,.0f}{full_ms:>9.2f}{revalidated_ms:>8.2f}"
+                )
+                # Background workers' polling can land inside a request now and then
+                if revalidated_sql > 1.5:
+                    failures.append(f"{label} revalidation issued {revalidated_sql:.1f} statements")
+
+        if failures:
+            for failure in failures:
+                print(f"❌ {failure}")
+            sys.exit(1)
+        print("✅ Every revalidation was answered 304 from the version lookup alone")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
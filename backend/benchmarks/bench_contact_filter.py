@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark the contact duplicate filter.
+Streams BENCH_SUBMISSIONS generated contact submissions through fingerprint
+plus window check, with the window capped at BENCH_WINDOW_ENTRIES: mostly
+new messages, plus resubmissions of recent ones by the same sender and
+copies with a few words changed sent by other senders. Reports throughput,
+how many duplicates were caught, new messages wrongly rejected, and the
+window's memory. Fails below BENCH_TARGET_PER_SECOND submissions/sec.
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+SUBMISSIONS = int(os.getenv("BENCH_SUBMISSIONS", "100000"))
+WINDOW_ENTRIES = int(os.getenv("BENCH_WINDOW_ENTRIES", "10000"))
+TARGET = float(os.getenv("BENCH_TARGET_PER_SECOND", "10000"))
+# Share of resubmissions and of edited copies among the submissions
+RESUBMIT_SHARE = 0.1
+EDITED_SHARE = 0.1
+
+from app.services.contact_filter import DuplicateWindow, fingerprint  # noqa: E402
+
+def generate(count):
+    """(kind, email, subject, message, client) tuples; words follow a Zipf-like distribution."""
+    rng = random.Random(7)
+    vocabulary = [f"word{rank}" for rank in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    submissions = []
+    for index in range(count):
+        roll = rng.random()
+        if submissions and roll < RESUBMIT_SHARE:
+            _, email, subject, message, client = submissions[rng.randrange(max(0, len(submissions) - 500), len(submissions))]
+            submissions.append(("resubmitted", email, subject, message, client))
+        elif submissions and roll < RESUBMIT_SHARE + EDITED_SHARE:
+            _, _, subject, message, _ = submissions[rng.randrange(max(0, len(submissions) - 500), len(submissions))]
+            words = message.split()
+            for _ in range(max(1, len(words) // 20)):
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+            submissions.append(("edited", f"bot{index}@example.com", subject, " ".join(words), f"10.0.{index % 256}.1"))
+        else:
+            message = " ".join(rng.choices(vocabulary, weights, k=rng.randint(20, 120))) + "."
+            subject = " ".join(rng.choices(vocabulary, weights, k=4))
+            submissions.append(("new", f"sender{index}@example.com", subject, message, f"192.0.2.{index % 256}"))
+    return submissions
+
+def main():
+    """Run the benchmark."""
+    submissions = generate(SUBMISSIONS)
+    window = DuplicateWindow(max_entries=WINDOW_ENTRIES, ttl=3600, threshold=0.8)
+
+    outcomes = {}
+    start = time.perf_counter()
+    for index, (kind, email, subject, message, client) in enumerate(submissions):
+        match = window.check(fingerprint(email, subject, message, client), str(index))
+        outcome = "accepted" if match is None else "exact" if match.exact else "similar"
+        outcomes[kind, outcome] = outcomes.get((kind, outcome), 0) + 1
+    elapsed = time.perf_counter() - start
+    rate = len(submissions) / elapsed
+
+    print(f"{len(submissions):,} submissions in {elapsed:.2f} s: {rate:,.0f}/s ({elapsed / len(submissions) * 1e6:.1f} µs each)")
+    for kind in ("new", "resubmitted", "edited"):
+        counts = {outcome: outcomes.get((kind, outcome), 0) for outcome in ("accepted", "exact", "similar")}
+        total = sum(counts.values())
+        print(f"  {kind:<12} {total:>8,}: " + ", ".join(f"{outcome} {count / total:.1%}" for outcome, count in counts.items()))
+
+    tracemalloc.start()
+    window = DuplicateWindow(max_entries=WINDOW_ENTRIES, ttl=3600, threshold=0.8)
+    fingerprints = [fingerprint(*submission[1:]) for submission in submissions[:WINDOW_ENTRIES * 2]]
+    before = tracemalloc.get_traced_memory()[0]
+    for index, print_ in enumerate(fingerprints):
+        window.check(print_, str(index))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"window memory: {used / 2**20:.1f} MiB for {window.stats()['entries']:,} entries")
+
+    if rate < TARGET:
+        print(f"❌ {rate:,.0f} submissions/sec is below the {TARGET:,.0f}/sec target")
+        sys.exit(1)
+    print(f"✅ Filters over {TARGET:,.0f} submissions/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the contact inbox listing as the inbox grows.
+For each size in BENCH_INBOX_SIZES, fills a throwaway SQLite database with
+that many messages and times the first page and a page a tenth of the way
+down, both with the single keyset query plus maintained counters and with
+the previous offset page plus two count() queries.
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+SIZES = [int(size) for size in os.getenv("BENCH_INBOX_SIZES", "1000,100000,1000000,10000000").split(",")]
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "50"))
+PAGE_SIZE = 50
+
+workdir = Path(tempfile.mkdtemp())
+os.chdir(workdir)
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+from sqlalchemy import delete, func, insert, select  # noqa: E402
+from app.models.contact import ContactInboxCounters, ContactMessage  # noqa: E402
+from app.models.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.services import contact_inbox  # noqa: E402
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+def populate(start, stop):
+    """Add messages start..stop-1, one second apart, every third one unread."""
+    with engine.begin() as connection:
+        for low in range(start, stop, 50000):
+            connection.execute(insert(ContactMessage), [
+                {
+                    "id": f"{index:012d}",
+                    "name": "Sender",
+                    "email": "sender@example.com",
+                    "subject": f"Message {index}",
+                    "message": "Hello there",
+                    "created_at": EPOCH + timedelta(seconds=index),
+                    "is_read": index % 3 != 0
+                }
+                for index in range(low, min(low + 50000, stop))
+            ])
+        connection.execute(delete(ContactInboxCounters))
+        contact_inbox.install(connection)
+
+async def keyset_page(depth):
+    async with AsyncSessionLocal() as db:
+        after = None
+        if depth:
+            # Position of the message `depth` rows from the newest
+            row = (await db.execute(
+                select(ContactMessage.created_at, ContactMessage.id)
+                .order_by(ContactMessage.created_at.desc(), ContactMessage.id.desc())
+                .offset(depth - 1).limit(1)
+            )).one()
+            after = (row.created_at, row.id)
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            rows, total, unread = await contact_inbox.inbox_page(db, PAGE_SIZE + 1, after)
+        return (time.perf_counter() - start) / ROUNDS, total, unread
+
+async def offset_page(depth):
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            await db.execute(
+                select(ContactMessage).order_by(ContactMessage.created_at.desc())
+                .offset(depth).limit(PAGE_SIZE)
+            )
+            total = await db.scalar(select(func.count()).select_from(ContactMessage))
+            unread = await db.scalar(
+                select(func.count()).select_from(ContactMessage).where(ContactMessage.is_read == False)
+            )
+        return (time.perf_counter() - start) / ROUNDS, total, unread
+
+def main():
+    """Run the benchmark."""
+    global ROUNDS
+    try:
+        Base.metadata.create_all(engine)
+        size = 0
+        print(f"{'messages':>10}  {'page':>7}  {'keyset + counters':>18}  {'offset + count()':>17}")
+        for target in SIZES:
+            populate(size, target)
+            size = target
+            rounds = ROUNDS
+            for depth in (0, size // 10):
+                keyset, total, unread = asyncio.run(keyset_page(depth))
+                # The old path takes seconds per call on big inboxes; sample it less
+                ROUNDS = max(1, min(rounds, 5_000_000 // size))
+                offset, old_total, old_unread = asyncio.run(offset_page(depth))
+                ROUNDS = rounds
+                assert (total, unread) == (old_total, old_unread)
+                print(f"{size:>10,}  {depth:>7,}  {keyset * 1000:>15.2f} ms  {offset * 1000:>14.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
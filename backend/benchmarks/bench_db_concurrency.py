@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark request latency under concurrent mixed reads and writes.
+Start the backend first, then run this script against it. Run it once on the
+old code and once on the new code to compare p50/p99 latencies.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+# Benchmark configuration
+BASE_URL = os.getenv("BENCH_BASE_URL", "http://localhost:8000")
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin")
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "50"))
+REQUESTS_PER_WORKER = int(os.getenv("BENCH_REQUESTS", "40"))
+WRITE_RATIO = float(os.getenv("BENCH_WRITE_RATIO", "0.2"))
+
+def percentile(samples, pct):
+    """Return the given percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def worker(client, headers, worker_id, read_latencies, write_latencies):
+    """Issue a mix of public reads and contact-form writes."""
+    for i in range(REQUESTS_PER_WORKER):
+        is_write = WRITE_RATIO > 0 and i % max(1, int(1 / WRITE_RATIO)) == 0
+        start = time.perf_counter()
+        if is_write:
+            await client.post("/api/contact/submit", json={
+                "name": f"Bench {worker_id}",
+                "email": f"bench{worker_id}@example.com",
+                "subject": "Benchmark",
+                "message": f"Message {i} from worker {worker_id}"
+            })
+            write_latencies.append(time.perf_counter() - start)
+        else:
+            if i % 2:
+                await client.get("/api/sections/visibility")
+            else:
+                await client.get("/api/blog/posts", headers=headers)
+            read_latencies.append(time.perf_counter() - start)
+
+def report(name, samples):
+    """Print latency statistics in milliseconds."""
+    if not samples:
+        print(f"{name}: no samples")
+        return
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{name}: n={len(ms)} mean={statistics.mean(ms):.1f}ms "
+        f"p50={percentile(ms, 50):.1f}ms p99={percentile(ms, 99):.1f}ms "
+        f"max={max(ms):.1f}ms"
+    )
+
+async def main():
+    """Run the benchmark."""
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=60) as client:
+        response = await client.post("/api/auth/login", json={
+            "username": ADMIN_USERNAME,
+            "password": ADMIN_PASSWORD
+        })
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        read_latencies, write_latencies = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, headers, n, read_latencies, write_latencies)
+            for n in range(CONCURRENCY)
+        ))
+        elapsed = time.perf_counter() - start
+
+    total = len(read_latencies) + len(write_latencies)
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s), concurrency={CONCURRENCY}")
+    report("reads", read_latencies)
+    report("writes", write_latencies)
+    report("all", read_latencies + write_latencies)
+
+if __name__ == "__main__":
+    asyncio.run(main())
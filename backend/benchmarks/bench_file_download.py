@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming file downloads under many concurrent clients.
+Start the backend first, then run this script against it. It uploads a
+test file, downloads it from BENCH_CLIENTS clients at once (plus a round of
+random Range reads) and reports throughput. Set BENCH_SERVER_PID to the
+backend's PID to also sample its peak RSS during the run.
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+# Benchmark configuration
+BASE_URL = os.getenv("BENCH_BASE_URL", "http://localhost:8000")
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin")
+FILE_MB = int(os.getenv("BENCH_FILE_MB", "1024"))
+CLIENTS = int(os.getenv("BENCH_CLIENTS", "16"))
+RANGE_REQUESTS = int(os.getenv("BENCH_RANGE_REQUESTS", "200"))
+SERVER_PID = os.getenv("BENCH_SERVER_PID")
+
+def read_rss_mb(pid):
+    """Read a process's resident set size in MB from /proc."""
+    with open(f"/proc/{pid}/status") as status_file:
+        for line in status_file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+async def sample_rss(pid, peak, stop):
+    """Track the peak RSS of the server until told to stop."""
+    while not stop.is_set():
+        peak[0] = max(peak[0], read_rss_mb(pid))
+        await asyncio.sleep(0.1)
+
+async def download(client, url):
+    """Stream a full download, discarding the bytes; return the byte count."""
+    received = 0
+    async with client.stream("GET", url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_raw():
+            received += len(chunk)
+    return received
+
+async def ranged_read(client, url, size):
+    """Fetch a random 64 KB range, like a video player seeking."""
+    start = random.randrange(0, max(size - 65536, 1))
+    response = await client.get(url, headers={"Range": f"bytes={start}-{start + 65535}"})
+    assert response.status_code == 206, response.status_code
+
+async def main():
+    """Run the benchmark."""
+    limits = httpx.Limits(max_connections=CLIENTS + 4)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=600) as client:
+        response = await client.post("/api/auth/login", json={
+            "username": ADMIN_USERNAME,
+            "password": ADMIN_PASSWORD
+        })
+        response.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        with tempfile.TemporaryFile() as payload:
+            block = os.urandom(1024 * 1024)
+            for _ in range(FILE_MB):
+                payload.write(block)
+            payload.seek(0)
+            print(f"Uploading {FILE_MB} MB test file...")
+            response = await client.post(
+                "/api/files/upload",
+                files={"file": ("bench.pdf", payload, "application/pdf")}
+            )
+            response.raise_for_status()
+        file_id = response.json()["id"]
+        url = f"/api/files/files/{file_id}/download"
+        size = FILE_MB * 1024 * 1024
+
+        try:
+            peak = [0.0]
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(sample_rss(SERVER_PID, peak, stop)) if SERVER_PID else None
+
+            start = time.perf_counter()
+            totals = await asyncio.gather(*(download(client, url) for _ in range(CLIENTS)))
+            elapsed = time.perf_counter() - start
+            assert all(total == size for total in totals), totals
+            total_mb = sum(totals) / (1024 * 1024)
+            print(f"{CLIENTS} concurrent full downloads: {total_mb:.0f} MB in {elapsed:.2f}s "
+                  f"({total_mb / elapsed:.0f} MB/s)")
+
+            start = time.perf_counter()
+            await asyncio.gather(*(ranged_read(client, url, size) for _ in range(RANGE_REQUESTS)))
+            elapsed = time.perf_counter() - start
+            print(f"{RANGE_REQUESTS} random 64 KB range reads in {elapsed:.2f}s "
+                  f"({RANGE_REQUESTS / elapsed:.0f} req/s)")
+
+            if sampler:
+                stop.set()
+                await sampler
+                print(f"Peak server RSS: {peak[0]:.0f} MB")
+        finally:
+            await client.delete(f"/api/files/files/{file_id}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark image derivative generation across process pool sizes.
+Writes synthetic photos to a temporary directory, then generates the
+configured widths and formats for all of them with 1, 2, 4... workers up to
+the number of cores and reports images per second.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+from PIL import Image, ImageFilter  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.utils.images import generate_derivatives, supported_formats  # noqa: E402
+
+IMAGES = int(os.getenv("BENCH_IMAGES", "24"))
+SOURCE_WIDTH = int(os.getenv("BENCH_SOURCE_WIDTH", "3000"))
+SOURCE_HEIGHT = int(os.getenv("BENCH_SOURCE_HEIGHT", "2000"))
+
+def make_sources(directory):
+    """Write IMAGES distinct JPEGs with photo-like noise and gradients."""
+    paths = []
+    for index in range(IMAGES):
+        noise = Image.effect_noise((SOURCE_WIDTH, SOURCE_HEIGHT), 40 + index).filter(ImageFilter.GaussianBlur(2))
+        gradient = Image.linear_gradient("L").resize((SOURCE_WIDTH, SOURCE_HEIGHT))
+        image = Image.merge("RGB", (noise, gradient, Image.eval(noise, lambda value: 255 - value)))
+        path = os.path.join(directory, f"source-{index}.jpg")
+        image.save(path, "JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+def run(paths, output_dir, workers, formats):
+    """Generate derivatives for every source; return elapsed seconds."""
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(generate_derivatives, path, output_dir, f"key{index}", settings.image_derivative_widths, formats)
+            for index, path in enumerate(paths)
+        ]
+        variants = sum(len(future.result()) for future in futures)
+    elapsed = time.perf_counter() - start
+    return elapsed, variants
+
+def main():
+    """Run the benchmark."""
+    formats = supported_formats(settings.image_derivative_formats)
+    cores = os.cpu_count() or 1
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"Writing {IMAGES} {SOURCE_WIDTH}x{SOURCE_HEIGHT} sources...")
+        paths = make_sources(workdir)
+        output_dir = os.path.join(workdir, "derivatives")
+        print(f"Widths {settings.image_derivative_widths}, formats {formats} + JPEG fallback, {cores} cores")
+
+        workers = 1
+        while True:
+            elapsed, variants = run(paths, output_dir, workers, formats)
+            print(f"{workers:>2} workers: {IMAGES / elapsed:6.2f} images/s ({variants} variants in {elapsed:.2f}s)")
+            if workers >= cores:
+                break
+            workers = min(workers * 2, cores)
+
+        start = time.perf_counter()
+        generate_derivatives(paths[0], output_dir, "key0", settings.image_derivative_widths, formats)
+        print(f"Re-running an already generated image: {(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
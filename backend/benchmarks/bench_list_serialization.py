@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Benchmark the list endpoints' serialization.
+Fills a throwaway SQLite database with BENCH_PAGE_SIZE rows per table,
+then requests a BENCH_PAGE_SIZE-row page of each list endpoint
+BENCH_REQUESTS times in-process, alongside a reference copy of each route
+that loads ORM objects and lets FastAPI validate them against the same
+response model. Checks both return the same JSON and reports requests/sec
+for each. Then times the step the fast path replaces on its own, loading
+a page and encoding it on an open session: column rows encoded directly
+against ORM objects run through FastAPI's response validation and JSON
+encoding. Fails when that step is less than BENCH_MIN_SPEEDUP times
+faster for a route (whole requests also pay for the session, the
+dependencies and the version lookup, so they gain less).
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+PAGE_SIZE = int(os.getenv("BENCH_PAGE_SIZE", "100"))
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "500"))
+MIN_SPEEDUP = float(os.getenv("BENCH_MIN_SPEEDUP", "3"))
+
+workdir = Path(tempfile.mkdtemp())
+os.chdir(workdir)
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import APIRouter, Depends, Query  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+import main as app_main  # noqa: E402
+from app.api.blog import POST_COLUMNS, POST_FIELDS  # noqa: E402
+from app.api.files import FILE_COLUMNS, FILE_FIELDS  # noqa: E402
+from app.api.newsletter import NEWSLETTER_COLUMNS, NEWSLETTER_FIELDS  # noqa: E402
+from app.dependencies.auth import get_current_admin  # noqa: E402
+from app.dependencies.conditional import conditional_get  # noqa: E402
+from app.models import AdminUser, BlogPost, ContactInboxCounters, ContactMessage, Newsletter, PostStatus  # noqa: E402
+from app.models.database import AsyncSessionLocal, SessionLocal, engine, get_db  # noqa: E402
+from app.models.file import File  # noqa: E402
+from app.schemas.blog import BlogPostListResponse, BlogPostPage, BlogPostResponse  # noqa: E402
+from app.schemas.contact import ContactMessageList, ContactMessageResponse  # noqa: E402
+from app.schemas.file import FileResponse  # noqa: E402
+from app.schemas.newsletter import NewsletterResponse  # noqa: E402
+from app.services import contact_inbox  # noqa: E402
+from app.utils.auth import create_access_token  # noqa: E402
+from app.utils.serialization import dumps, orjson, row_dicts  # noqa: E402
+from init_admin import create_admin_user  # noqa: E402
+
+# The routes as they were: ORM objects validated against the response model
+reference = APIRouter(prefix="/reference")
+
+@reference.get("/blog/posts", response_model=List[BlogPostResponse], dependencies=[Depends(conditional_get("blog_posts"))])
+async def reference_blog_posts(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_admin)
+):
+    return (await db.execute(select(BlogPost).offset(skip).limit(limit))).scalars().all()
+
+@reference.get(
+    "/blog/public/posts", response_model=BlogPostPage, dependencies=[Depends(conditional_get("blog_posts", admin=False))]
+)
+async def reference_published_posts(limit: int = Query(20, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    from app.api.blog import LIST_COLUMNS
+    rows = (await db.execute(
+        select(*LIST_COLUMNS).where(BlogPost.status == PostStatus.PUBLISHED, BlogPost.published_at.isnot(None))
+        .order_by(BlogPost.published_at.desc(), BlogPost.id.desc()).limit(limit + 1)
+    )).all()
+    from app.utils.pagination import encode_cursor
+    next_cursor = encode_cursor(rows[limit - 1].published_at, rows[limit - 1].id) if len(rows) > limit else None
+    return BlogPostPage(posts=[BlogPostListResponse.model_validate(row) for row in rows[:limit]], next_cursor=next_cursor)
+
+@reference.get("/newsletter/newsletters", response_model=List[NewsletterResponse], dependencies=[Depends(conditional_get("newsletters"))])
+async def reference_newsletters(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_admin)
+):
+    return (await db.execute(select(Newsletter).offset(skip).limit(limit))).scalars().all()
+
+@reference.get("/files/files", response_model=List[FileResponse], dependencies=[Depends(conditional_get("files"))])
+async def reference_files(
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db), current_admin=Depends(get_current_admin)
+):
+    return (await db.execute(select(File).offset(skip).limit(limit))).scalars().all()
+
+@reference.get("/contact/messages", response_model=ContactMessageList, dependencies=[Depends(conditional_get("contact_messages"))])
+async def reference_messages(
+    cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=200), archived: bool = False,
+    db: AsyncSession = Depends(get_db), current_user=Depends(get_current_admin)
+):
+    from app.utils.pagination import encode_cursor
+    rows, total, unread_count = await contact_inbox.inbox_page(db, limit + 1, None, archived)
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return ContactMessageList(
+        messages=[ContactMessageResponse.model_validate(row) for row in rows[:limit]],
+        total=total, unread_count=unread_count, next_cursor=next_cursor
+    )
+
+def seed():
+    """PAGE_SIZE + 1 rows per table (so cursor pages have a next page); returns an admin token."""
+    create_admin_user("bench", "bench@example.com", "bench-password")
+    with SessionLocal() as db:
+        admin_id = db.query(AdminUser.id).filter(AdminUser.username == "bench").scalar()
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    text = "Serialization benchmark body text with a realistic length for a list page. " * 10
+    rows = range(PAGE_SIZE + 1)
+    with engine.begin() as connection:
+        connection.execute(insert(BlogPost), [{
+            "id": f"post-{index:05d}", "title": f"Post {index}", "slug": f"post-{index}", "content": text,
+            "excerpt": text[:160], "status": PostStatus.PUBLISHED, "author_id": admin_id,
+            "published_at": start + timedelta(hours=index), "created_at": start
+        } for index in rows])
+        connection.execute(insert(Newsletter), [{
+            "id": f"newsletter-{index:05d}", "subject": f"Issue {index}", "content": text,
+            "author_id": admin_id, "created_at": start
+        } for index in rows])
+        connection.execute(insert(File), [{
+            "filename": f"file-{index}.txt", "original_filename": f"notes {index}.txt",
+            "file_path": f"uploads/file-{index}.txt", "file_size": 1000 + index, "mime_type": "text/plain",
+            "sha256": f"{index:064x}", "uploaded_at": start
+        } for index in rows])
+        connection.execute(insert(ContactMessage), [{
+            "id": f"message-{index:05d}", "name": f"Sender {index}", "email": f"sender{index}@example.com",
+            "subject": f"Question {index}", "message": text, "created_at": start + timedelta(minutes=index),
+            "is_read": index % 2 == 0, "is_archived": False, "ip_address": "192.0.2.1", "user_agent": "bench"
+        } for index in rows])
+        # Recount the counters rows main.py created for the empty table
+        connection.execute(delete(ContactInboxCounters))
+        contact_inbox.install(connection)
+    return create_access_token({"sub": admin_id})
+
+async def throughput(client, path, headers):
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = await client.get(path, headers=headers)
+        assert response.status_code == 200, (path, response.status_code)
+    return REQUESTS / (time.perf_counter() - start)
+
+async def encode_rates(path, model, columns, fields):
+    """Pages loaded and encoded per second on one session: (validated, fast path)."""
+    field = next(
+        route.response_field for route in app_main.app.routes if getattr(route, "path", None) == f"/api{path}"
+    )
+    async with AsyncSessionLocal() as db:
+        async def validated():
+            objects = (await db.execute(select(model).limit(PAGE_SIZE))).scalars().all()
+            body = JSONResponse(await serialize_response(field=field, response_content=objects)).body
+            # Start from an empty identity map every time, as each request does
+            db.expunge_all()
+            return body
+
+        async def fast():
+            rows = (await db.execute(select(*columns).limit(PAGE_SIZE))).all()
+            return dumps(row_dicts(rows, fields))
+
+        if json.loads(await validated()) != json.loads(await fast()):
+            raise AssertionError(f"{path}: the encoded page differs from the validated one")
+        rates = []
+        for encode in (validated, fast):
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                await encode()
+            rates.append(REQUESTS / (time.perf_counter() - start))
+    return rates
+
+async def run(token):
+    app_main.app.include_router(reference)
+    admin = {"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"}
+    paths = [
+        f"/blog/posts?limit={PAGE_SIZE}",
+        f"/blog/public/posts?limit={PAGE_SIZE}",
+        f"/newsletter/newsletters?limit={PAGE_SIZE}",
+        f"/files/files?limit={PAGE_SIZE}",
+        f"/contact/messages?limit={PAGE_SIZE}",
+    ]
+    transport = httpx.ASGITransport(app=app_main.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in paths:
+            fast = await client.get(f"/api{path}", headers=admin)
+            slow = await client.get(f"/reference{path}", headers=admin)
+            assert fast.status_code == slow.status_code == 200, (path, fast.status_code, slow.status_code)
+            if json.loads(fast.content) != json.loads(slow.content):
+                raise AssertionError(f"{path}: the response differs from the validated one")
+            # Alternate so both see the same cache and CPU conditions
+            reference_rate = await throughput(client, f"/reference{path}", admin)
+            fast_rate = await throughput(client, f"/api{path}", admin)
+            results.append((path.split("?")[0], reference_rate, fast_rate, len(fast.content)))
+    steps = [
+        ("/blog/posts", BlogPost, POST_COLUMNS, POST_FIELDS),
+        ("/newsletter/newsletters", Newsletter, NEWSLETTER_COLUMNS, NEWSLETTER_FIELDS),
+        ("/files/files", File, FILE_COLUMNS, FILE_FIELDS),
+    ]
+    encoded = [(path, *await encode_rates(path, *step)) for path, *step in steps]
+    return results, encoded
+
+def main():
+    """Run the benchmark."""
+    try:
+        token = seed()
+        results, encoded = asyncio.run(run(token))
+        encoder = "orjson" if orjson is not None else "json (orjson is not installed)"
+        print(f"{PAGE_SIZE}-row pages, {REQUESTS} requests each, encoded with {encoder}")
+        print(f"{'whole request':<28}{'validated':>12}{'fast path':>12}{'speedup':>9}{'bytes':>10}")
+        for path, reference_rate, fast_rate, size in results:
+            print(f"{path:<28}{reference_rate:>10,.0f}/s{fast_rate:>10,.0f}/s{fast_rate / reference_rate:>8.1f}x{size:>10,}")
+        print(f"{'load and encode':<28}{'validated':>12}{'fast path':>12}{'speedup':>9}")
+        slowest = None
+        for path, reference_rate, fast_rate in encoded:
+            speedup = fast_rate / reference_rate
+            print(f"{path:<28}{reference_rate:>10,.0f}/s{fast_rate:>10,.0f}/s{speedup:>8.1f}x")
+            if slowest is None or speedup < slowest[0]:
+                slowest = (speedup, path)
+        if slowest[0] < MIN_SPEEDUP:
+            print(f"❌ {slowest[1]} loads and encodes only {slowest[0]:.1f}x faster than validating, below {MIN_SPEEDUP:g}x")
+            sys.exit(1)
+        print(f"✅ Every list page loads and encodes at least {MIN_SPEEDUP:g}x faster than validating")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
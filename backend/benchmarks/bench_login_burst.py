@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark public endpoint latency while a burst of logins is in flight.
+Start the backend first, then run this script against it. Logins rejected
+with 503 show the hashing pool's admission control at work.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+# Benchmark configuration
+BASE_URL = os.getenv("BENCH_BASE_URL", "http://localhost:8000")
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin")
+LOGIN_BURST = int(os.getenv("BENCH_LOGIN_BURST", "50"))
+PUBLIC_REQUESTS = int(os.getenv("BENCH_PUBLIC_REQUESTS", "200"))
+
+def percentile(samples, pct):
+    """Return the given percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def login(client, statuses):
+    """Attempt one login and record the response status."""
+    response = await client.post("/api/auth/login", json={
+        "username": ADMIN_USERNAME,
+        "password": ADMIN_PASSWORD
+    })
+    statuses[response.status_code] += 1
+
+async def public_reads(client, latencies):
+    """Issue sequential public reads while logins are running."""
+    for _ in range(PUBLIC_REQUESTS):
+        start = time.perf_counter()
+        await client.get("/api/sections/visibility")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def main():
+    """Run the benchmark."""
+    limits = httpx.Limits(max_connections=LOGIN_BURST + 10)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=60) as client:
+        # Warm up the public endpoint
+        await client.get("/api/sections/visibility")
+
+        latencies = []
+        statuses = Counter()
+        start = time.perf_counter()
+        await asyncio.gather(
+            public_reads(client, latencies),
+            *(login(client, statuses) for _ in range(LOGIN_BURST))
+        )
+        elapsed = time.perf_counter() - start
+
+    print(f"{LOGIN_BURST} logins + {PUBLIC_REQUESTS} public reads in {elapsed:.2f}s")
+    print(f"login statuses: {dict(statuses)}")
+    print(
+        f"public reads: mean={statistics.mean(latencies):.1f}ms "
+        f"p50={percentile(latencies, 50):.1f}ms p99={percentile(latencies, 99):.1f}ms "
+        f"max={max(latencies):.1f}ms"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark newsletter fan-out against an in-process SMTP sink.
+Seeds a throwaway SQLite database with subscribers, runs the delivery engine
+to completion and reports throughput and peak memory.
+"""
+
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Point the app at a throwaway database and the local sink before importing it
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+workdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+os.environ.setdefault("SMTP_SERVER", "127.0.0.1")
+os.environ.setdefault("SMTP_PORT", "1026")
+os.environ.setdefault("SMTP_USE_TLS", "false")
+os.environ.setdefault("NEWSLETTER_MESSAGES_PER_SECOND", "0")
+
+from sqlalchemy import insert  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.models import Base, AdminUser, Newsletter, NewsletterStatus, Subscriber  # noqa: E402
+from app.models.database import AsyncSessionLocal, SessionLocal, engine  # noqa: E402
+from app.services.newsletter_delivery import delivery_engine, enqueue_subscribers, get_progress  # noqa: E402
+from smtp_sink import SMTPSink  # noqa: E402
+
+RECIPIENTS = int(os.getenv("BENCH_RECIPIENTS", "20000"))
+
+def seed():
+    """Create the schema, an author, a newsletter and the subscriber list."""
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        author = AdminUser(username="bench", email="bench@example.com", password_hash="x")
+        db.add(author)
+        db.flush()
+        newsletter = Newsletter(subject="Benchmark", content="Hello!", author_id=author.id)
+        db.add(newsletter)
+        batch = 10000
+        for start in range(0, RECIPIENTS, batch):
+            db.execute(insert(Subscriber), [
+                {"email": f"reader{i}@example.com", "is_active": True}
+                for i in range(start, min(start + batch, RECIPIENTS))
+            ])
+        db.commit()
+        return newsletter.id
+
+async def main():
+    """Run the benchmark."""
+    newsletter_id = seed()
+    sink = SMTPSink()
+    server = await sink.serve(settings.smtp_server, settings.smtp_port)
+
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        await enqueue_subscribers(db, newsletter_id)
+        newsletter = await db.get(Newsletter, newsletter_id)
+        newsletter.status = NewsletterStatus.SENDING
+        await db.commit()
+        enqueue_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    delivery_engine.start(newsletter_id)
+    while delivery_engine.is_running(newsletter_id):
+        await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        progress = await get_progress(db, newsletter_id)
+    server.close()
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"enqueued {progress['total']} deliveries in {enqueue_seconds:.2f}s")
+    print(
+        f"delivered {progress['sent']} (failed {progress['failed']}) in {elapsed:.2f}s "
+        f"= {progress['sent'] / elapsed:.0f} msg/s over {sink.connections} SMTP connections"
+    )
+    print(f"sink received {sink.messages} messages, peak RSS {peak_rss_mb:.0f} MB")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the rate limiter's per-request cost.
+Times the rate limit dependency the public write endpoints run (per-client
+plus route-total bucket, response headers included) against the memory
+backend, for one busy client, for BENCH_CLIENTS clients cycling through a
+bucket table capped at BENCH_MAX_KEYS (so every request also evicts), and
+for clients being refused. Reports the memory each bucket takes, and the
+database backend's cost for comparison. Fails when the memory backend's
+p99 exceeds BENCH_BUDGET_US microseconds.
+"""
+
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "200000"))
+CLIENTS = int(os.getenv("BENCH_CLIENTS", "200000"))
+MAX_KEYS = int(os.getenv("BENCH_MAX_KEYS", "100000"))
+DATABASE_REQUESTS = int(os.getenv("BENCH_DATABASE_REQUESTS", "2000"))
+BUDGET_US = float(os.getenv("BENCH_BUDGET_US", "50"))
+
+workdir = Path(tempfile.mkdtemp())
+os.chdir(workdir)
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+from fastapi import HTTPException, Request, Response  # noqa: E402
+from app.dependencies.rate_limit import rate_limit  # noqa: E402
+from app.models.database import Base, engine  # noqa: E402
+from app.services.rate_limit import DatabaseBackend, MemoryBackend, parse_rate, rate_limiter  # noqa: E402
+
+def make_request(client: str) -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/api/contact/submit", "headers": [], "client": (client, 50000)})
+
+async def time_requests(check, requests):
+    """Per-call latencies in microseconds; refusals (HTTP 429) are timed like any other call."""
+    latencies = []
+    refused = 0
+    for request in requests:
+        start = time.perf_counter_ns()
+        try:
+            await check(request, Response())
+        except HTTPException:
+            refused += 1
+        latencies.append((time.perf_counter_ns() - start) / 1000)
+    return latencies, refused
+
+def report(name, latencies, refused):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{name:<28}  {statistics.mean(latencies):>8.2f} µs  {latencies[len(latencies) // 2]:>8.2f} µs  {p99:>8.2f} µs  {refused:>8,}")
+    return p99
+
+async def run():
+    limits = {"contact": (parse_rate("5/minute"), parse_rate("1000000000/minute"))}
+    check = rate_limit("contact")
+    print(f"{'scenario':<28}  {'mean':>11}  {'p50':>11}  {'p99':>11}  {'refused':>8}")
+
+    worst = 0.0
+    scenarios = [
+        # A generous per-client limit so the busy client is allowed throughout
+        ("one busy client", {"contact": (parse_rate("1000000000/minute"), None)}, ["203.0.113.7"] * REQUESTS),
+        ("distinct clients, evicting", limits, [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(CLIENTS)]),
+        ("refused client", limits, ["198.51.100.1"] * REQUESTS),
+    ]
+    for name, scenario_limits, clients in scenarios:
+        rate_limiter.backend = MemoryBackend(max_keys=MAX_KEYS)
+        rate_limiter.limits = scenario_limits
+        requests = [make_request(client) for client in clients]
+        worst = max(worst, report(name, *await time_requests(check, requests)))
+
+    # Memory per bucket at the cap
+    backend = MemoryBackend(max_keys=MAX_KEYS)
+    rate = parse_rate("5/minute")
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(MAX_KEYS):
+        await backend.hit(f"contact:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", rate)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"memory: {used / MAX_KEYS:.0f} bytes per bucket, {used / 2**20:.1f} MiB for {MAX_KEYS:,} buckets")
+
+    if DATABASE_REQUESTS:
+        Base.metadata.create_all(engine)
+        rate_limiter.backend = DatabaseBackend()
+        rate_limiter.limits = limits
+        requests = [make_request(f"10.0.{i >> 8 & 255}.{i & 255}") for i in range(DATABASE_REQUESTS)]
+        report("database backend (SQLite)", *await time_requests(check, requests))
+
+    return worst
+
+def main():
+    """Run the benchmark."""
+    try:
+        worst = asyncio.run(run())
+        if worst > BUDGET_US:
+            print(f"❌ Memory backend p99 {worst:.2f} µs is over the {BUDGET_US:g} µs budget")
+            sys.exit(1)
+        print(f"✅ Memory backend p99 is within the {BUDGET_US:g} µs budget")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
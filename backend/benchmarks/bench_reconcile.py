@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark upload reconciliation at scale.
+Builds a throwaway SQLite database and sharded uploads tree with BENCH_FILES
+files, leaves roughly one in a thousand as orphans and removes the bytes of
+another one in a thousand, then times a report-only reconciliation pass and
+reports this process's peak RSS.
+"""
+
+import asyncio
+import hashlib
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+FILES = int(os.getenv("BENCH_FILES", "1000000"))
+
+workdir = Path(tempfile.mkdtemp())
+os.chdir(workdir)
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+
+from sqlalchemy import insert  # noqa: E402
+from app.models.database import Base, engine  # noqa: E402
+from app.models.file import File  # noqa: E402
+from app.services.reconciliation import Reconciler  # noqa: E402
+from app.utils.paths import shard_path  # noqa: E402
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def populate():
+    """Create the files and rows; returns (orphans, missing) planted."""
+    Base.metadata.create_all(engine)
+    upload_dir = Path("uploads")
+    orphans = missing = 0
+    rows = []
+    with engine.begin() as connection:
+        for index in range(FILES):
+            name = hashlib.sha256(str(index).encode()).hexdigest() + ".jpg"
+            path = shard_path(upload_dir, name)
+            if index % 1000 != 1:
+                try:
+                    open(path, "wb").close()
+                except FileNotFoundError:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    open(path, "wb").close()
+                os.utime(path, (0, 0))
+            else:
+                missing += 1
+            if index % 1000 == 0:
+                orphans += 1
+                continue
+            rows.append({
+                "filename": name,
+                "original_filename": name,
+                "file_path": str(path),
+                "file_size": 0,
+                "mime_type": "image/jpeg"
+            })
+            if len(rows) == 10000:
+                connection.execute(insert(File), rows)
+                rows = []
+        if rows:
+            connection.execute(insert(File), rows)
+    return orphans, missing
+
+def main():
+    """Run the benchmark."""
+    try:
+        print(f"Creating {FILES} files and rows in {workdir}...")
+        start = time.perf_counter()
+        planted_orphans, planted_missing = populate()
+        print(f"  done in {time.perf_counter() - start:.0f}s; planted {planted_orphans} orphans, {planted_missing} missing")
+        print(f"Peak RSS before reconciling: {peak_rss_mb():.0f} MB")
+
+        start = time.perf_counter()
+        report = asyncio.run(Reconciler().run())
+        elapsed = time.perf_counter() - start
+        print(
+            f"Reconciled {report.stored} objects against {report.referenced} paths in {elapsed:.1f}s "
+            f"({(report.stored + report.referenced) / elapsed:,.0f} entries/s)"
+        )
+        print(f"  found {report.orphans} orphans, {report.missing} missing; peak RSS {peak_rss_mb():.0f} MB")
+        assert report.orphans == planted_orphans and report.missing == planted_missing
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the S3 storage driver against the local S3 stand-in.
+Starts s3_stand_in.py in a subprocess, then uploads a BENCH_OBJECT_MB file
+(multipart), streams it back, and issues random ranged reads, reporting
+throughput and this process's peak RSS to show memory stays flat however
+large the object is.
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+import httpx  # noqa: E402
+from app.services.storage import S3Storage  # noqa: E402
+from app.utils.compat import aclosing  # noqa: E402
+
+OBJECT_MB = int(os.getenv("BENCH_OBJECT_MB", "2048"))
+RANGE_READS = int(os.getenv("BENCH_RANGE_READS", "200"))
+PORT = int(os.getenv("S3_STAND_IN_PORT", "9000"))
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def write_source(path):
+    """Write OBJECT_MB of incompressible data; returns its SHA-256."""
+    digest = hashlib.sha256()
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as file:
+        for index in range(OBJECT_MB):
+            chunk = index.to_bytes(8, "big") + block[8:]
+            digest.update(chunk)
+            file.write(chunk)
+    return digest.hexdigest()
+
+async def wait_for_stand_in(url):
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("S3 stand-in did not start")
+
+async def run(workdir):
+    storage = S3Storage(
+        bucket="bench",
+        access_key_id="stand-in",
+        secret_access_key="stand-in-secret",
+        endpoint_url=f"http://127.0.0.1:{PORT}"
+    )
+    source = workdir / "source.bin"
+    expected = write_source(source)
+    size = source.stat().st_size
+    print(f"Object: {OBJECT_MB} MB, part size {storage.part_size >> 20} MB x {storage.upload_concurrency} in flight")
+    print(f"Peak RSS before transfers: {peak_rss_mb():.0f} MB")
+
+    start = time.perf_counter()
+    await storage.save("bench/object.bin", source)
+    elapsed = time.perf_counter() - start
+    print(f"Upload:   {OBJECT_MB / elapsed:7.1f} MB/s  peak RSS {peak_rss_mb():.0f} MB")
+
+    digest = hashlib.sha256()
+    start = time.perf_counter()
+    async with aclosing(storage.iter_range("bench/object.bin", 0, size)) as chunks:
+        async for chunk in chunks:
+            digest.update(chunk)
+    elapsed = time.perf_counter() - start
+    assert digest.hexdigest() == expected, "downloaded bytes differ"
+    print(f"Download: {OBJECT_MB / elapsed:7.1f} MB/s  peak RSS {peak_rss_mb():.0f} MB (checksum ok)")
+
+    latencies = []
+    for _ in range(RANGE_READS):
+        offset = random.randrange(size - 65536)
+        start = time.perf_counter()
+        received = 0
+        async with aclosing(storage.iter_range("bench/object.bin", offset, 65536)) as chunks:
+            async for chunk in chunks:
+                received += len(chunk)
+        latencies.append(time.perf_counter() - start)
+        assert received == 65536
+    latencies.sort()
+    print(
+        f"64KB ranged reads: p50 {latencies[len(latencies) // 2] * 1000:.1f} ms"
+        f"  p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms"
+    )
+
+    await storage.delete("bench/object.bin")
+    await storage.close()
+
+def main():
+    """Run the benchmark."""
+    workdir = Path(tempfile.mkdtemp())
+    server = subprocess.Popen(
+        [sys.executable, str(Path(__file__).parent / "s3_stand_in.py"), str(workdir / "objects")],
+        env={**os.environ, "S3_STAND_IN_PORT": str(PORT)}
+    )
+    try:
+        asyncio.run(wait_for_stand_in(f"http://127.0.0.1:{PORT}/"))
+        asyncio.run(run(workdir))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark flat versus sharded upload directories.
+Creates BENCH_FILES empty files named like stored uploads in each layout,
+then times random lookups, adding a file, listing one directory and walking
+the whole tree. Needs free inodes for twice BENCH_FILES.
+"""
+
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(backend_dir))
+
+from app.utils.paths import shard_path  # noqa: E402
+
+FILES = int(os.getenv("BENCH_FILES", "1000000"))
+LOOKUPS = int(os.getenv("BENCH_LOOKUPS", "20000"))
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def report(name, samples):
+    print(
+        f"  {name:<18} p50 {percentile(samples, 50) * 1e6:8.1f} us"
+        f"  p99 {percentile(samples, 99) * 1e6:8.1f} us"
+    )
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def populate(root, names, sharded):
+    start = time.perf_counter()
+    for name in names:
+        path = shard_path(root, name) if sharded else root / name
+        if sharded:
+            try:
+                open(path, "wb").close()
+            except FileNotFoundError:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                open(path, "wb").close()
+        else:
+            open(path, "wb").close()
+    return time.perf_counter() - start
+
+def walk(root):
+    count = 0
+    for _, _, filenames in os.walk(root):
+        count += len(filenames)
+    return count
+
+def bench_layout(label, root, names, sharded):
+    locate = (lambda name: shard_path(root, name)) if sharded else (lambda name: root / name)
+    print(f"{label}:")
+    elapsed = populate(root, names, sharded)
+    print(f"  created {len(names)} files in {elapsed:.1f}s")
+
+    hits = [time_call(os.path.exists, locate(name)) for name in random.sample(names, min(LOOKUPS, len(names)))]
+    report("lookup (hit)", hits)
+    fresh = [hashlib.sha256(f"missing-{index}".encode()).hexdigest() + ".jpg" for index in range(LOOKUPS)]
+    report("lookup (miss)", [time_call(os.path.exists, locate(name)) for name in fresh])
+
+    adds = []
+    for name in fresh[:1000]:
+        path = locate(name)
+        start = time.perf_counter()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        open(path, "wb").close()
+        adds.append(time.perf_counter() - start)
+    report("add file", adds)
+
+    directory = locate(names[0]).parent
+    start = time.perf_counter()
+    listed = len(os.listdir(directory))
+    print(f"  list one directory {listed:>8} entries in {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    start = time.perf_counter()
+    total = walk(root)
+    print(f"  walk whole tree    {total:>8} files   in {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+def main():
+    """Run the benchmark."""
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        names = [hashlib.sha256(str(index).encode()).hexdigest() + ".jpg" for index in range(FILES)]
+        print(f"{FILES} files, {LOOKUPS} lookups per case")
+        for label, sharded in (("Flat", False), ("Sharded", True)):
+            root = workdir / label.lower()
+            root.mkdir()
+            bench_layout(label, root, names, sharded)
+            shutil.rmtree(root)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Minimal local S3-compatible server for exercising the S3 storage driver.
+Supports the calls the driver makes (object PUT/GET with Range/HEAD/DELETE,
+multipart uploads and ListObjectsV2), checks Signature Version 4 signatures and streams
+bodies to and from disk. Point the backend at it with STORAGE_BACKEND=s3
+S3_ENDPOINT_URL=http://localhost:9000 S3_BUCKET=<any>
+S3_ACCESS_KEY_ID=stand-in S3_SECRET_ACCESS_KEY=stand-in-secret.
+"""
+
+import hashlib
+import hmac
+import os
+import re
+import shutil
+import sys
+import tempfile
+import uuid
+import xml.etree.ElementTree as ElementTree
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+STAND_IN_HOST = os.getenv("S3_STAND_IN_HOST", "127.0.0.1")
+STAND_IN_PORT = int(os.getenv("S3_STAND_IN_PORT", "9000"))
+ACCESS_KEY_ID = os.getenv("S3_STAND_IN_ACCESS_KEY_ID", "stand-in")
+SECRET_ACCESS_KEY = os.getenv("S3_STAND_IN_SECRET_ACCESS_KEY", "stand-in-secret")
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d+)-(\d*)$")
+AUTHORIZATION_PATTERN = re.compile(
+    r"AWS4-HMAC-SHA256 Credential=([^/]+)/([^,]+), SignedHeaders=([^,]+), Signature=([0-9a-f]+)"
+)
+
+def read_range(path: Path, offset: int, length: int):
+    with open(path, "rb") as file:
+        file.seek(offset)
+        while length > 0:
+            chunk = file.read(min(256 * 1024, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+def error(status_code, code, message=""):
+    body = f"<Error><Code>{code}</Code><Message>{message}</Message></Error>"
+    return Response(body, status_code=status_code, media_type="application/xml")
+
+def signature_valid(request: Request) -> bool:
+    """Recompute the SigV4 signature from what actually arrived."""
+    match = AUTHORIZATION_PATTERN.match(request.headers.get("authorization", ""))
+    if not match or match.group(1) != ACCESS_KEY_ID:
+        return False
+    scope, signed_names, signature = match.group(2), match.group(3), match.group(4)
+    day, region, service, _ = scope.split("/")
+    query = "&".join(
+        f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}"
+        for name, value in sorted(request.query_params.multi_items())
+    )
+    headers = "".join(f"{name}:{request.headers.get(name, '').strip()}\n" for name in signed_names.split(";"))
+    canonical_request = "\n".join([
+        request.method,
+        quote(request.url.path, safe="/~"),
+        query,
+        headers,
+        signed_names,
+        request.headers.get("x-amz-content-sha256", "")
+    ])
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256",
+        request.headers.get("x-amz-date", ""),
+        scope,
+        hashlib.sha256(canonical_request.encode()).hexdigest()
+    ])
+    key = f"AWS4{SECRET_ACCESS_KEY}".encode()
+    for part in (day, region, service, "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    return hmac.compare_digest(hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest(), signature)
+
+class S3StandIn:
+    """Path-style S3 subset backed by a directory."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.uploads = root / ".multipart"
+        self.uploads.mkdir(parents=True, exist_ok=True)
+        self.requests = 0
+
+    def object_path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    async def receive_to(self, request: Request, path: Path) -> str:
+        """Stream the request body to ``path``; returns its quoted MD5 ETag."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.md5()
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        with open(temp_path, "wb") as file:
+            async for chunk in request.stream():
+                digest.update(chunk)
+                file.write(chunk)
+        os.replace(temp_path, path)
+        return f'"{digest.hexdigest()}"'
+
+    def list_objects(self, bucket: str, prefix: str, after: str, page_size: int = 1000) -> Response:
+        """ListObjectsV2 page; the continuation token is simply the last key returned."""
+        bucket_dir = self.root / bucket
+        keys = sorted(
+            str(Path(directory, name).relative_to(bucket_dir))
+            for directory, _, names in os.walk(bucket_dir)
+            for name in names
+        )
+        keys = [key for key in keys if key.startswith(prefix) and key > after]
+        page = keys[:page_size]
+        truncated = len(keys) > page_size
+        contents = "".join(f"<Contents><Key>{escape(key)}</Key></Contents>" for key in page)
+        token = f"<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>" if truncated else ""
+        return Response(
+            f"<ListBucketResult><IsTruncated>{'true' if truncated else 'false'}</IsTruncated>"
+            f"{contents}{token}</ListBucketResult>",
+            media_type="application/xml"
+        )
+
+    async def handle(self, request: Request) -> Response:
+        self.requests += 1
+        if not signature_valid(request):
+            return error(403, "SignatureDoesNotMatch")
+        bucket = request.path_params["bucket"]
+        key = request.path_params["key"]
+        path = self.object_path(bucket, key)
+        query = request.query_params
+
+        if request.method == "GET" and not key and query.get("list-type") == "2":
+            return self.list_objects(bucket, query.get("prefix", ""), query.get("continuation-token", ""))
+        if request.method == "POST" and "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            (self.uploads / upload_id).mkdir()
+            return Response(
+                f"<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>"
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>",
+                media_type="application/xml"
+            )
+        if "uploadId" in query:
+            parts_dir = self.uploads / query["uploadId"]
+            if not parts_dir.is_dir():
+                return error(404, "NoSuchUpload")
+            if request.method == "PUT":
+                etag = await self.receive_to(request, parts_dir / f"{int(query['partNumber']):05d}")
+                return Response(headers={"ETag": etag})
+            if request.method == "DELETE":
+                shutil.rmtree(parts_dir)
+                return Response(status_code=204)
+            if request.method == "POST":
+                manifest = ElementTree.fromstring(await request.body())
+                numbers = [int(element.text) for element in manifest.iter("PartNumber")]
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "wb") as output:
+                    for number in numbers:
+                        with open(parts_dir / f"{number:05d}", "rb") as part:
+                            shutil.copyfileobj(part, output, 1024 * 1024)
+                shutil.rmtree(parts_dir)
+                return Response(
+                    f"<CompleteMultipartUploadResult><Key>{key}</Key>"
+                    f'<ETag>"{uuid.uuid4().hex}-{len(numbers)}"</ETag></CompleteMultipartUploadResult>',
+                    media_type="application/xml"
+                )
+
+        if request.method == "PUT":
+            etag = await self.receive_to(request, path)
+            return Response(headers={"ETag": etag})
+        if request.method == "DELETE":
+            path.unlink(missing_ok=True)
+            return Response(status_code=204)
+        if not path.is_file():
+            return error(404, "NoSuchKey")
+        stat_result = path.stat()
+        headers = {
+            "ETag": f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True)
+        }
+        if request.method == "HEAD":
+            return Response(headers={**headers, "Content-Length": str(stat_result.st_size)})
+        match = RANGE_PATTERN.match(request.headers.get("range", ""))
+        if not match:
+            return FileResponse(path, headers=headers, stat_result=stat_result)
+        start = int(match.group(1))
+        end = min(int(match.group(2) or stat_result.st_size - 1), stat_result.st_size - 1)
+        if start > end:
+            return error(416, "InvalidRange")
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(read_range(path, start, end - start + 1), status_code=206, headers=headers)
+
+def create_app(root: Path) -> Starlette:
+    stand_in = S3StandIn(root)
+    app = Starlette(routes=[
+        Route("/{bucket}/{key:path}", stand_in.handle, methods=["GET", "HEAD", "PUT", "POST", "DELETE"])
+    ])
+    app.state.stand_in = stand_in
+    return app
+
+def main():
+    """Serve until interrupted; objects go to the directory given as argument (or a temp dir)."""
+    import uvicorn
+
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(tempfile.mkdtemp(prefix="s3-stand-in-"))
+    print(f"S3 stand-in on http://{STAND_IN_HOST}:{STAND_IN_PORT}, storing objects in {root}")
+    uvicorn.run(create_app(root), host=STAND_IN_HOST, port=STAND_IN_PORT, log_level="warning")
+
+if __name__ == "__main__":
+    main()
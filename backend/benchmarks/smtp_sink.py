@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Minimal local SMTP sink for exercising outgoing email without a real server.
+It accepts every message, counts it and throws it away. Point the backend at
+it with SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_USE_TLS=false.
+"""
+
+import asyncio
+import os
+import time
+
+SINK_HOST = os.getenv("SMTP_SINK_HOST", "127.0.0.1")
+SINK_PORT = int(os.getenv("SMTP_SINK_PORT", "1025"))
+
+class SMTPSink:
+    """Tiny SMTP server that accepts and counts messages."""
+
+    def __init__(self):
+        self.messages = 0
+        self.connections = 0
+        self.recipients = []
+        self.keep_recipients = False
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 smtp-sink ready\r\n")
+        await writer.drain()
+        in_data = False
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if in_data:
+                if line in (b".\r\n", b".\n"):
+                    in_data = False
+                    self.messages += 1
+                    writer.write(b"250 OK\r\n")
+                    await writer.drain()
+                continue
+
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                writer.write(b"250-smtp-sink\r\n250 8BITMIME\r\n")
+            elif command == b"RCPT":
+                if self.keep_recipients:
+                    self.recipients.append(line[8:].strip().decode(errors="replace"))
+                writer.write(b"250 OK\r\n")
+            elif command == b"DATA":
+                in_data = True
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    async def serve(self, host=SINK_HOST, port=SINK_PORT):
+        """Start listening and return the asyncio server."""
+        return await asyncio.start_server(self.handle, host, port)
+
+async def main():
+    """Run the sink until interrupted, printing a running count."""
+    sink = SMTPSink()
+    server = await sink.serve()
+    print(f"SMTP sink listening on {SINK_HOST}:{SINK_PORT}")
+    async with server:
+        last = 0
+        while True:
+            await asyncio.sleep(5)
+            if sink.messages != last:
+                print(f"{time.strftime('%H:%M:%S')} messages={sink.messages} connections={sink.connections}")
+                last = sink.messages
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,10 +6,9 @@ backend_dir = Path(__file__).parent.absolute()
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 from dotenv import load_dotenv
 from app.config import settings
@@ -21,6 +20,16 @@ from app.api.newsletter import router as newsletter_router
 from app.api.files import router as files_router
 from app.api.sections import router as sections_router
 from app.api.contact import router as contact_router
+from app.dependencies.auth import get_current_admin
+from app.middleware.compression import CompressionMiddleware, compression_stats
+from app.services import contact_inbox, table_versions
+from app.services.chunked_uploads import upload_session_cleaner
+from app.services.email_outbox import outbox_sender
+from app.services.image_derivatives import derivative_generator
+from app.services.newsletter_delivery import delivery_engine
+from app.services.search import get_search_backend
+from app.services.storage import storage
+from app.utils.static_files import ShardedStaticFiles
 
 # Load environment variables
 load_dotenv()
@@ -35,6 +44,35 @@ app = FastAPI(
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Create the full-text search index (not part of the ORM metadata)
+with engine.begin() as connection:
+    get_search_backend(engine.dialect.name).install(connection)
+
+# Seed the contact inbox counters from the existing messages
+with engine.begin() as connection:
+    contact_inbox.install(connection)
+
+# Version rows and triggers behind the read endpoints' validators
+with engine.begin() as connection:
+    table_versions.install(connection)
+
+@app.on_event("startup")
+async def start_background_workers():
+    """Start background workers"""
+    outbox_sender.start()
+    derivative_generator.start()
+    upload_session_cleaner.start()
+    await delivery_engine.resume_interrupted()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Stop background workers"""
+    await outbox_sender.stop()
+    await derivative_generator.stop()
+    await upload_session_cleaner.stop()
+    await delivery_engine.stop()
+    await storage.close()
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(blog_router)
@@ -43,9 +81,13 @@ app.include_router(files_router)
 app.include_router(sections_router)
 app.include_router(contact_router)
 
-# Mount static files for uploads
-if os.path.exists("uploads"):
-    app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Mount static files for uploads; links from before sharding redirect to the sharded path
+if settings.storage_backend == "local" and os.path.exists("uploads"):
+    app.mount("/uploads", ShardedStaticFiles(directory="uploads"), name="uploads")
+
+# Compress JSON and text responses for clients that accept it
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
 
 # Configure CORS
 app.add_middleware(
@@ -81,5 +123,10 @@ async def api_health_check():
     """API health check endpoint"""
     return {"status": "healthy", "api_version": "1.0.0"}
 
+@app.get("/api/compression/stats")
+async def get_compression_stats(current_user = Depends(get_current_admin)):
+    """Get response compression totals per route: bytes saved and CPU spent (admin endpoint)"""
+    return compression_stats.report()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
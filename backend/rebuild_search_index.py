@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the blog full-text search index.
+The index is kept in sync automatically; run this after bulk edits made
+outside the app, after restoring a backup, or after a SQLite VACUUM.
+"""
+
+import sys
+from app.models.database import engine
+from app.services.search import get_search_backend
+
+def rebuild_search_index():
+    """Rebuild the search index from the blog_posts table."""
+    backend = get_search_backend(engine.dialect.name)
+    try:
+        with engine.begin() as connection:
+            backend.install(connection)
+            backend.rebuild(connection)
+        print("Search index rebuilt.")
+
+    except Exception as e:
+        print(f"Error rebuilding search index: {e}")
+        sys.exit(1)
+
+def main():
+    """Main function to run the rebuild."""
+    print("Blog Search Index Rebuild")
+    print("=" * 30)
+
+    rebuild_search_index()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Script to reconcile stored uploads with the files and file_derivatives tables.
+Reports orphans (stored objects no row references) and missing files (rows
+whose object is gone). Pass --repair to delete orphans older than
+RECONCILE_GRACE_SECONDS and remove rows that point at missing files; repairs
+are throttled to RECONCILE_OPS_PER_SECOND storage operations per second.
+Safe to run while the site is serving.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from app.services.reconciliation import Reconciler, ReconciliationReport
+from app.services.storage import storage
+
+def print_progress(report: ReconciliationReport):
+    print(f"Walked {report.stored} stored objects, {report.referenced} referenced paths...")
+
+async def reconcile_uploads(repair: bool, grace_seconds: float, ops_per_second: float):
+    """Run one reconciliation pass and print its report."""
+    start = time.perf_counter()
+    try:
+        report = await Reconciler(repair, grace_seconds, ops_per_second, print_progress).run()
+    finally:
+        await storage.close()
+
+    print(f"Stored objects:   {report.stored}")
+    print(f"Referenced paths: {report.referenced}")
+    print(f"Orphans:          {report.orphans} ({report.orphan_bytes} bytes)")
+    for key in report.orphan_samples:
+        print(f"  {key}")
+    if report.recent_orphans:
+        print(f"Recent orphans:   {report.recent_orphans} (younger than {grace_seconds:.0f}s, left alone)")
+    print(f"Missing files:    {report.missing}")
+    for path in report.missing_samples:
+        print(f"  {path}")
+    if repair:
+        print(
+            f"Repaired: {report.removed_orphans} orphans deleted, {report.removed_files} file rows "
+            f"and {report.removed_derivatives} variant rows removed."
+        )
+    print(f"Done in {time.perf_counter() - start:.1f}s.")
+
+def main():
+    """Main function to run the reconciliation."""
+    print("Upload Reconciliation")
+    print("=" * 30)
+
+    repair = "--repair" in sys.argv
+    grace_seconds = float(os.getenv("RECONCILE_GRACE_SECONDS", "3600"))
+    ops_per_second = float(os.getenv("RECONCILE_OPS_PER_SECOND", "50"))
+    try:
+        asyncio.run(reconcile_uploads(repair, grace_seconds, ops_per_second))
+    except Exception as e:
+        print(f"Error reconciling uploads: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
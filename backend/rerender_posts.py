@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Script to re-render stored blog post HTML.
+Run this after bumping RENDERER_VERSION in app/utils/render.py (or after
+upgrading to a schema with rendered content) to refresh every stale post.
+Rendering is spread across a process pool; pass --all to re-render every post.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import or_, select, update
+from app.models.database import SessionLocal
+from app.models import BlogPost
+from app.utils.render import RENDERER_VERSION, render_post
+
+# Posts fetched, rendered and written back per round
+BATCH_SIZE = 200
+
+def render_row(row):
+    """Render one (id, title, excerpt, featured_image, content, published_at) tuple."""
+    post_id, title, excerpt, featured_image, content, published_at = row
+    content_html, content_hash = render_post(title, excerpt, featured_image, content, published_at)
+    return post_id, content_html, content_hash
+
+def rerender_posts(rerender_all: bool = False, workers: int = 0):
+    """Re-render stale posts in batches using a process pool."""
+    db = SessionLocal()
+    rendered = 0
+    try:
+        query = select(
+            BlogPost.id,
+            BlogPost.title,
+            BlogPost.excerpt,
+            BlogPost.featured_image,
+            BlogPost.content,
+            BlogPost.published_at
+        ).order_by(BlogPost.id)
+        if not rerender_all:
+            query = query.where(or_(
+                BlogPost.render_version.is_(None),
+                BlogPost.render_version != RENDERER_VERSION
+            ))
+
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            last_id = ""
+            while True:
+                rows = db.execute(query.where(BlogPost.id > last_id).limit(BATCH_SIZE)).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                results = list(pool.map(render_row, [tuple(row) for row in rows], chunksize=16))
+                db.execute(
+                    update(BlogPost),
+                    [
+                        {
+                            "id": post_id,
+                            "content_html": content_html,
+                            "content_hash": content_hash,
+                            "render_version": RENDERER_VERSION
+                        }
+                        for post_id, content_html, content_hash in results
+                    ]
+                )
+                db.commit()
+                rendered += len(results)
+                print(f"Rendered {rendered} posts...")
+
+        print(f"Done. {rendered} posts rendered with renderer version {RENDERER_VERSION}.")
+
+    except Exception as e:
+        print(f"Error re-rendering posts: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+def main():
+    """Main function to run the re-render."""
+    print("Blog Post Re-render")
+    print("=" * 30)
+
+    rerender_all = "--all" in sys.argv
+    workers = int(os.getenv("RENDER_WORKERS", "0"))
+    rerender_posts(rerender_all=rerender_all, workers=workers)
+
+if __name__ == "__main__":
+    main()
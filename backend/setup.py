@@ -12,15 +12,23 @@ setup(
         "uvicorn[standard]==0.24.0",
         "pydantic==2.5.0",
         "sqlalchemy==2.0.23",
+        "aiosqlite==0.19.0",
+        "asyncpg==0.29.0",
         "alembic==1.13.1",
         "psycopg2-binary==2.9.9",
         "python-multipart==0.0.6",
         "python-jose[cryptography]==3.3.0",
         "passlib[bcrypt]==1.7.4",
         "python-dotenv==1.0.0",
+        "markdown==3.5.1",
+        "nh3==0.2.15",
+        "Pillow==10.1.0",
         "httpx==0.25.2",
         "pytest==7.4.3",
-        "pytest-asyncio==0.21.1"
+        "pytest-asyncio==0.21.1",
+        "brotli==1.1.0",
+        "zstandard==0.22.0",
+        "orjson==3.9.10"
     ],
     python_requires=">=3.9",
 ) 
\ No newline at end of file
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Script to move stored uploads into the sharded directory layout.
+New uploads and image variants are written to <dir>/ab/cd/<name>; this moves
+files stored flat before that and rewrites their paths in batches.
+It is safe to run while the site is serving and to interrupt: each file is
+hard-linked into place before its rows are updated, and the old name is
+removed only after the commit, so a rerun picks up where the last one stopped.
+Links to the old flat paths (/uploads/<name> in posts, newsletters already
+sent and elsewhere) keep working: the /uploads mount redirects them.
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+from sqlalchemy import select, update
+from app.config import settings
+from app.models.database import SessionLocal
+from app.models.file import File, FileDerivative
+from app.services.image_derivatives import DERIVATIVE_DIR
+from app.services.uploads import UPLOAD_DIR
+from app.utils.paths import shard_path
+
+# Rows moved and committed per round
+BATCH_SIZE = 500
+
+def place(source: Path, target: Path) -> bool:
+    """Make ``target`` hold the bytes of ``source``, keeping ``source``.
+
+    Returns False when neither exists (the row points at a missing file).
+    """
+    if target.exists():
+        return True
+    if not source.exists():
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        # No hard links on this filesystem; copy under a temporary name instead
+        temp_path = target.with_name(f".{target.name}.tmp")
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, target)
+    return True
+
+def unreferenced(db, model, paths):
+    """The subset of ``paths`` no row of ``model`` points at any more."""
+    result = db.execute(select(model.file_path).where(model.file_path.in_(paths)))
+    return set(paths) - set(result.scalars().all())
+
+def shard_table(db, model, root: Path):
+    """Move every flat file referenced by ``model`` rows under ``root``."""
+    moved = missing = 0
+    # Rows already in a shard directory don't match, so reruns skip them
+    query = (
+        select(model.id, model.file_path)
+        .where(
+            model.file_path.like(f"{root}{os.sep}%"),
+            model.file_path.notlike(f"{root}{os.sep}__{os.sep}__{os.sep}%")
+        )
+        .order_by(model.id)
+    )
+    last_id = 0
+    while True:
+        rows = db.execute(query.where(model.id > last_id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        updates = []
+        sources = []
+        for row in rows:
+            source = Path(row.file_path)
+            if source.parent != root:
+                continue
+            target = shard_path(root, source.name)
+            if place(source, target):
+                updates.append({"id": row.id, "file_path": str(target)})
+                sources.append(row.file_path)
+            else:
+                missing += 1
+        if not updates:
+            continue
+        db.execute(update(model), updates)
+        db.commit()
+
+        # Shared content keeps its old name until its last row has moved
+        for path in unreferenced(db, model, sources):
+            Path(path).unlink(missing_ok=True)
+        moved += len(updates)
+        print(f"{model.__tablename__}: moved {moved} rows...")
+
+    return moved, missing
+
+def remove_leftovers(db, model, root: Path):
+    """Delete flat copies a previous run moved but was stopped before removing."""
+    removed = 0
+    with os.scandir(root) as entries:
+        candidates = [
+            entry.path for entry in entries
+            if entry.is_file() and not entry.name.startswith(".")
+            and shard_path(root, entry.name).exists()
+        ]
+    for start in range(0, len(candidates), BATCH_SIZE):
+        for path in unreferenced(db, model, candidates[start:start + BATCH_SIZE]):
+            Path(path).unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+def shard_uploads():
+    """Shard stored uploads and image variants."""
+    if settings.storage_backend != "local":
+        print("Only local storage has directories to shard; S3 keys are already sharded.")
+        return
+
+    db = SessionLocal()
+    try:
+        for model, root in ((File, UPLOAD_DIR), (FileDerivative, DERIVATIVE_DIR)):
+            if not root.is_dir():
+                continue
+            moved, missing = shard_table(db, model, root)
+            removed = remove_leftovers(db, model, root)
+            print(
+                f"Done with {model.__tablename__}: {moved} moved, "
+                f"{missing} missing on disk, {removed} leftover copies removed."
+            )
+
+    except Exception as e:
+        print(f"Error sharding uploads: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+def main():
+    """Main function to run the migration."""
+    print("Upload Directory Sharding")
+    print("=" * 30)
+
+    shard_uploads()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check for the API.
+Seeds a throwaway SQLite database with QUERY_PLAN_ROWS rows in every large
+table, calls every API route through the app and runs EXPLAIN QUERY PLAN on
+each statement the handlers (and the work they start) issued. Fails when a
+statement scans a large table without an index or sorts it in a temporary
+B-tree, unless ALLOWED says why that route's scan is bounded, or when
+a route is missing from the calls below. Pass --show to print every plan.
+"""
+
+import contextvars
+import hashlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Fix import path issues
+backend_dir = Path(__file__).parent.absolute()
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+ROWS = int(os.getenv("QUERY_PLAN_ROWS", "20000"))
+
+# Tables that grow with use; small fixed tables (sections, admins, counters) may be scanned
+LARGE_TABLES = {
+    "blog_posts",
+    "contact_messages",
+    "email_outbox",
+    "file_derivatives",
+    "files",
+    "newsletter_deliveries",
+    "newsletters",
+    "subscribers",
+    "upload_session_chunks",
+    "upload_sessions",
+}
+
+# (route, table) scans or sorts that are bounded by design, with the reason
+ALLOWED = {
+    ("GET /api/blog/posts", "blog_posts"): "admin listing: unordered offset page, reads skip + limit rows",
+    ("GET /api/files/files", "files"): "admin listing: unordered offset page, reads skip + limit rows",
+    ("GET /api/newsletter/newsletters", "newsletters"): "admin listing: unordered offset page, reads skip + limit rows",
+    ("POST /api/newsletter/newsletters/{newsletter_id}/send", "subscribers"): "snapshots every active subscriber as a recipient",
+    ("GET /api/files/images/{sha256}", "files"): "sorts only the uploads sharing one content hash",
+    ("startup", "upload_sessions"): "the stray part-file sweep needs every live session; expired ones are deleted first",
+}
+
+SCAN_PATTERN = re.compile(r"^SCAN (\w+)")
+
+# ASGI scope of the request (or lifespan) a statement runs under
+current_scope = contextvars.ContextVar("current_scope", default=None)
+
+def capture_routes(app):
+    """Wrap the ASGI app so statements can be traced back to the route that issued them."""
+    async def traced(scope, receive, send):
+        token = current_scope.set(scope)
+        try:
+            await app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+    return traced
+
+def route_label(scope):
+    if scope and scope["type"] == "lifespan":
+        # Startup work and the background workers it starts
+        return "startup"
+    route = scope.get("route") if scope else None
+    return f"{scope['method']} {route.path}" if route else None
+
+def seed(admin_id):
+    """Fill every large table with ROWS rows (fewer for parent tables) and ANALYZE.
+
+    Status columns get the skew a live site has (nearly everything sent), so
+    the planner's statistics look like production's.
+    """
+    from sqlalchemy import delete, insert, text
+    from app.models import (
+        BlogPost, ContactInboxCounters, ContactMessage, DeliveryStatus, EmailOutbox,
+        Newsletter, NewsletterDelivery, NewsletterStatus, OutboxStatus, PostStatus,
+        Subscriber, UploadSession, UploadSessionChunk, UploadSessionStatus
+    )
+    from app.models.database import engine
+    from app.models.file import File, FileDerivative
+    from app.services import contact_inbox
+
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    newsletters = max(ROWS // 10, 1)
+    tables = [
+        (BlogPost, lambda i: {
+            "id": f"post-{i:08d}", "title": f"Post {i}", "slug": f"post-{i}", "content": f"Body of post {i}",
+            "content_html": f"<p>Body of post {i}</p>", "excerpt": "Excerpt",
+            "status": PostStatus.PUBLISHED if i % 3 else PostStatus.DRAFT,
+            "published_at": start + timedelta(minutes=i) if i % 3 else None, "author_id": admin_id
+        }, ROWS),
+        (ContactMessage, lambda i: {
+            "id": f"message-{i:08d}", "name": "Sender", "email": "sender@example.com", "subject": f"Hello {i}",
+            "message": "Hello there", "created_at": start + timedelta(minutes=i), "is_read": i % 3 != 0,
+            "is_archived": i % 4 == 0
+        }, ROWS),
+        (Newsletter, lambda i: {
+            "id": f"newsletter-{i:08d}", "subject": f"Issue {i}", "content": "Content",
+            "status": NewsletterStatus.DRAFT if i % 20 == 0 else NewsletterStatus.SENT, "author_id": admin_id
+        }, newsletters),
+        (NewsletterDelivery, lambda i: {
+            "newsletter_id": f"newsletter-{i % newsletters:08d}", "email": f"reader{i}@example.com",
+            "status": DeliveryStatus.FAILED if i % 50 == 0 else DeliveryStatus.SENT
+        }, ROWS),
+        (Subscriber, lambda i: {"email": f"reader{i}@example.com", "is_active": i % 10 != 0}, ROWS),
+        (File, lambda i: {
+            "id": i + 1, "filename": f"{i}.jpg", "original_filename": f"photo-{i}.jpg",
+            "file_path": f"uploads/{i % 256:02x}/{i // 256 % 256:02x}/{i}.jpg", "file_size": 1024,
+            "mime_type": "image/jpeg", "sha256": hashlib.sha256(str(i).encode()).hexdigest()
+        }, ROWS),
+        (FileDerivative, lambda i: {
+            "file_id": i + 1, "width": 320, "height": 240, "mime_type": "image/webp",
+            "file_path": f"uploads/derivatives/{i}-320.webp", "file_size": 512
+        }, ROWS),
+        (EmailOutbox, lambda i: {
+            "recipient": "admin@example.com", "subject": f"Message {i}", "body": "Body",
+            "status": (OutboxStatus.SENT, OutboxStatus.FAILED, OutboxStatus.PENDING)[min(i % 100, 2)], "attempts": 1,
+            "next_attempt_at": start + timedelta(days=365 * 20) if i % 100 == 2 else start
+        }, ROWS),
+        (UploadSession, lambda i: {
+            "id": f"session-{i:08d}", "original_filename": f"upload-{i}.bin", "total_size": 4096,
+            "chunk_size": 1024, "temp_path": f"uploads/.incoming/session-{i:08d}.part",
+            "status": UploadSessionStatus.ACTIVE, "expires_at": start + timedelta(days=365 * 20)
+        }, newsletters),
+        (UploadSessionChunk, lambda i: {"session_id": f"session-{i // 4 % newsletters:08d}", "chunk_index": i % 4}, newsletters * 4),
+    ]
+    with engine.begin() as connection:
+        for model, row, count in tables:
+            for low in range(0, count, 5000):
+                connection.execute(insert(model), [row(i) for i in range(low, min(low + 5000, count))])
+        connection.execute(delete(ContactInboxCounters))
+        contact_inbox.install(connection)
+        # Give the planner real statistics, as a long-running database would have
+        connection.execute(text("ANALYZE"))
+
+def call_every_route(client, headers):
+    """Exercise each route once with realistic arguments."""
+    def check(response, code=200):
+        assert response.status_code == code, (response.request.method, response.request.url, response.status_code, response.text[:300])
+        return response
+
+    check(client.get("/"))
+    check(client.get("/health"))
+    check(client.get("/api/health"))
+    check(client.get("/api/auth/me", headers=headers))
+    check(client.get("/api/compression/stats", headers=headers))
+    check(client.get("/api/auth/principal-cache/stats", headers=headers))
+
+    check(client.get("/api/sections/visibility"))
+    check(client.get("/api/sections/visibility/admin", headers=headers))
+    check(client.put("/api/sections/visibility/blog", json={"is_visible": True}, headers=headers))
+    check(client.post("/api/sections/visibility/bulk", json={
+        "sections_data": [{"is_visible": True}], "section_names": ["newsletter"]
+    }, headers=headers))
+    check(client.post("/api/sections/visibility/reset", headers=headers))
+
+    post = check(client.post("/api/blog/posts", json={"title": "Plan check", "content": "Body", "status": "draft"}, headers=headers)).json()
+    check(client.get("/api/blog/posts", headers=headers))
+    check(client.get(f"/api/blog/posts/{post['id']}", headers=headers))
+    check(client.put(f"/api/blog/posts/{post['id']}", json={"excerpt": "Excerpt"}, headers=headers))
+    check(client.patch(f"/api/blog/posts/{post['id']}/publish", headers=headers))
+    page = check(client.get("/api/blog/public/posts")).json()
+    check(client.get("/api/blog/public/posts", params={"cursor": page["next_cursor"]}))
+    published = check(client.get(f"/api/blog/public/posts/{post['slug']}")).json()
+    check(client.get(f"/api/blog/public/posts/{post['slug']}", headers={"If-None-Match": "\"stale\""}))
+    assert published["id"] == post["id"]
+    check(client.get("/api/blog/public/search", params={"q": "body"}))
+    check(client.delete(f"/api/blog/posts/{post['id']}", headers=headers))
+
+    check(client.post("/api/newsletter/subscribe", params={"email": "new.reader@example.com"}))
+    check(client.post(
+        "/api/newsletter/subscribers/import",
+        files={"file": ("subscribers.csv", io.BytesIO(b"email\nimported@example.com\n"), "text/csv")},
+        headers=headers
+    ))
+    newsletter = check(client.post("/api/newsletter/newsletters", json={"subject": "Plan check", "content": "Content"}, headers=headers)).json()
+    check(client.get("/api/newsletter/newsletters", headers=headers))
+    check(client.get(f"/api/newsletter/newsletters/{newsletter['id']}", headers=headers))
+    check(client.put(f"/api/newsletter/newsletters/{newsletter['id']}", json={"subject": "Plan check 2"}, headers=headers))
+    check(client.post(f"/api/newsletter/newsletters/{newsletter['id']}/send", json={"send_to_all": True}, headers=headers))
+    check(client.get(f"/api/newsletter/newsletters/{newsletter['id']}/progress", headers=headers))
+    draft = check(client.post("/api/newsletter/newsletters", json={"subject": "Draft", "content": "Content"}, headers=headers)).json()
+    check(client.delete(f"/api/newsletter/newsletters/{draft['id']}", headers=headers))
+
+    message = check(client.post("/api/contact/submit", json={
+        "name": "Plan", "email": "plan@example.com", "subject": "Plan check", "message": "Hello"
+    })).json()
+    page = check(client.get("/api/contact/messages", headers=headers)).json()
+    check(client.get("/api/contact/messages", params={"cursor": page["next_cursor"]}, headers=headers))
+    check(client.get("/api/contact/messages", params={"archived": True}, headers=headers))
+    check(client.get("/api/contact/outbox/stats", headers=headers))
+    check(client.get(f"/api/contact/messages/{message['id']}", headers=headers))
+    check(client.put(f"/api/contact/messages/{message['id']}", json={"is_read": False}, headers=headers))
+    check(client.post(f"/api/contact/messages/{message['id']}/mark-read", headers=headers))
+    check(client.post("/api/contact/messages/bulk-mark-read", json=[message["id"], "message-00000003"], headers=headers))
+    check(client.post("/api/contact/messages/bulk-archive", json={
+        "ids": [message["id"], "message-00000004", "message-00000005"]
+    }, headers=headers))
+    check(client.post("/api/contact/messages/bulk-delete", json={"ids": ["message-00000006", "message-00000007"]}, headers=headers))
+    check(client.delete(f"/api/contact/messages/{message['id']}", headers=headers))
+
+    uploaded = check(client.post("/api/files/upload", files={"file": ("notes.txt", b"plan check", "text/plain")}, headers=headers)).json()
+    check(client.get("/api/files/files", headers=headers))
+    check(client.get(f"/api/files/files/{uploaded['id']}", headers=headers))
+    check(client.put(f"/api/files/files/{uploaded['id']}", json={"description": "Notes"}, headers=headers))
+    check(client.head(f"/api/files/files/{uploaded['id']}/download", headers=headers))
+    check(client.get(f"/api/files/files/{uploaded['id']}/download", headers=headers))
+    check(client.get("/api/files/files/7/derivatives", headers=headers))
+    check(client.get(f"/api/files/images/{hashlib.sha256(b'7').hexdigest()}"), 404)
+    check(client.delete(f"/api/files/files/{uploaded['id']}", headers=headers))
+    check(client.post("/api/files/files/bulk-delete", json={"ids": [11, 12, 13]}, headers=headers))
+    session = check(client.post("/api/files/uploads", json={"filename": "notes.txt", "size": 10}, headers=headers), 201).json()
+    check(client.get(f"/api/files/uploads/{session['id']}", headers=headers))
+    check(client.put(
+        f"/api/files/uploads/{session['id']}", content=b"plan check",
+        headers={**headers, "Content-Range": "bytes 0-9/10"}
+    ))
+    check(client.post(f"/api/files/uploads/{session['id']}/complete", headers=headers))
+    other = check(client.post("/api/files/uploads", json={"filename": "other.txt", "size": 10}, headers=headers), 201).json()
+    check(client.delete(f"/api/files/uploads/{other['id']}", headers=headers))
+
+    check(client.put("/api/auth/password", json={"current_password": "plan-check-password", "new_password": "plan-check-password-2"}, headers=headers))
+
+def plan_problems(label, plan):
+    """Scans and sorts of large tables without an index in a plan, minus allowed ones.
+
+    ``plan`` holds (id, parent, detail) rows; a temporary B-tree sorts the rows
+    produced by its siblings, so it only counts against tables read at that level.
+    """
+    problems = []
+    for node, parent, detail in plan:
+        match = SCAN_PATTERN.match(detail)
+        if match and match.group(1) in LARGE_TABLES and "USING" not in detail:
+            if (label, match.group(1)) not in ALLOWED:
+                problems.append(detail)
+        if detail.startswith("USE TEMP B-TREE"):
+            tables = {
+                sibling.split()[1] for _, sibling_parent, sibling in plan
+                if sibling_parent == parent and sibling.startswith(("SCAN ", "SEARCH "))
+            } & LARGE_TABLES
+            unexplained = sorted(table for table in tables if (label, table) not in ALLOWED)
+            if unexplained:
+                problems.append(f"{detail} ({', '.join(unexplained)})")
+    return problems
+
+def main():
+    """Run the check; exits non-zero on a regression."""
+    show = "--show" in sys.argv[1:]
+    workdir = Path(tempfile.mkdtemp())
+    os.chdir(workdir)
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/plans.db"
+    try:
+        from fastapi.routing import APIRoute
+        from fastapi.testclient import TestClient
+        from sqlalchemy import event
+        import main as app_main
+        from app.models import AdminUser
+        from app.models.database import SessionLocal, async_engine
+        from init_admin import create_admin_user
+
+        print(f"Seeding {ROWS} rows per large table in {workdir}...")
+        create_admin_user("plan-check", "plan-check@example.com", "plan-check-password")
+        with SessionLocal() as db:
+            admin_id = db.query(AdminUser.id).filter(AdminUser.username == "plan-check").scalar()
+        seed(admin_id)
+
+        statements = []
+        exercised = set()
+
+        @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+        def record(connection, cursor, statement, parameters, context, executemany):
+            label = route_label(current_scope.get())
+            if label:
+                exercised.add(label)
+                if executemany and parameters and isinstance(parameters[0], (tuple, list)):
+                    parameters = parameters[0]
+                statements.append((label, statement, parameters))
+
+        with TestClient(capture_routes(app_main.app)) as client:
+            token = client.post("/api/auth/login", json={
+                "username": "plan-check", "password": "plan-check-password"
+            }).json()["access_token"]
+            call_every_route(client, {"Authorization": f"Bearer {token}"})
+
+        routes = {
+            f"{method} {route.path}"
+            for route in app_main.app.routes if isinstance(route, APIRoute)
+            for method in route.methods
+        }
+        # Routes that never touch the database don't show up in the trace
+        untraced = {"GET /", "GET /health", "GET /api/health", "GET /api/compression/stats",
+                    "GET /api/auth/principal-cache/stats"}
+        missing = sorted(routes - exercised - untraced)
+
+        failures = []
+        connection = sqlite3.connect(workdir / "plans.db")
+        seen = set()
+        for label, statement, parameters in statements:
+            # Plain INSERT ... VALUES reads nothing; INSERT ... SELECT is checked
+            kind = statement.lstrip().upper()
+            if (label, statement) in seen or not kind.startswith(("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")):
+                continue
+            if kind.startswith("INSERT") and " SELECT " not in kind:
+                continue
+            seen.add((label, statement))
+            plan = [row[:2] + row[3:] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())]
+            problems = plan_problems(label, plan)
+            if show or problems:
+                print(f"\n{label}\n  {' '.join(statement.split())[:200]}")
+                for _, _, detail in plan:
+                    print(f"    {detail}")
+            failures.extend((label, problem) for problem in problems)
+        connection.close()
+
+        print(f"\nChecked {len(seen)} distinct statements from {len(exercised - {'startup'})} routes and startup")
+        for (label, table), reason in sorted(ALLOWED.items()):
+            print(f"  allowed: {label} on {table} ({reason})")
+        if missing:
+            print("❌ Routes not exercised (add them to call_every_route):")
+            for label in missing:
+                print(f"  {label}")
+        if failures:
+            print("❌ Statements scanning or sorting a large table without an index:")
+            for label, problem in failures:
+                print(f"  {label}: {problem}")
+        if missing or failures:
+            sys.exit(1)
+        print("✅ Every hot query uses an index")
+    finally:
+        os.chdir(backend_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Shared test setup. Every test runs against one throwaway SQLite database
+and upload directory, configured before the app is imported.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+workdir = Path(tempfile.mkdtemp())
+os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/test.db"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.models.database import AsyncSessionLocal  # noqa: E402
+from init_admin import create_admin_user  # noqa: E402
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin-password"
+
+def pytest_configure(config):
+    # Uploads live under ./uploads; move there only once pytest has found the tests
+    os.chdir(workdir)
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(workdir, ignore_errors=True)
+
+@pytest.fixture(scope="session")
+def client():
+    """The app with its background workers running."""
+    import main as app_main
+
+    create_admin_user(ADMIN_USERNAME, "admin@example.com", ADMIN_PASSWORD)
+    with TestClient(app_main.app) as client:
+        yield client
+
+def login(client) -> dict:
+    """Log the admin in; returns the Authorization header."""
+    response = client.post("/api/auth/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def admin_headers(client):
+    return login(client)
+
+@pytest_asyncio.fixture
+async def db():
+    async with AsyncSessionLocal() as session:
+        yield session
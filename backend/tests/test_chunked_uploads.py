@@ -0,0 +1,59 @@
+import pytest
+
+from app.api import files
+
+BODY = b"Plain text notes, uploaded in one chunk.\n" * 100
+
+def start_upload(client, headers):
+    response = client.post("/api/files/uploads", headers=headers, json={
+        "filename": "notes.txt", "size": len(BODY), "content_type": "text/plain"
+    })
+    assert response.status_code == 201, response.text
+    session_id = response.json()["id"]
+    response = client.put(f"/api/files/uploads/{session_id}", headers={
+        **headers, "Content-Range": f"bytes 0-{len(BODY) - 1}/{len(BODY)}"
+    }, content=BODY)
+    assert response.status_code == 200, response.text
+    return session_id
+
+def test_failed_complete_reopens_the_session(client, admin_headers, monkeypatch):
+    session_id = start_upload(client, admin_headers)
+
+    def broken_hash(*args):
+        raise RuntimeError("disk went away")
+    monkeypatch.setattr(files, "hash_and_sniff", broken_hash)
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/files/uploads/{session_id}/complete", headers=admin_headers)
+    monkeypatch.undo()
+
+    # The part file is intact, so chunks are accepted again and completing succeeds
+    response = client.put(f"/api/files/uploads/{session_id}", headers={
+        **admin_headers, "Content-Range": f"bytes 0-{len(BODY) - 1}/{len(BODY)}"
+    }, content=BODY)
+    assert response.status_code == 200, response.text
+    response = client.post(f"/api/files/uploads/{session_id}/complete", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["file_size"] == len(BODY)
+
+def test_failed_store_drops_the_session(client, admin_headers, monkeypatch):
+    session_id = start_upload(client, admin_headers)
+
+    async def full_disk(*args):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(files, "store_content_addressed", full_disk)
+    response = client.post(f"/api/files/uploads/{session_id}/complete", headers=admin_headers)
+    assert response.status_code == 500
+
+    # store_upload deleted the part file, so there is nothing left to resume
+    assert client.get(f"/api/files/uploads/{session_id}", headers=admin_headers).status_code == 404
+
+def test_complete_with_missing_chunks_keeps_the_session_open(client, admin_headers):
+    response = client.post("/api/files/uploads", headers=admin_headers, json={
+        "filename": "notes.txt", "size": len(BODY), "content_type": "text/plain"
+    })
+    session_id = response.json()["id"]
+
+    response = client.post(f"/api/files/uploads/{session_id}/complete", headers=admin_headers)
+    assert response.status_code == 409
+    assert client.get(f"/api/files/uploads/{session_id}", headers=admin_headers).json()["missing_chunks"] == [0]
+    assert client.delete(f"/api/files/uploads/{session_id}", headers=admin_headers).status_code == 200
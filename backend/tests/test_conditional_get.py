@@ -0,0 +1,50 @@
+import pytest
+
+from sqlalchemy import text
+
+from app.models.database import engine
+from app.services.newsletter_delivery import enqueue_recipients
+
+def create_post(client, headers, title):
+    response = client.post("/api/blog/posts", headers=headers, json={
+        "title": title, "content": "Body text", "excerpt": "Excerpt", "status": "published"
+    })
+    assert response.status_code == 200, response.text
+
+def test_write_invalidates_the_etag(client, admin_headers):
+    create_post(client, admin_headers, "First post")
+    first = client.get("/api/blog/public/posts")
+    etag = first.headers["etag"]
+    assert client.get("/api/blog/public/posts", headers={"If-None-Match": etag}).status_code == 304
+
+    create_post(client, admin_headers, "Second post")
+    response = client.get("/api/blog/public/posts", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert "Second post" in response.text
+    assert client.get("/api/blog/public/posts", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+def test_admin_validators_need_credentials(client, admin_headers):
+    etag = client.get("/api/blog/posts", headers=admin_headers).headers["etag"]
+    assert client.get("/api/blog/posts", headers={"If-None-Match": etag}).status_code == 403
+
+@pytest.mark.asyncio
+async def test_deliveries_are_not_version_tracked(client, admin_headers, db):
+    newsletter = client.post("/api/newsletter/newsletters", headers=admin_headers, json={
+        "subject": "Versions", "content": "Hello"
+    }).json()
+    etag = client.get("/api/newsletter/newsletters", headers=admin_headers).headers["etag"]
+
+    await enqueue_recipients(db, newsletter["id"], [f"reader{index}@example.com" for index in range(50)])
+    await db.commit()
+
+    response = client.get("/api/newsletter/newsletters", headers={**admin_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    progress = client.get(f"/api/newsletter/newsletters/{newsletter['id']}/progress", headers=admin_headers)
+    assert progress.json()["pending"] == 50
+    assert "etag" not in progress.headers
+    with engine.connect() as connection:
+        triggers = connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'newsletter_deliveries'"
+        )).scalars().all()
+    assert triggers == []
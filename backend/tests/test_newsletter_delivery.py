@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.models.newsletter import DeliveryStatus, NewsletterDelivery
+from app.services.newsletter_delivery import (
+    claim_pending,
+    enqueue_recipients,
+    fail_abandoned,
+    retry_failed
+)
+
+@pytest.fixture
+def newsletter_id(client, admin_headers):
+    response = client.post("/api/newsletter/newsletters", headers=admin_headers, json={
+        "subject": "Delivery test", "content": "Hello"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+async def statuses(db, newsletter_id):
+    result = await db.execute(
+        select(NewsletterDelivery.email, NewsletterDelivery.status)
+        .where(NewsletterDelivery.newsletter_id == newsletter_id)
+    )
+    return dict(result.all())
+
+async def set_rows(db, newsletter_id, emails, **values):
+    await db.execute(
+        update(NewsletterDelivery)
+        .where(NewsletterDelivery.newsletter_id == newsletter_id, NewsletterDelivery.email.in_(emails))
+        .values(**values)
+    )
+    await db.commit()
+
+@pytest.mark.asyncio
+async def test_claimed_rows_wait_for_the_lease(db, newsletter_id):
+    await enqueue_recipients(db, newsletter_id, ["a@example.com", "b@example.com"])
+    await db.commit()
+
+    claimed = await claim_pending(db, newsletter_id, "task-a")
+    assert [row.email for row in claimed] == ["a@example.com", "b@example.com"]
+    assert await claim_pending(db, newsletter_id, "task-b") == []
+
+    # Once task-a's lease runs out its pending rows can be taken over
+    await set_rows(db, newsletter_id, ["b@example.com"], lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+    assert [row.email for row in await claim_pending(db, newsletter_id, "task-b")] == ["b@example.com"]
+
+@pytest.mark.asyncio
+async def test_retry_skips_interrupted_deliveries(db, newsletter_id):
+    emails = ["failed@example.com", "abandoned@example.com", "held@example.com"]
+    await enqueue_recipients(db, newsletter_id, emails)
+    await db.commit()
+    expired = datetime.utcnow() - timedelta(seconds=1)
+    await set_rows(db, newsletter_id, emails[:1], status=DeliveryStatus.FAILED, error="550 mailbox unavailable")
+    await set_rows(db, newsletter_id, emails[1:2], status=DeliveryStatus.SENDING, lease_expires_at=expired)
+    await set_rows(db, newsletter_id, emails[2:], status=DeliveryStatus.SENDING,
+                   lease_expires_at=datetime.utcnow() + timedelta(minutes=5))
+
+    await fail_abandoned(db, [newsletter_id])
+    await retry_failed(db, newsletter_id)
+    await db.commit()
+
+    assert await statuses(db, newsletter_id) == {
+        "failed@example.com": DeliveryStatus.PENDING,
+        "abandoned@example.com": DeliveryStatus.INTERRUPTED,
+        "held@example.com": DeliveryStatus.SENDING
+    }
+
+@pytest.mark.asyncio
+async def test_deleting_a_newsletter_deletes_its_deliveries(client, admin_headers, db, newsletter_id):
+    await enqueue_recipients(db, newsletter_id, ["gone@example.com"])
+    await db.commit()
+
+    assert client.delete(f"/api/newsletter/newsletters/{newsletter_id}", headers=admin_headers).status_code == 200
+    remaining = await db.scalar(
+        select(func.count()).select_from(NewsletterDelivery).where(NewsletterDelivery.newsletter_id == newsletter_id)
+    )
+    assert remaining == 0
@@ -0,0 +1,41 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app.models.admin import AdminUser
+from app.models.database import AsyncSessionLocal
+from app.services.principal_cache import principal_cache
+from conftest import login
+
+async def set_active(active: bool, rollback: bool = False) -> None:
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(AdminUser))).scalar_one()
+        user.is_active = active  # type: ignore
+        await db.flush()
+        await (db.rollback() if rollback else db.commit())
+
+def test_login_refreshes_cached_last_login(client):
+    headers = login(client)
+    first = client.get("/api/auth/me", headers=headers).json()["last_login"]
+
+    login(client)
+    assert client.get("/api/auth/me", headers=headers).json()["last_login"] > first
+
+def test_deactivation_drops_cached_principals(client):
+    headers = login(client)
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    asyncio.run(set_active(False, rollback=True))
+    assert principal_cache.stats()["entries"] == 1
+
+    try:
+        asyncio.run(set_active(False))
+        assert principal_cache.stats()["entries"] == 0
+        assert client.get("/api/auth/me", headers=headers).status_code == 400
+    finally:
+        asyncio.run(set_active(True))
+
+def test_stats_are_admin_only(client, admin_headers):
+    assert client.get("/api/auth/principal-cache/stats").status_code == 403
+    stats = client.get("/api/auth/principal-cache/stats", headers=admin_headers).json()
+    assert set(stats) == {"entries", "hits", "misses", "evictions"}
@@ -0,0 +1,86 @@
+import pytest
+
+from app.services import rate_limit
+from app.services.rate_limit import DatabaseBackend, MemoryBackend, RateLimiter, parse_rate
+
+class Clock:
+    """Stands in for time.monotonic and time.time in the rate limit module."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    return clock
+
+def test_parse_rate():
+    rate = parse_rate("5/minute")
+    assert (rate.limit, rate.window, rate.interval) == (5, 60, 12)
+    assert parse_rate("100/hours").window == 3600
+    assert parse_rate("10/30").window == 30
+    assert parse_rate("") is None and parse_rate("0/minute") is None
+    with pytest.raises(ValueError):
+        parse_rate("five/minute")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "database"])
+async def test_bucket_refills_one_token_per_interval(client, clock, backend):
+    limiter = RateLimiter(
+        MemoryBackend(max_keys=100) if backend == "memory" else DatabaseBackend(),
+        {"login": (parse_rate("3/minute"), None)}
+    )
+    client_address = f"gcra-{backend}"
+
+    results = [await limiter.hit("login", client_address) for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == 20
+    assert results[3].headers()["Retry-After"] == "20"
+
+    clock.now += 19
+    assert not (await limiter.hit("login", client_address)).allowed
+    clock.now += 1
+    assert (await limiter.hit("login", client_address)).allowed
+    assert not (await limiter.hit("login", client_address)).allowed
+
+    # A full minute idle refills the whole bucket, and no more
+    clock.now += 3600
+    assert [(await limiter.hit("login", client_address)).allowed for _ in range(4)] == [True, True, True, False]
+
+@pytest.mark.asyncio
+async def test_refused_requests_spare_the_route_bucket(clock):
+    limiter = RateLimiter(MemoryBackend(max_keys=100), {"login": (parse_rate("2/minute"), parse_rate("4/minute"))})
+
+    # One noisy client is refused by its own bucket and leaves the route bucket alone
+    assert [(await limiter.hit("login", "noisy")).allowed for _ in range(10)] == [True, True] + [False] * 8
+    assert (await limiter.hit("login", "quiet")).remaining == 1
+    assert (await limiter.hit("login", "other")).allowed
+    assert not (await limiter.hit("login", "late")).allowed
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "database"])
+async def test_trusted_clients_skip_an_exhausted_route_bucket(client, clock, backend):
+    limiter = RateLimiter(
+        MemoryBackend(max_keys=100) if backend == "memory" else DatabaseBackend(),
+        {"login": (parse_rate("10/minute"), parse_rate("3/minute"))},
+        {"login": 3600}
+    )
+    admin = f"admin-{backend}"
+    await limiter.trust("login", admin)
+    for index in range(3):
+        assert (await limiter.hit("login", f"flood-{backend}-{index}")).allowed
+    assert not (await limiter.hit("login", f"flood-{backend}-3")).allowed
+
+    assert (await limiter.hit("login", admin)).allowed
+
+    # Trust lapses after the configured time
+    clock.now += 3601
+    for index in range(3):
+        await limiter.hit("login", f"flood-{backend}-{index}")
+    assert not (await limiter.hit("login", admin)).allowed
@@ -0,0 +1,35 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.paths import shard_path
+from app.utils.static_files import ShardedStaticFiles
+
+NAME = "3f2a9c1e-6b7d-4e8f-9a0b-1c2d3e4f5a6b.png"
+
+def uploads_client(root):
+    app = FastAPI()
+    app.mount("/uploads", ShardedStaticFiles(directory=root), name="uploads")
+    return TestClient(app)
+
+def test_flat_links_redirect_to_sharded_files(tmp_path):
+    for directory in (tmp_path, tmp_path / "derivatives"):
+        target = shard_path(directory, NAME)
+        target.parent.mkdir(parents=True)
+        target.write_bytes(b"image bytes")
+    client = uploads_client(tmp_path)
+
+    response = client.get(f"/uploads/{NAME}?v=2", follow_redirects=False)
+    assert response.status_code == 301
+    assert response.headers["location"].endswith(f"/uploads/3f/2a/{NAME}?v=2")
+    assert client.get(f"/uploads/{NAME}").content == b"image bytes"
+
+    response = client.get(f"/uploads/derivatives/{NAME}", follow_redirects=False)
+    assert response.headers["location"].endswith(f"/uploads/derivatives/3f/2a/{NAME}")
+
+def test_flat_files_not_yet_moved_are_served_in_place(tmp_path):
+    (tmp_path / NAME).write_bytes(b"flat bytes")
+    client = uploads_client(tmp_path)
+
+    assert client.get(f"/uploads/{NAME}").content == b"flat bytes"
+    assert client.get("/uploads/missing.png").status_code == 404
+    assert client.get(f"/uploads/3f/2a/{NAME}").status_code == 404
@@ -0,0 +1,25 @@
+from app.services import subscribers
+
+def upload_csv(client, headers, text):
+    response = client.post(
+        "/api/newsletter/subscribers/import",
+        headers=headers,
+        files={"file": ("subscribers.csv", text.encode(), "text/csv")}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_import_reads_the_email_column_in_batches(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(subscribers, "IMPORT_BATCH_SIZE", 2)
+    text = "\ufeffname,Email\nAda,ada@example.com\nBob,BOB@example.com\nBad,not-an-email\nAda again,ada@example.com\nCy,cy@example.com\n"
+
+    assert upload_csv(client, admin_headers, text) == {"processed": 5, "inserted": 3, "invalid": 1}
+    # Importing again leaves existing subscribers alone
+    assert upload_csv(client, admin_headers, text)["inserted"] == 0
+
+def test_import_reads_uploads_spooled_to_disk(client, admin_headers):
+    # Starlette keeps uploads in memory up to 1 MB and moves larger ones to a temporary file
+    text = "".join(f"spooled{index:06d}@example.com\n" for index in range(50000))
+    assert len(text) > 1024 * 1024
+
+    assert upload_csv(client, admin_headers, text) == {"processed": 50000, "inserted": 50000, "invalid": 0}